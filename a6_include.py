@@ -5,6 +5,9 @@
 #              are available and how they're implemented.
 #              Don't modify the contents of this file.
 
+import os
+from hashlib import blake2b
+
 
 # -------------- Used by both HashMaps (SC & OA)  -------------- #
 
@@ -16,13 +19,21 @@ class DynamicArray:
     """
     Class implementing a Dynamic Array
     Supported methods are:
-    append, pop, swap, get_at_index, set_at_index, length
+    append, extend, fill, pop, swap, get_at_index, set_at_index, length
+    and the unchecked accessors get_unchecked, set_unchecked for hash map hot paths
     """
 
     def __init__(self, arr=None) -> None:
         """Initialize new dynamic array using a list."""
         self._data = arr.copy() if arr else []
 
+    @classmethod
+    def filled(cls, length: int, value: object = None) -> "DynamicArray":
+        """Return a new array of the given length with every element set to value, allocated in one step."""
+        da = cls()
+        da._data = [value] * length
+        return da
+
     def __iter__(self):
         """
         Disable iterator capability for DynamicArray class
@@ -45,6 +56,16 @@ class DynamicArray:
         """Add new element at the end of the array."""
         self._data.append(value)
 
+    def extend(self, values) -> None:
+        """Add every element of another DynamicArray or of an iterable at the end of the array."""
+        if isinstance(values, DynamicArray):
+            values = values._data
+        self._data.extend(values)
+
+    def fill(self, value: object) -> None:
+        """Set every element of the array to value without changing its length."""
+        self._data[:] = [value] * len(self._data)
+
     def pop(self):
         """Remove element from end of the array and return it."""
         return self._data.pop()
@@ -73,6 +94,21 @@ class DynamicArray:
         """Set value of element at a given index using [] syntax."""
         self.set_at_index(index, value)
 
+    def get_unchecked(self, index: int):
+        """
+        Return value of element at a given index without the bounds check of get_at_index.
+        Intended for hash map internals that compute indices modulo the length.
+        Negative indices are not rejected and count from the end of the array.
+        """
+        return self._data[index]
+
+    def set_unchecked(self, index: int, value: object) -> None:
+        """
+        Set value of element at a given index without the bounds check of set_at_index.
+        Intended for hash map internals that compute indices modulo the length.
+        """
+        self._data[index] = value
+
     def length(self) -> int:
         """Return length of array."""
         return len(self._data)
@@ -96,6 +132,62 @@ def hash_function_2(key: str) -> int:
     return hash
 
 
+def hash_function_3(key: str) -> int:
+    """
+    Hash function #3, 64-bit FNV-1a over the code points of the key.
+    Slower than #1 and #2 but spreads anagrams and short keys over the whole table.
+    """
+    hash = 0xcbf29ce484222325
+    for letter in key:
+        hash = ((hash ^ ord(letter)) * 0x100000001b3) & 0xffffffffffffffff
+    return hash
+
+
+# Hash functions ordered from cheapest to strongest, used by HashMaps that switch functions adaptively
+HASH_FUNCTION_LADDER = (hash_function_1, hash_function_2, hash_function_3)
+
+
+def make_seeded_hash_function(seed: bytes = None):
+    """
+    Return a keyed hash function for keys that may be chosen by an attacker.
+    Keys are hashed with BLAKE2b keyed by a secret seed, a keyed PRF in the spirit of SipHash,
+    so colliding keys cannot be crafted without knowing the seed.
+    Accepts str, bytes, bytearray and memoryview keys. The seed is available as the function's seed attribute.
+
+    :param seed: Up to 64 bytes of key material, or None for 16 random bytes
+    """
+    if seed is None:
+        seed = os.urandom(16)
+
+    def hash_function_seeded(key) -> int:
+        """Keyed hash function, see make_seeded_hash_function"""
+        if isinstance(key, str):
+            key = key.encode('utf-8', 'surrogatepass')
+        return int.from_bytes(blake2b(key, digest_size=8, key=seed).digest(), 'little')
+
+    hash_function_seeded.seed = seed
+    return hash_function_seeded
+
+
+def hash_function_bytes_1(key) -> int:
+    """
+    Hash function #1 for bytes, bytearray or memoryview keys.
+    Gives the same result as hash_function_1 on the ASCII decoding of the key, without decoding it.
+    """
+    return sum(memoryview(key).cast('B'))
+
+
+def hash_function_bytes_2(key) -> int:
+    """
+    Hash function #2 for bytes, bytearray or memoryview keys.
+    Gives the same result as hash_function_2 on the ASCII decoding of the key, without decoding it.
+    """
+    hash = 0
+    for index, byte in enumerate(memoryview(key).cast('B'), 1):
+        hash += index * byte
+    return hash
+
+
 # --------- For use in Separate Chaining (SC) HashMap  --------- #
 
 class SLNode:
@@ -103,6 +195,9 @@ class SLNode:
     Singly Linked List node for use in a hash map
     """
 
+    # Slots instead of a per-instance __dict__ keep every chained entry small
+    __slots__ = ('key', 'value', 'next')
+
     def __init__(self, key: str, value: object, next: "SLNode" = None) -> None:
         """Initialize node given a key and value."""
         self.key = key
@@ -210,6 +305,9 @@ class LinkedList:
 
 class HashEntry:
 
+    # Slots instead of a per-instance __dict__ keep every stored entry small
+    __slots__ = ('key', 'value', 'is_tombstone')
+
     def __init__(self, key: str, value: object) -> None:
         """Initialize an entry for use in a hash map."""
         self.key = key
@@ -0,0 +1,95 @@
+# Name: Zachary Garner
+# Course: CS261 - Data Structures
+# Assignment: HashMap Implementation
+# Description: Benchmark of the probing strategies of the open addressing HashMap. Each strategy inserts a set of keys
+# into a table presized to a target load factor, looks every key up, and looks up as many absent keys. The original
+# quadratic probe, which computed (index + probing ** 2) % capacity at every step, is included as PowModHashMap for
+# reference. Linear and group probing cluster badly under a weak hash function, so the default is hash_function_3.
+#
+# Usage: python benchmark_probing.py [number of keys] [hash function number]
+
+import sys
+import time
+
+import hash_map_oa
+from a6_include import hash_function_1, hash_function_2, hash_function_3
+
+
+class PowModHashMap(hash_map_oa.HashMap):
+    """
+    Open addressing HashMap probing with the original power and modulo quadratic probe.
+    """
+
+    def _locate(self, key: str) -> tuple:
+        """Follows the probe sequence of the key, computing every index from scratch."""
+        capacity = self._capacity
+        hash = self._hash_function(key)
+        initial_index = hash % capacity
+        index = initial_index
+        free_index = -1
+        probing = 0
+
+        while probing < capacity:
+            bucket = self._buckets.get_unchecked(index)
+            if bucket is None:
+                if free_index == -1:
+                    free_index = index
+                break
+            if bucket.is_tombstone:
+                if free_index == -1:
+                    free_index = index
+            elif bucket.key == key:
+                return index, free_index, probing + 1, hash
+            probing += 1
+            index = (initial_index + probing ** 2) % capacity
+
+        return -1, free_index, probing + 1, hash
+
+
+def run(name: str, map_class: type, function: callable, keys: list, misses: list, load: float, **options) -> None:
+    """Times puts, hits and misses on one map configuration at a load factor and prints one result line."""
+    m = map_class(int(len(keys) / load), function, grow_at=0.95, **options)
+
+    started = time.perf_counter()
+    for i, key in enumerate(keys):
+        m.put(key, i)
+    put_time = time.perf_counter() - started
+
+    # Delete and reinsert a tenth of the keys so that lookups also cross tombstones
+    for key in keys[::10]:
+        m.remove(key)
+    for i, key in enumerate(keys[::10]):
+        m.put(key, i)
+
+    started = time.perf_counter()
+    for key in keys:
+        m.get(key)
+    hit_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for key in misses:
+        m.get(key)
+    miss_time = time.perf_counter() - started
+
+    print(f"{name:<28} load {m.table_load():.2f}   put {put_time:7.3f}s   hit {hit_time:7.3f}s   "
+          f"miss {miss_time:7.3f}s")
+
+
+if __name__ == "__main__":
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    function = (hash_function_1, hash_function_2, hash_function_3)[int(sys.argv[2]) - 1 if len(sys.argv) > 2 else 2]
+    keys = ['key' + str(i) for i in range(count)]
+    misses = ['miss' + str(i) for i in range(count)]
+    print(f"{count} keys, {function.__name__}\n")
+
+    for load in (0.25, 0.5, 0.75, 0.9):
+        # Quadratic probing is only guaranteed to find a free bucket up to a load factor of 0.5
+        if load <= 0.5:
+            run('quadratic, pow/mod', PowModHashMap, function, keys, misses, load)
+            run('quadratic, incremental', hash_map_oa.HashMap, function, keys, misses, load)
+        run('linear', hash_map_oa.HashMap, function, keys, misses, load, probing=hash_map_oa.LINEAR_PROBING)
+        for group_size in (8, 16):
+            run(f'group of {group_size}', hash_map_oa.HashMap, function, keys, misses, load,
+                probing=hash_map_oa.GROUP_PROBING, group_size=group_size)
+        print()
@@ -0,0 +1,116 @@
+# Name: Zachary Garner
+# Course: CS261 - Data Structures
+# Assignment: HashMap Implementation
+# Description: Counting Bloom filter kept alongside a HashMap so that lookups of absent keys can be rejected without
+# touching the buckets. Each key sets or increments a few counters, chosen by double hashing, and a key whose counters
+# are not all non-zero was never added. Counters rather than bits let remove take a key back out of the filter.
+
+from math import log
+
+# Counters stop at this value. A saturated counter is never decremented again, since the number of keys behind it is
+# no longer known, which can only cost false positives and never a false negative.
+_SATURATED = 255
+
+
+def _hash(key) -> int:
+    """
+    Return a 64-bit hash of a key. Bytearray and memoryview keys, which are not hashable or only hashable in some
+    formats, are hashed as the bytes they hold, so they land on the same counters as an equal bytes key.
+    """
+    if isinstance(key, (bytearray, memoryview)):
+        key = bytes(key)
+    return hash(key) & 0xffffffffffffffff
+
+
+class CountingBloomFilter:
+    """
+    Counting Bloom filter over str, bytes, bytearray or memoryview keys, or any other hashable keys.
+    Keys are hashed with Python's built-in hash, which is keyed per process for strings and bytes and independent of
+    the HashMap's hash function, so a bad map hash function does not make the filter useless.
+    """
+
+    def __init__(self, expected_keys: int, bits_per_key: int = 10) -> None:
+        """
+        Initialize an empty filter.
+
+        :param expected_keys: Number of keys the filter is sized for
+        :param bits_per_key:  Number of counters per expected key. 10 gives about 1% false positives at
+                              expected_keys, each extra counter per key lowers that by roughly a third
+        """
+        self._bits_per_key = bits_per_key
+        self._slots = max(expected_keys * bits_per_key, 64)
+        self._hashes = max(1, round(bits_per_key * log(2)))
+        self._counters = bytearray(self._slots)
+
+    def get_slots(self) -> int:
+        """
+        Return the number of counters
+        """
+        return self._slots
+
+    def get_hashes(self) -> int:
+        """
+        Return the number of counters each key maps to
+        """
+        return self._hashes
+
+    def _positions(self, key: str):
+        """Generator over the counter positions of a key, using double hashing of one 64-bit hash."""
+        h = _hash(key)
+        step = (h >> 32) | 1
+        position = h % self._slots
+        for _ in range(self._hashes):
+            yield position
+            position = (position + step) % self._slots
+
+    def add(self, key: str) -> None:
+        """
+        Add a key. Adding a key already in the filter counts it twice, so callers only add keys new to the map.
+        """
+        counters = self._counters
+        for position in self._positions(key):
+            if counters[position] != _SATURATED:
+                counters[position] += 1
+
+    def add_all(self, keys) -> None:
+        """
+        Add every key of an iterable, each assumed to be distinct.
+        """
+        for key in keys:
+            self.add(key)
+
+    def discard(self, key: str) -> None:
+        """
+        Take back a key that was added.
+        """
+        counters = self._counters
+        for position in self._positions(key):
+            if counters[position] != _SATURATED:
+                counters[position] -= 1
+
+    def might_contain(self, key: str) -> bool:
+        """
+        Return False if the key was definitely never added, True if it may have been.
+        """
+        counters = self._counters
+        h = _hash(key)
+        step = (h >> 32) | 1
+        slots = self._slots
+        position = h % slots
+        for _ in range(self._hashes):
+            if not counters[position]:
+                return False
+            position = (position + step) % slots
+        return True
+
+    def clear(self) -> None:
+        """
+        Remove every key.
+        """
+        self._counters = bytearray(self._slots)
+
+    def fill_ratio(self) -> float:
+        """
+        Return the fraction of counters that are non-zero.
+        """
+        return 1 - self._counters.count(0) / self._slots
@@ -0,0 +1,481 @@
+# Name: Zachary Garner
+# Course: CS261 - Data Structures
+# Assignment: HashMap Implementation
+# Description: Change data capture for the change_feed option of both HashMaps. The map appends an event with the next
+# sequence number for every put, update, remove and clear, the feed keeps a bounded window of recent events, and each
+# subscription buffers the events it has not consumed yet, up to a bound past which the producer either waits for the
+# consumer or cuts the subscription off. A Replica keeps a second map in sync from a snapshot and the feed offset the
+# snapshot was taken at, so that it never needs a full export again unless it falls too far behind.
+
+import threading
+from collections import deque
+
+# Event kinds
+PUT = 'put'
+UPDATE = 'update'
+REMOVE = 'remove'
+CLEAR = 'clear'
+
+# What a subscription does with a new event while it already buffers max_pending events
+BLOCK = 'block'
+DROP = 'drop'
+
+
+class FeedGapException(Exception):
+    """
+    Raised when the events a consumer needs are no longer available, because its subscription dropped events or the
+    feed no longer retains the requested offset.
+    """
+    pass
+
+
+class ChangeEvent:
+    """
+    One change of a map. value is None for remove and clear events.
+    """
+    __slots__ = ('sequence', 'kind', 'key', 'value')
+
+    def __init__(self, sequence: int, kind: str, key: str, value: object) -> None:
+        """Initialize an event with its sequence number, kind, key and new value."""
+        self.sequence = sequence
+        self.kind = kind
+        self.key = key
+        self.value = value
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        if self.kind == CLEAR:
+            return f"{self.sequence} clear"
+        if self.kind == REMOVE:
+            return f"{self.sequence} remove {self.key}"
+        return f"{self.sequence} {self.kind} {self.key}: {self.value}"
+
+
+class Subscription:
+    """
+    Consumer position in a ChangeFeed, with the events delivered to it but not consumed yet.
+    Created by ChangeFeed.subscribe(). Events are either pulled with poll() or, when the subscription has a callback,
+    pushed to the callback in batches.
+    """
+
+    def __init__(self,
+                 feed: "ChangeFeed",
+                 position: int,
+                 callback: callable,
+                 max_pending: int,
+                 batch_size: int,
+                 overflow: str,
+                 timeout: float) -> None:
+        """Initialize a subscription positioned after the event with sequence number position."""
+        self._feed = feed
+        self._position = position
+        self._callback = callback
+        self._max_pending = max_pending
+        self._batch_size = batch_size
+        self._overflow = overflow
+        self._timeout = timeout
+
+        self._pending = deque()
+        self._lagging = False
+        self._dropped = 0
+        self._closed = False
+
+    def get_position(self) -> int:
+        """
+        Return the sequence number of the last event consumed, the offset to resume from after a restart
+        """
+        return self._position
+
+    def get_pending(self) -> int:
+        """
+        Return the number of events delivered to the subscription and not consumed yet
+        """
+        return len(self._pending)
+
+    def get_dropped(self) -> int:
+        """
+        Return the number of events dropped because the subscription was full
+        """
+        return self._dropped
+
+    def is_lagging(self) -> bool:
+        """
+        Return True once the subscription has dropped an event. It delivers no further events, and poll() raises
+        FeedGapException when the events buffered before the gap are consumed.
+        """
+        return self._lagging
+
+    def _offer(self, event: ChangeEvent) -> None:
+        """
+        Buffers a new event, waiting for room or dropping it when the subscription is full. Called by the feed with
+        its lock held.
+        """
+        if self._closed:
+            return
+        if self._lagging:
+            self._dropped += 1
+            return
+
+        pending = self._pending
+        if self._callback is None and len(pending) >= self._max_pending:
+            if self._overflow == BLOCK:
+                # Waiting releases the feed's lock, so that a consumer thread can poll
+                self._feed._condition.wait_for(lambda: len(pending) < self._max_pending or self._closed,
+                                               self._timeout)
+            if len(pending) >= self._max_pending:
+                # The consumer is too slow, so cut it off rather than buffer without bound
+                self._lagging = True
+                self._dropped += 1
+                return
+
+        pending.append(event)
+        if self._callback is not None and len(pending) >= self._batch_size:
+            self._deliver()
+
+    def _deliver(self) -> None:
+        """Passes every buffered event to the callback, in batches of at most batch_size events."""
+        pending = self._pending
+        while pending:
+            batch = [pending.popleft() for _ in range(min(self._batch_size, len(pending)))]
+            self._position = batch[-1].sequence
+            self._callback(batch)
+
+    def poll(self, max_events: int = None, timeout: float = 0.0) -> list:
+        """
+        Consumes the oldest buffered events.
+
+        :param max_events: Largest number of events returned, by default batch_size
+        :param timeout:    Seconds to wait for an event when none is buffered, 0 to return immediately
+        :return:           List of ChangeEvents in sequence order, empty if none arrived in time
+        :raises FeedGapException: If the subscription dropped events and every event before the gap was consumed
+        """
+        condition = self._feed._condition
+        with condition:
+            pending = self._pending
+            if not pending and timeout:
+                condition.wait_for(lambda: pending or self._lagging or self._closed, timeout)
+            if not pending and self._lagging:
+                raise FeedGapException(f"events after {self._position} were dropped, {self._dropped} in total")
+
+            count = min(len(pending), max_events or self._batch_size)
+            batch = [pending.popleft() for _ in range(count)]
+            if batch:
+                self._position = batch[-1].sequence
+                # A producer may be waiting for room
+                condition.notify_all()
+            return batch
+
+    def flush(self) -> None:
+        """
+        Passes the buffered events to the callback without waiting for a full batch.
+        """
+        with self._feed._condition:
+            if self._callback is not None:
+                self._deliver()
+
+    def close(self) -> None:
+        """
+        Stops delivery to the subscription and releases a producer waiting for room in it.
+        """
+        self._feed._unsubscribe(self)
+
+
+class ChangeFeed:
+    """
+    Ordered feed of the changes of one map. Sequence numbers start at 1 and increase by 1 per event.
+    The feed retains the most recent events, so that a consumer can resume from an offset or a new subscription can
+    start in the past, and hands every new event to its subscriptions.
+    """
+
+    def __init__(self, retention: int = 4096) -> None:
+        """
+        Initialize an empty feed.
+
+        :param retention: Number of most recent events kept for subscriptions that start from an offset
+        """
+        self._events = deque(maxlen=retention)
+        self._sequence = 0
+        self._subscriptions = []
+
+        # Guards the events and every subscription's buffer, and wakes up waiting producers and consumers
+        self._condition = threading.Condition()
+
+    def get_sequence(self) -> int:
+        """
+        Return the sequence number of the most recent event, 0 before the first one
+        """
+        return self._sequence
+
+    def get_lock(self) -> threading.Condition:
+        """
+        Return the lock of the feed. A map holds it from the start of a change until the change's event is appended,
+        so that nothing holding the lock sees a change without its event.
+        """
+        return self._condition
+
+    def snapshot(self, hash_map) -> tuple:
+        """
+        Return a snapshot of the given map, which publishes to this feed, together with the sequence number of the
+        last change the snapshot includes.
+
+        :param hash_map: The map the feed belongs to
+        :return:         (snapshot, sequence)
+        """
+        with self._condition:
+            return hash_map.snapshot(), self._sequence
+
+    def get_oldest_offset(self) -> int:
+        """
+        Return the oldest offset a subscription can start from, i.e. the sequence number before the oldest retained
+        event
+        """
+        if self._events:
+            return self._events[0].sequence - 1
+        return self._sequence
+
+    def get_subscriptions(self) -> int:
+        """
+        Return the number of open subscriptions
+        """
+        return len(self._subscriptions)
+
+    def append(self, kind: str, key: str = None, value: object = None) -> ChangeEvent:
+        """
+        Records a change as the next event and offers it to every subscription. Called by the map after the change is
+        made. With a BLOCK subscription that is full, this waits for the consumer.
+
+        :param kind:  PUT, UPDATE, REMOVE or CLEAR
+        :param key:   The changed key, None for CLEAR
+        :param value: The new value for PUT and UPDATE
+        :return:      The event
+        """
+        with self._condition:
+            self._sequence += 1
+            event = ChangeEvent(self._sequence, kind, key, value)
+            self._events.append(event)
+            # A subscription may be closed while the producer waits for room in it, so iterate over a copy
+            for subscription in list(self._subscriptions):
+                subscription._offer(event)
+            # Wake up consumers waiting in poll()
+            self._condition.notify_all()
+        return event
+
+    def events_since(self, offset: int) -> list:
+        """
+        Returns the retained events after an offset.
+
+        :param offset: Sequence number of the last event already seen
+        :raises FeedGapException: If events after offset are no longer retained
+        """
+        with self._condition:
+            if offset < self.get_oldest_offset():
+                raise FeedGapException(f"offset {offset} is older than the oldest retained offset "
+                                       f"{self.get_oldest_offset()}")
+            skip = len(self._events) - (self._sequence - offset)
+            return [self._events[i] for i in range(max(skip, 0), len(self._events))]
+
+    def subscribe(self,
+                  offset: int = None,
+                  callback: callable = None,
+                  max_pending: int = 1024,
+                  batch_size: int = 64,
+                  overflow: str = DROP,
+                  timeout: float = 1.0) -> Subscription:
+        """
+        Opens a subscription.
+
+        :param offset:      Sequence number of the last event already seen, e.g. the offset a snapshot was taken at or
+                            the position of a closed subscription. By default only new events are delivered
+        :param callback:    Function called with each batch of events as a list, in the thread making the change.
+                            Without a callback, events are pulled with Subscription.poll()
+        :param max_pending: Number of buffered events from which new ones wait or are dropped. Retained events after
+                            offset are buffered on subscribing, even past this bound
+        :param batch_size:  Number of events per callback batch, and the default number of events per poll()
+        :param overflow:    BLOCK to make the producer wait, up to timeout, for a polling consumer to make room, which
+                            needs the consumer to run in another thread, or DROP. Either way an event that finds no
+                            room cuts the subscription off
+        :param timeout:     Longest wait of a producer for room, in seconds, or None to wait indefinitely
+        :raises FeedGapException: If events after offset are no longer retained
+        """
+        if overflow not in (BLOCK, DROP):
+            raise ValueError(f"overflow must be {BLOCK!r} or {DROP!r}")
+
+        with self._condition:
+            if offset is None:
+                offset = self._sequence
+            backlog = self.events_since(offset)
+            subscription = Subscription(self, offset, callback, max_pending, batch_size, overflow, timeout)
+            subscription._pending.extend(backlog)
+            self._subscriptions.append(subscription)
+            if callback is not None:
+                subscription._deliver()
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        """Removes a subscription and wakes up a producer waiting for it."""
+        with self._condition:
+            subscription._closed = True
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+            self._condition.notify_all()
+
+
+class Replica:
+    """
+    Keeps a target map equal to a source map that has a change feed. sync() copies a snapshot of the source and
+    subscribes at the snapshot's offset, and catch_up() applies the changes made since. A replica that falls behind
+    resumes from its position while the feed still retains it, and copies a new snapshot otherwise.
+    """
+
+    def __init__(self, target, max_pending: int = 4096, batch_size: int = 256) -> None:
+        """
+        Initialize a replica that has not been synced yet.
+
+        :param target:      An empty HashMap from hash_map_sc or hash_map_oa, or any map with put, remove and clear
+        :param max_pending: Number of changes buffered between two catch_up() calls before the subscription is cut off
+        :param batch_size:  Number of changes applied per poll
+        """
+        self._target = target
+        self._max_pending = max_pending
+        self._batch_size = batch_size
+        self._source = None
+        self._subscription = None
+        self._syncs = 0
+
+    def get_map(self):
+        """
+        Return the target map
+        """
+        return self._target
+
+    def get_position(self) -> int:
+        """
+        Return the sequence number of the last change of the source applied to the target
+        """
+        return self._subscription.get_position() if self._subscription is not None else 0
+
+    def get_syncs(self) -> int:
+        """
+        Return the number of full copies made, including the first one
+        """
+        return self._syncs
+
+    def _subscribe(self, offset: int) -> None:
+        """Replaces the subscription with one starting after offset."""
+        if self._subscription is not None:
+            self._subscription.close()
+        self._subscription = self._source.get_change_feed().subscribe(offset, max_pending=self._max_pending,
+                                                                     batch_size=self._batch_size)
+
+    def sync(self, source) -> int:
+        """
+        Makes the target a copy of a snapshot of the source, and subscribes to the changes made after the snapshot.
+
+        :param source: A HashMap from hash_map_sc or hash_map_oa created with a change feed
+        :return:       The number of entries copied
+        """
+        if source.get_change_feed() is None:
+            raise ValueError("the source map has no change feed")
+        self._source = source
+
+        # The feed takes the snapshot and reads its offset under its lock, which the source holds while it changes,
+        # so the offset is exactly that of the last change in the snapshot
+        snapshot, offset = source.get_change_feed().snapshot(source)
+        self._subscribe(offset)
+
+        target = self._target
+        target.clear()
+        for key, value in snapshot.iter_items():
+            target.put(key, value)
+        self._syncs += 1
+        return snapshot.get_size()
+
+    def apply(self, events) -> None:
+        """
+        Applies change events to the target, in order.
+        """
+        target = self._target
+        for event in events:
+            if event.kind == REMOVE:
+                target.remove(event.key)
+            elif event.kind == CLEAR:
+                target.clear()
+            else:
+                target.put(event.key, event.value)
+
+    def catch_up(self) -> int:
+        """
+        Applies every change the source has made since the last call.
+
+        :return: The number of changes applied, not counting a new snapshot copied after falling too far behind
+        """
+        applied = 0
+        while True:
+            try:
+                batch = self._subscription.poll()
+            except FeedGapException:
+                try:
+                    self._subscribe(self.get_position())
+                except FeedGapException:
+                    self.sync(self._source)
+                continue
+            if not batch:
+                return applied
+            self.apply(batch)
+            applied += len(batch)
+
+    def close(self) -> None:
+        """
+        Stops following the source.
+        """
+        if self._subscription is not None:
+            self._subscription.close()
+            self._subscription = None
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+
+if __name__ == "__main__":
+
+    import hash_map_oa
+    import hash_map_sc
+    from a6_include import hash_function_2
+
+    for map_class in (hash_map_sc.HashMap, hash_map_oa.HashMap):
+        print(f"\n{map_class.__module__} - change feed example 1")
+        print("-----------------------------------------")
+        feed = ChangeFeed(retention=16)
+        m = map_class(11, hash_function_2, change_feed=feed)
+        subscription = feed.subscribe(max_pending=4)
+        m.put('a', 1)
+        m.put('a', 2)
+        m.remove('a')
+        m.remove('missing')
+        m.clear()
+        print([str(event) for event in subscription.poll()], subscription.get_position())
+
+        for i in range(5):
+            m.put('key' + str(i), i)
+        print(subscription.get_pending(), subscription.is_lagging(), subscription.get_dropped())
+
+        print(f"\n{map_class.__module__} - replica example 1")
+        print("-------------------------------------")
+        for i in range(10):
+            m.put('key' + str(i), i * 10)
+        replica = Replica(hash_map_sc.HashMap(11, hash_function_2), max_pending=8)
+        print(replica.sync(m), replica.get_position())
+        m.put('new', 1)
+        m.remove('key0')
+        print(replica.catch_up(), replica.get_position(), replica.get_syncs())
+
+        # More changes than the subscription buffers, but still retained by the feed
+        for i in range(12):
+            m.put('key' + str(i), -i)
+        print(replica.catch_up(), replica.get_syncs())
+
+        # More changes than the feed retains, so the replica copies a new snapshot
+        for i in range(40):
+            m.put('more' + str(i), i)
+        print(replica.catch_up(), replica.get_syncs(), replica.get_map().get_size() == m.get_size(),
+              sorted(replica.get_map().iter_items()) == sorted(m.iter_items()))
@@ -0,0 +1,326 @@
+# Name: Zachary Garner
+# Course: CS261 - Data Structures
+# Assignment: HashMap Implementation
+# Description: Durable key-value store on top of either HashMap. Every put and remove is appended to a write-ahead
+# log, with records batched into group commits so that a put never waits for the disk on its own. A periodic snapshot
+# of the whole map lets the log be truncated, and on startup the snapshot is loaded and the log replayed in bulk.
+
+import os
+import pickle
+import struct
+import time
+import zlib
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import hash_function_1, hash_function_2
+
+# Each log record is a little-endian payload length and CRC-32, followed by the pickled (operation, key, value)
+_HEADER = struct.Struct('<II')
+_PUT = 0
+_REMOVE = 1
+
+SNAPSHOT_FILE = 'snapshot.pickle'
+LOG_FILE = 'wal.log'
+
+
+class DurableHashMap:
+    def __init__(self,
+                 directory: str,
+                 map_class: type = hash_map_sc.HashMap,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 fsync: str = 'interval',
+                 group_commit: int = 128,
+                 fsync_interval: float = 1.0,
+                 snapshot_every: int = 100000,
+                 clock: callable = time.monotonic) -> None:
+        """
+        Open the store in a directory, recovering its contents from the snapshot and log found there.
+
+        :param directory:      Directory holding the snapshot and log files, created if needed
+        :param map_class:      The HashMap class from hash_map_sc or hash_map_oa holding the data in memory
+        :param capacity:       Initial capacity of the in-memory map
+        :param function:       Hash function of the in-memory map
+        :param fsync:          'always' to fsync every group commit, 'interval' to fsync at most every
+                               fsync_interval seconds, or 'never' to leave flushing to the operating system
+        :param group_commit:   Number of buffered records that triggers a write to the log
+        :param fsync_interval: Minimum number of seconds between fsyncs with the 'interval' policy, and the age of
+                               the oldest buffered record at which the next put or remove writes the buffer out even
+                               if it holds fewer than group_commit records. Nothing is written while the store is
+                               idle, so call commit() after the last change of a burst that must not be lost
+        :param snapshot_every: Number of logged records after which a snapshot is taken and the log truncated,
+                               or None to only snapshot when snapshot() is called
+        :param clock:          Function returning the current time in seconds
+        """
+        if fsync not in ('always', 'interval', 'never'):
+            raise ValueError(f"unknown fsync policy: {fsync}")
+
+        self._directory = directory
+        self._fsync = fsync
+        self._group_commit = group_commit
+        self._fsync_interval = fsync_interval
+        self._snapshot_every = snapshot_every
+        self._clock = clock
+
+        os.makedirs(directory, exist_ok=True)
+        self._map = map_class(capacity, function)
+        self._pending = bytearray()
+        self._pending_records = 0
+        self._pending_since = None
+        self._logged_records = 0
+        self._last_fsync = clock()
+
+        self._recover()
+        self._log = open(os.path.join(directory, LOG_FILE), 'ab')
+
+    def __enter__(self) -> "DurableHashMap":
+        """Use the store as a context manager that closes it on exit."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the store."""
+        self.close()
+
+    def get_size(self) -> int:
+        """Return size of map."""
+        return self._map.get_size()
+
+    # ------------------------------------------------------------------ #
+
+    def _recover(self) -> None:
+        """
+        Loads the snapshot, if any, and replays the log on top of it. A torn record at the end of the log, left by a
+        crash in the middle of a write, is discarded along with anything after it.
+        """
+        snapshot_path = os.path.join(self._directory, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, 'rb') as file:
+                for key, value in pickle.load(file):
+                    self._map.put(key, value)
+
+        log_path = os.path.join(self._directory, LOG_FILE)
+        if not os.path.exists(log_path):
+            return
+
+        # Read the whole log at once and decode it from memory rather than issuing one read per record
+        with open(log_path, 'rb') as file:
+            data = memoryview(file.read())
+
+        offset = 0
+        while offset + _HEADER.size <= len(data):
+            length, checksum = _HEADER.unpack_from(data, offset)
+            start = offset + _HEADER.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                break
+
+            operation, key, value = pickle.loads(payload)
+            if operation == _PUT:
+                self._map.put(key, value)
+            else:
+                self._map.remove(key)
+            offset = start + length
+            self._logged_records += 1
+
+        if offset < len(data):
+            with open(log_path, 'r+b') as file:
+                file.truncate(offset)
+
+    @staticmethod
+    def _record(operation: int, key: str, value: object) -> bytes:
+        """
+        Serializes one log record. Changes are serialized before they are applied to the map, so that a value that
+        cannot be pickled is rejected rather than held in memory without being logged.
+        """
+        payload = pickle.dumps((operation, key, value), pickle.HIGHEST_PROTOCOL)
+        return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+    def _append(self, record: bytes) -> None:
+        """
+        Buffers one log record and writes the buffer out once a group commit is due: when it holds group_commit
+        records, or when its oldest record has waited fsync_interval seconds, so that a low write rate does not keep
+        records in memory indefinitely.
+        """
+        self._pending += record
+        self._pending_records += 1
+
+        now = self._clock()
+        if self._pending_since is None:
+            self._pending_since = now
+        if self._pending_records >= self._group_commit or now - self._pending_since >= self._fsync_interval:
+            self.commit()
+
+    def commit(self, sync: bool = False) -> None:
+        """
+        Writes every buffered record to the log in one write and applies the fsync policy. Records that were put or
+        removed before a commit that fsynced, or before commit(sync=True), survive a crash.
+
+        :param sync: Force an fsync regardless of the policy
+        """
+        if self._pending:
+            self._log.write(self._pending)
+            self._log.flush()
+            self._logged_records += self._pending_records
+            self._pending = bytearray()
+            self._pending_records = 0
+            self._pending_since = None
+
+        now = self._clock()
+        if sync or self._fsync == 'always' or \
+                (self._fsync == 'interval' and now - self._last_fsync >= self._fsync_interval):
+            os.fsync(self._log.fileno())
+            self._last_fsync = now
+
+        if self._snapshot_every is not None and self._logged_records >= self._snapshot_every:
+            self.snapshot()
+
+    def snapshot(self) -> None:
+        """
+        Writes the whole map to a new snapshot file, atomically replaces the previous snapshot, and truncates the log.
+        Replaying a log over a snapshot that already contains its records gives the same result, so a crash between
+        the replace and the truncation is harmless.
+        """
+        if self._pending:
+            self.commit()
+
+        path = os.path.join(self._directory, SNAPSHOT_FILE)
+        with open(path + '.tmp', 'wb') as file:
+            pickle.dump(list(self._map.iter_items()), file, pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + '.tmp', path)
+        self._fsync_directory()
+
+        self._log.truncate(0)
+        self._log.seek(0)
+        os.fsync(self._log.fileno())
+        self._logged_records = 0
+        self._last_fsync = self._clock()
+
+    def _fsync_directory(self) -> None:
+        """Makes a rename in the store's directory durable, where the platform supports it."""
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        descriptor = os.open(self._directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+    def close(self) -> None:
+        """
+        Commits and fsyncs every buffered record, then closes the log.
+        """
+        if self._log.closed:
+            return
+        self.commit(sync=True)
+        self._log.close()
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the map and logs the change. The change is buffered until the next group commit.
+
+        :param key:   The target key
+        :param value: The given value that is to be added
+        """
+        record = self._record(_PUT, key, value)
+        self._map.put(key, value)
+        self._append(record)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value, logging the change if the key existed.
+
+        :param key: The target key to be removed
+        """
+        if self._map.contains_key(key):
+            record = self._record(_REMOVE, key, None)
+            self._map.remove(key)
+            self._append(record)
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, if the key is not found, it returns None.
+
+        :param key: The given key that is associated with the value to be found
+        """
+        return self._map.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Checks if the provided key is in the map.
+
+        :param key: The target key being searched for
+        """
+        return self._map.contains_key(key)
+
+    def iter_items(self):
+        """
+        Generator over the key/value tuples in the map.
+        """
+        return self._map.iter_items()
+
+    def get_keys_and_values(self):
+        """
+        Creates a new DynamicArray of the key/value tuples in the map.
+        """
+        return self._map.get_keys_and_values()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+
+if __name__ == "__main__":
+
+    import tempfile
+
+    directory = tempfile.mkdtemp()
+
+    print("\nDurable - recovery example 1")
+    print("----------------------------")
+    store = DurableHashMap(directory, map_class=hash_map_oa.HashMap, function=hash_function_2, group_commit=10,
+                           snapshot_every=25)
+    for i in range(40):
+        store.put('key' + str(i), i)
+    store.remove('key3')
+    store.close()
+
+    with DurableHashMap(directory, function=hash_function_2) as store:
+        print(store.get_size(), store.get('key0'), store.get('key3'), store.get('key39'))
+        store.put('key40', 40)
+
+    # Simulate a crash in the middle of a log write by appending half a record
+    with open(os.path.join(directory, LOG_FILE), 'ab') as log:
+        log.write(_HEADER.pack(100, 0) + b'partial')
+
+    with DurableHashMap(directory, function=hash_function_2) as store:
+        print(store.get_size(), store.get('key40'))
+
+    print("\nDurable - interval example 1")
+    print("----------------------------")
+    directory = tempfile.mkdtemp()
+    now = [0.0]
+    store = DurableHashMap(directory, group_commit=128, fsync_interval=1.0, clock=lambda: now[0])
+    store.put('first', 1)
+    now[0] += 1.5
+    store.put('second', 2)
+    store.put('third', 3)
+
+    # Reopen without closing, as after a crash: the first two puts were written once the first one was 1s old
+    with DurableHashMap(directory) as recovered:
+        print(recovered.get_size(), recovered.get('first'), recovered.get('second'), recovered.get('third'))
+
+    print("\nDurable - unpicklable value example 1")
+    print("-------------------------------------")
+    directory = tempfile.mkdtemp()
+    with DurableHashMap(directory) as store:
+        store.put('key', 1)
+        try:
+            store.put('key', lambda: None)
+        except (pickle.PicklingError, AttributeError) as error:
+            print(type(error).__name__, store.get('key'))
+    with DurableHashMap(directory) as store:
+        print(store.get('key'))
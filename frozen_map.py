@@ -0,0 +1,435 @@
+# Name: Zachary Garner
+# Course: CS261 - Data Structures
+# Assignment: HashMap Implementation
+# Description: Immutable map for lookup tables that are built once and only read afterward, created by freeze() on
+# either HashMap. Keys are placed with a minimal perfect hash built by hash-and-displace (CHD): keys are split into
+# small buckets by hash, and each bucket gets one displacement that sends its keys to distinct free slots. A lookup
+# is one keyed hash, one displacement read and one key comparison, with no probing, and the n keys fill exactly n
+# slots of dense key and value arrays. The map can be saved to a file and loaded back through a memory map.
+
+import mmap
+import os
+import pickle
+import struct
+from array import array
+from hashlib import blake2b
+
+from a6_include import DynamicArray
+
+# Average number of keys per displacement bucket. Larger buckets make the displacement array smaller but the
+# displacements slower to find
+KEYS_PER_BUCKET = 3
+
+# Type tags that start every encoded key, so that a string and bytes with the same contents stay distinct keys
+_STR_KEY = b's'
+_BYTES_KEY = b'b'
+
+# Displacements tried for one bucket before the build starts over with another seed
+_MAX_DISPLACEMENT = 1 << 20
+
+# Seeds tried before the build gives up
+_MAX_SEEDS = 64
+
+# File layout: this header, the displacements, the key and value offsets, then the key and value bytes. Every array
+# starts on an 8-byte boundary so it can be cast directly from the memory map.
+_MAGIC = b'FHM2'
+_HEADER = struct.Struct('<4s4xQQ16sQQ')
+
+
+class FrozenMapException(Exception):
+    pass
+
+
+def _encode(key) -> bytes:
+    """
+    Encode a key for hashing and storage: a type tag followed by the UTF-8 of a string or the contents of a bytes,
+    bytearray or memoryview key. Bytes-like keys share one tag, as equal ones are the same key in both HashMaps.
+
+    :raises TypeError: If the key is of any other type
+    """
+    if isinstance(key, str):
+        return _STR_KEY + key.encode('utf-8', 'surrogatepass')
+    if isinstance(key, (bytes, bytearray, memoryview)):
+        return _BYTES_KEY + bytes(key)
+    raise TypeError(f"FrozenHashMap keys must be str, bytes, bytearray or memoryview, not {type(key).__name__}")
+
+
+def _decode(data: bytes):
+    """Decode a key written by _encode. Bytes-like keys come back as bytes."""
+    if data[:1] == _STR_KEY:
+        return data[1:].decode('utf-8', 'surrogatepass')
+    return data[1:]
+
+
+def _hash(data: bytes, seed: bytes, buckets: int, slots: int) -> tuple:
+    """
+    Hashes an encoded key into its bucket and the two slot hashes that its bucket's displacement combines.
+
+    :return: (bucket, f1, f2) with f1 and f2 below slots
+    """
+    h = int.from_bytes(blake2b(data, key=seed, digest_size=16).digest(), 'little')
+    return h % buckets, (h >> 43) % slots, (h >> 86) % slots
+
+
+class FrozenHashMap:
+    """
+    Read-only map with a minimal perfect hash. Create one with HashMap.freeze(), from_items() or load().
+    """
+
+    def __init__(self, seed: bytes, displacements, keys, values, size: int, mapping=None) -> None:
+        """
+        Initialize the map from its built arrays. Use from_items() or load() rather than calling this directly.
+
+        :param seed:          Key of the hash function
+        :param displacements: One displacement per bucket. A negative value -slot - 1 places a single-key bucket
+                              directly, otherwise d places key k at (f1 + (d // size) * f2 + d % size) % size
+        :param keys:          The keys by slot, either a list of keys or an (offsets, encoded keys) pair
+        :param values:        The values by slot, either a list or an (offsets, pickled bytes) pair
+        :param size:          The number of keys
+        :param mapping:       The memory map backing the arrays, if loaded from a file
+        """
+        self._seed = seed
+        self._displacements = displacements
+        self._size = size
+        self._mapping = mapping
+
+        # Built maps hold Python objects, loaded maps hold views into the memory mapped file
+        if isinstance(keys, list):
+            self._keys = keys
+            self._values = values
+        else:
+            self._keys = None
+            self._key_offsets, self._key_bytes = keys
+            self._value_offsets, self._value_bytes = values
+
+    @classmethod
+    def from_items(cls, items, seed: bytes = None) -> "FrozenHashMap":
+        """
+        Build a frozen map from (key, value) tuples. Keys that encode to the same bytes, such as a bytes key and a
+        memoryview of the same contents, are one key, and the last of their values is kept.
+
+        :param items: Iterable of (key, value) tuples. Keys are str, bytes, bytearray or memoryview
+        :param seed:  16-byte hash key to start from, random by default. The build derives a new seed from it in the
+                      rare case that no displacement works for some bucket
+        :raises TypeError:          If a key is of another type
+        :raises FrozenMapException: If no seed out of _MAX_SEEDS places every key
+        """
+        keys = []
+        values = []
+        encoded = []
+        positions = {}
+        for key, value in items:
+            data = _encode(key)
+            position = positions.get(data)
+            if position is not None:
+                values[position] = value
+                continue
+            positions[data] = len(keys)
+            keys.append(key)
+            values.append(value)
+            encoded.append(data)
+        size = len(keys)
+
+        if seed is None:
+            seed = os.urandom(16)
+        for _ in range(_MAX_SEEDS):
+            slots = cls._place(encoded, seed)
+            if slots is not None:
+                break
+            seed = blake2b(seed, digest_size=16).digest()
+        else:
+            raise FrozenMapException(f"no perfect hash found for {size} keys after {_MAX_SEEDS} seeds")
+
+        displacements, placement = slots
+        slot_keys = [None] * size
+        slot_values = [None] * size
+        for i in range(size):
+            slot_keys[placement[i]] = keys[i]
+            slot_values[placement[i]] = values[i]
+        return cls(seed, displacements, slot_keys, slot_values, size)
+
+    @staticmethod
+    def _place(encoded: list, seed: bytes):
+        """
+        Finds a displacement for every bucket under one seed.
+
+        :return: The displacement array and the slot of every key, or None if some bucket could not be placed
+        """
+        size = len(encoded)
+        bucket_count = max(1, -(-size // KEYS_PER_BUCKET))
+        displacements = array('q', bytes(8 * bucket_count))
+        if size == 0:
+            return displacements, []
+
+        buckets = [[] for _ in range(bucket_count)]
+        hashes = []
+        for i, data in enumerate(encoded):
+            bucket, f1, f2 = _hash(data, seed, bucket_count, size)
+            buckets[bucket].append(i)
+            hashes.append((f1, f2))
+
+        occupied = bytearray(size)
+        placement = [0] * size
+        order = sorted(range(bucket_count), key=lambda b: len(buckets[b]), reverse=True)
+
+        # Buckets of two or more keys, largest first, so the hardest buckets are placed while most slots are free
+        position = 0
+        while position < bucket_count and len(buckets[order[position]]) > 1:
+            bucket = order[position]
+            members = buckets[bucket]
+            member_hashes = [hashes[i] for i in members]
+            for d in range(min(size * size, _MAX_DISPLACEMENT)):
+                shift, offset = divmod(d, size)
+                # Most displacements fail on the first or second key, so each slot is checked as soon as it is known
+                slots = []
+                for f1, f2 in member_hashes:
+                    slot = (f1 + shift * f2 + offset) % size
+                    if occupied[slot] or slot in slots:
+                        break
+                    slots.append(slot)
+                else:
+                    break
+            else:
+                return None
+
+            for i, slot in zip(members, slots):
+                occupied[slot] = 1
+                placement[i] = slot
+            displacements[bucket] = d
+            position += 1
+
+        # Single-key buckets take the remaining slots directly, and empty buckets keep a displacement of 0
+        free = (slot for slot in range(size) if not occupied[slot])
+        while position < bucket_count and buckets[order[position]]:
+            bucket = order[position]
+            slot = next(free)
+            placement[buckets[bucket][0]] = slot
+            displacements[bucket] = -slot - 1
+            position += 1
+
+        return displacements, placement
+
+    # ------------------------------------------------------------------ #
+
+    def _slot(self, data: bytes) -> int:
+        """Return the only slot an encoded key can be in."""
+        size = self._size
+        bucket, f1, f2 = _hash(data, self._seed, len(self._displacements), size)
+        d = self._displacements[bucket]
+        if d < 0:
+            return -d - 1
+        shift, offset = divmod(d, size)
+        return (f1 + shift * f2 + offset) % size
+
+    def _find(self, key: str) -> int:
+        """Return the slot holding key, or -1 if key is not in the map."""
+        if self._size == 0:
+            return -1
+        try:
+            data = _encode(key)
+        except TypeError:
+            return -1
+        slot = self._slot(data)
+        if self._keys is not None:
+            return slot if self._keys[slot] == key else -1
+        offsets = self._key_offsets
+        return slot if self._key_bytes[offsets[slot]:offsets[slot + 1]] == data else -1
+
+    def _key_at(self, slot: int) -> str:
+        """Return the key in a slot. A loaded map returns bytes for any bytes-like key."""
+        if self._keys is not None:
+            return self._keys[slot]
+        offsets = self._key_offsets
+        return _decode(bytes(self._key_bytes[offsets[slot]:offsets[slot + 1]]))
+
+    def _value_at(self, slot: int) -> object:
+        """Return the value in a slot, unpickling it from the file for loaded maps."""
+        if self._keys is not None:
+            return self._values[slot]
+        offsets = self._value_offsets
+        return pickle.loads(self._value_bytes[offsets[slot]:offsets[slot + 1]])
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, if the key is not found, it returns None.
+
+        :param key: The given key that is associated with the value to be found
+        :return:    The value at the given key or None if the key was not found
+        """
+        slot = self._find(key)
+        if slot == -1:
+            return None
+        return self._value_at(slot)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Checks if the provided key is in the map.
+
+        :param key: The target key being searched for
+        :return:    True if the key exists, False if it does not
+        """
+        return self._find(key) != -1
+
+    def iter_items(self):
+        """
+        Generator over the key/value tuples in slot order.
+        """
+        for slot in range(self._size):
+            yield self._key_at(slot), self._value_at(slot)
+
+    def iter_keys(self):
+        """
+        Generator over the keys in slot order.
+        """
+        for slot in range(self._size):
+            yield self._key_at(slot)
+
+    def iter_values(self):
+        """
+        Generator over the values in slot order.
+        """
+        for slot in range(self._size):
+            yield self._value_at(slot)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Creates a new DynamicArray where each index is a tuple that contains a key/value pair of the map.
+        """
+        new_da = DynamicArray()
+        new_da.extend(self.iter_items())
+        return new_da
+
+    def put(self, key: str, value: object) -> None:
+        """Frozen maps are read-only."""
+        raise FrozenMapException("FrozenHashMap is read-only")
+
+    def remove(self, key: str) -> None:
+        """Frozen maps are read-only."""
+        raise FrozenMapException("FrozenHashMap is read-only")
+
+    def clear(self) -> None:
+        """Frozen maps are read-only."""
+        raise FrozenMapException("FrozenHashMap is read-only")
+
+    # ------------------------------------------------------------------ #
+
+    def save(self, path: str) -> None:
+        """
+        Writes the map to a file that load() can memory map. Values are pickled one by one, so only the values that
+        are read are ever unpickled.
+
+        :param path: The path of the file, replaced atomically if it exists
+        """
+        key_offsets = array('Q', [0])
+        value_offsets = array('Q', [0])
+        key_bytes = bytearray()
+        value_bytes = bytearray()
+        for key, value in self.iter_items():
+            key_bytes += _encode(key)
+            value_bytes += pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            key_offsets.append(len(key_bytes))
+            value_offsets.append(len(value_bytes))
+
+        # Pad the key bytes so every section after them stays aligned
+        key_bytes += bytes(-len(key_bytes) % 8)
+
+        with open(path + '.tmp', 'wb') as file:
+            file.write(_HEADER.pack(_MAGIC, self._size, len(self._displacements), self._seed,
+                                    len(key_bytes), len(value_bytes)))
+            file.write(array('q', self._displacements).tobytes())
+            file.write(key_offsets.tobytes())
+            file.write(value_offsets.tobytes())
+            file.write(key_bytes)
+            file.write(value_bytes)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path: str) -> "FrozenHashMap":
+        """
+        Memory maps a file written by save(). Nothing is read until lookups touch it, so loading is O(1) and the
+        pages of a file shared by several processes are shared in memory as well.
+
+        :param path: The path of the file
+        """
+        with open(path, 'rb') as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapping)
+
+        magic, size, bucket_count, seed, key_length, value_length = _HEADER.unpack_from(view, 0)
+        if magic != _MAGIC:
+            view.release()
+            mapping.close()
+            raise FrozenMapException(f"{path} is not a frozen map file")
+
+        sections = []
+        offset = _HEADER.size
+        for length in (8 * bucket_count, 8 * (size + 1), 8 * (size + 1), key_length, value_length):
+            sections.append(view[offset:offset + length])
+            offset += length
+        displacements, key_offsets, value_offsets, key_bytes, value_bytes = sections
+
+        return cls(seed, displacements.cast('q'), (key_offsets.cast('Q'), key_bytes),
+                   (value_offsets.cast('Q'), value_bytes), size, mapping)
+
+    def close(self) -> None:
+        """
+        Releases the memory map of a loaded map. The map must not be used afterward.
+        """
+        if self._mapping is None:
+            return
+        for view in (self._displacements, self._key_offsets, self._key_bytes, self._value_offsets,
+                     self._value_bytes):
+            view.release()
+        self._mapping.close()
+        self._mapping = None
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+
+if __name__ == "__main__":
+
+    import tempfile
+
+    print("\nFrozen - build example 1")
+    print("------------------------")
+    m = FrozenHashMap.from_items((('key' + str(i), i * 10) for i in range(1000)), seed=bytes(16))
+    print(m.get_size(), m.get('key0'), m.get('key999'), m.get('key1000'), m.contains_key('key500'))
+    print(sorted(m.iter_keys()) == sorted('key' + str(i) for i in range(1000)))
+
+    print("\nFrozen - file example 1")
+    print("-----------------------")
+    path = os.path.join(tempfile.mkdtemp(), 'table.frozen')
+    m.save(path)
+    loaded = FrozenHashMap.load(path)
+    print(loaded.get_size(), loaded.get('key7'), loaded.get('missing'),
+          dict(loaded.iter_items()) == dict(m.iter_items()))
+    try:
+        loaded.put('key7', 0)
+    except FrozenMapException as error:
+        print(error)
+    loaded.close()
+
+    print("\nFrozen - bytes key example 1")
+    print("----------------------------")
+    m = FrozenHashMap.from_items(((b'k1', 1), (bytearray(b'k2'), 2), (memoryview(b'k3'), 3), ('k1', 'str')))
+    print(m.get(b'k1'), m.get(memoryview(b'k2')), m.get(bytearray(b'k3')), m.get('k1'), m.get('k2'), m.get(1))
+    m.save(path)
+    loaded = FrozenHashMap.load(path)
+    print(sorted(loaded.iter_items(), key=str), loaded.get(bytearray(b'k2')), loaded.get('k1'))
+    loaded.close()
+    try:
+        FrozenHashMap.from_items(((1, 'one'),))
+    except TypeError as error:
+        print(error)
+
+    print("\nFrozen - duplicate key example 1")
+    print("--------------------------------")
+    m = FrozenHashMap.from_items((('a', 1), ('a', 2), (b'ab', 3), (memoryview(b'ab'), 4)))
+    print(m.get_size(), m.get('a'), m.get(b'ab'))
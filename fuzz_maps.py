@@ -0,0 +1,433 @@
+# Name: Zachary Garner
+# Course: CS261 - Data Structures
+# Assignment: HashMap Implementation
+# Description: Differential fuzzer for every HashMap engine. Each engine runs the same seeded random sequence of puts,
+# gets, removes, contains_key calls, resizes, clears and iterations next to a dict, and every result is compared with
+# the dict's. Every few operations the engine's internal structure is checked as well: size accounting, no key live
+# twice, every key reachable from its own hash, and tombstone and metadata counts that agree with the buckets. A small
+# key space keeps collisions, tombstone reuse and resizes frequent. Snapshots taken along the way are checked against
+# a copy of the dict from when they were taken, however the map changed since, and durable maps are closed and
+# reopened from their files. The time spent in the engine's own operations is reported as a throughput per engine.
+#
+# Usage: python fuzz_maps.py [operations per engine] [seed] [engine name ...]
+
+import random
+import reprlib
+import shutil
+import sys
+import tempfile
+import time
+
+import durable_map
+import hash_map_compact
+import hash_map_oa
+import hash_map_sc
+import hash_map_spill
+import partitioned_map
+import versioned_map
+from a6_include import hash_function_1, hash_function_2, hash_function_3
+from value_codec import ValueCodec
+
+# hash_map_int needs NumPy, so its engine is only fuzzed where NumPy is installed
+try:
+    import hash_map_int
+except ImportError:
+    hash_map_int = None
+
+# Relative weights of the operations in a random sequence
+OPERATION_WEIGHTS = {
+    'put': 30,
+    'get': 20,
+    'contains_key': 15,
+    'remove': 25,
+    'iterate': 3,
+    'resize_table': 2,
+    'clear': 1,
+    'snapshot': 2,
+    'reopen': 1,
+}
+
+# Number of operations between two structure checks
+CHECK_INTERVAL = 50
+
+# Number of most recent operations printed with a failure
+HISTORY = 20
+
+# Number of most recent snapshots kept and checked
+SNAPSHOTS = 4
+
+
+class FuzzFailure(Exception):
+    """
+    Raised when an engine's result or structure disagrees with the reference dict.
+    """
+    pass
+
+
+def _partitioned() -> partitioned_map.HashMap:
+    """Partitioned map over three in-process nodes, one of them open addressing."""
+    m = partitioned_map.HashMap(vnodes=16)
+    m.add_node('a', partitioned_map.LocalNode())
+    m.add_node('b', partitioned_map.LocalNode(hash_map_oa.HashMap))
+    m.add_node('c', partitioned_map.LocalNode(capacity=3, function=hash_function_1))
+    return m
+
+
+def _durable(map_class: type, directory: str = None) -> durable_map.DurableHashMap:
+    """
+    Durable map in a new temporary directory, or reopened from the files in directory. Small group commits and
+    frequent snapshots make a reopen replay both a snapshot file and a log.
+    """
+    return durable_map.DurableHashMap(directory or tempfile.mkdtemp(prefix='fuzz_maps_'), map_class, 3,
+                                      hash_function_2, fsync='never', group_commit=16, snapshot_every=200)
+
+
+# Engine name: (factory returning an empty map, whether the engine takes integer keys and numeric values)
+ENGINES = {
+    'sc': (lambda: hash_map_sc.HashMap(3, hash_function_1), False),
+    'sc-shrink': (lambda: hash_map_sc.HashMap(3, hash_function_2, grow_at=0.75, shrink_at=0.25), False),
+    'sc-adaptive': (lambda: hash_map_sc.HashMap(3, hash_function_1, adaptive=True, sample_window=16), False),
+    'sc-seeded': (lambda: hash_map_sc.HashMap(3, seeded=True, max_chain=4), False),
+    'sc-bloom-codec': (lambda: hash_map_sc.HashMap(3, hash_function_2, bloom_bits_per_key=8,
+                                                   codec=ValueCodec(threshold=64, cache_size=4)), False),
+    'oa-quadratic': (lambda: hash_map_oa.HashMap(3, hash_function_1), False),
+    'oa-quadratic-shrink': (lambda: hash_map_oa.HashMap(3, hash_function_2, shrink_at=0.1), False),
+    'oa-linear': (lambda: hash_map_oa.HashMap(3, hash_function_2, grow_at=0.9,
+                                              probing=hash_map_oa.LINEAR_PROBING), False),
+    'oa-group': (lambda: hash_map_oa.HashMap(3, hash_function_3, grow_at=0.9,
+                                             probing=hash_map_oa.GROUP_PROBING, group_size=4), False),
+    'oa-group-16': (lambda: hash_map_oa.HashMap(3, hash_function_1,
+                                                probing=hash_map_oa.GROUP_PROBING), False),
+    'oa-seeded': (lambda: hash_map_oa.HashMap(3, hash_function_2, seeded=True, max_chain=6), False),
+    'oa-bloom-codec': (lambda: hash_map_oa.HashMap(3, hash_function_2, bloom_bits_per_key=8,
+                                                   codec=ValueCodec(threshold=64, cache_size=4)), False),
+    'compact': (lambda: hash_map_compact.HashMap(3, hash_function_2), False),
+    'spill': (lambda: hash_map_spill.HashMap(memory_budget=16, partitions=4, function=hash_function_2), False),
+    'partitioned': (_partitioned, False),
+    'versioned': (lambda: versioned_map.VersionedHashMap(3, retention=8), False),
+    'durable-sc': (lambda: _durable(hash_map_sc.HashMap), False),
+    'durable-oa': (lambda: _durable(hash_map_oa.HashMap), False),
+}
+if hash_map_int is not None:
+    ENGINES['int'] = (lambda: hash_map_int.HashMap(3), True)
+
+
+# ------------------- STRUCTURE CHECKS ------------------------------------- #
+
+
+def _check_sc(m: hash_map_sc.HashMap) -> None:
+    """Every key sits in the chain its hash selects, once, and the chain lengths add up to the size."""
+    _expect(m._buckets.length() == m._capacity, "bucket array length differs from the capacity")
+    total = 0
+    empty = 0
+    for i in range(m._capacity):
+        chain = m._buckets.get_unchecked(i)
+        keys = [node.key for node in chain]
+        _expect(len(keys) == chain.length(), f"chain {i} length counter is {chain.length()}, chain has {len(keys)}")
+        _expect(len(set(keys)) == len(keys), f"chain {i} holds a key twice")
+        for key in keys:
+            _expect(m._hash_function(key) % m._capacity == i, f"key {key!r} is in chain {i}, not its own")
+        total += len(keys)
+        empty += not keys
+    _expect(total == m._size, f"chains hold {total} keys, size is {m._size}")
+    _expect(m.empty_buckets() == empty, "empty_buckets() disagrees with the chains")
+
+
+def _check_oa(m: hash_map_oa.HashMap) -> None:
+    """
+    Live entries, tombstones and empty buckets add up to the capacity, every live key is found at its own bucket, and
+    in group probing every metadata byte, including the mirrored tail, describes its bucket.
+    """
+    _expect(m._buckets.length() == m._capacity, "bucket array length differs from the capacity")
+    live = tombstones = 0
+    keys = set()
+    for i in range(m._capacity):
+        bucket = m._buckets.get_unchecked(i)
+        if bucket is None:
+            expected = hash_map_oa._EMPTY
+        elif bucket.is_tombstone:
+            tombstones += 1
+            expected = hash_map_oa._DELETED
+        else:
+            live += 1
+            _expect(bucket.key not in keys, f"key {bucket.key!r} is live in two buckets")
+            keys.add(bucket.key)
+            _expect(m._locate(bucket.key)[0] == i, f"key {bucket.key!r} in bucket {i} is not found by its probe")
+            expected = m._hash_function(bucket.key) & hash_map_oa._TAG_MASK
+
+        if m._meta is not None:
+            _expect(m._meta[i] == expected, f"metadata of bucket {i} is {m._meta[i]:#x}, expected {expected:#x}")
+
+    _expect(live == m._size, f"{live} live buckets, size is {m._size}")
+    _expect(m.empty_buckets() == m._capacity - live, f"empty_buckets() is off with {tombstones} tombstones")
+    if m._meta is not None:
+        _expect(len(m._meta) == m._capacity + m._group - 1, "metadata array length is off")
+        _expect(m._meta.count(hash_map_oa._DELETED, 0, m._capacity) == tombstones,
+                "metadata and buckets count different tombstones")
+        for i in range(m._group - 1):
+            _expect(m._meta[m._capacity + i] == m._meta[i], f"mirrored metadata of bucket {i} is stale")
+
+
+def _check_compact(m: hash_map_compact.HashMap) -> None:
+    """Every live dense entry has exactly one index bucket pointing at it, and no removed entry is indexed."""
+    entries = [entry for entry in m._indices if entry >= 0]
+    _expect(len(entries) == len(set(entries)) == m._size, f"{len(entries)} index buckets in use, size is {m._size}")
+    deleted = 0
+    for i in range(m._keys.length()):
+        if m._keys.get_unchecked(i) is hash_map_compact._DELETED:
+            deleted += 1
+            _expect(i not in entries, f"removed entry {i} is still indexed")
+    _expect(m._keys.length() - deleted == m._size, "dense array and size disagree")
+    _expect(m._hashes.length() == m._values.length() == m._keys.length(), "dense arrays have different lengths")
+
+
+def _check_int(m) -> None:
+    """The live state count matches the size, and no key is live twice."""
+    live = m._states == hash_map_int.LIVE
+    _expect(int(live.sum()) == m._size, f"{int(live.sum())} live buckets, size is {m._size}")
+    _expect(len(set(m._keys[live].tolist())) == m._size, "a key is live in two buckets")
+
+
+def _check_spill(m: hash_map_spill.HashMap) -> None:
+    """The partition sizes add up to the size, and the resident entry count matches the resident partitions."""
+    total = sum(m._partition_sizes.get_unchecked(p) for p in range(m._partition_sizes.length()))
+    _expect(total == m._size, f"partitions hold {total} keys, size is {m._size}")
+    resident = sum(m._partition_sizes.get_unchecked(p) for p in m._resident)
+    _expect(resident == m.get_resident_entries(), "resident entry count is off")
+
+
+def _check_partitioned(m: partitioned_map.HashMap) -> None:
+    """The node sizes add up to the size, and every key is held by the node the ring assigns it to."""
+    _expect(sum(m.node_sizes().values()) == m.get_size(), "node sizes do not add up to the size")
+    for name, node in m._nodes.items():
+        if isinstance(node, partitioned_map.LocalNode):
+            for key, _ in node._map.iter_items():
+                _expect(m._ring.owner(key) == name, f"key {key!r} is on node {name}, not its owner")
+
+
+def _check_versioned(m: versioned_map.VersionedHashMap) -> None:
+    """Every history is sorted, and the number of keys whose latest value is not a removal matches the size."""
+    present = 0
+    for key, history in m._map.iter_items():
+        versions = list(history.versions)
+        _expect(versions == sorted(set(versions)), f"history of {key!r} is not strictly increasing")
+        _expect(len(versions) == len(history.values), f"history of {key!r} has unpaired versions")
+        present += bool(history.values) and history.latest() is not versioned_map._DELETED
+    _expect(present == m.get_size(), f"{present} keys present, size is {m.get_size()}")
+
+
+def _check_durable(m: durable_map.DurableHashMap) -> None:
+    """The in-memory map passes the check of its engine, and no more than a group commit of records is buffered."""
+    _expect(m._pending_records < m._group_commit, f"{m._pending_records} records buffered")
+    for map_class, check in STRUCTURE_CHECKS:
+        if isinstance(m._map, map_class):
+            check(m._map)
+
+
+STRUCTURE_CHECKS = (
+    (hash_map_sc.HashMap, _check_sc),
+    (hash_map_oa.HashMap, _check_oa),
+    (hash_map_compact.HashMap, _check_compact),
+    (hash_map_spill.HashMap, _check_spill),
+    (partitioned_map.HashMap, _check_partitioned),
+    (versioned_map.VersionedHashMap, _check_versioned),
+    (durable_map.DurableHashMap, _check_durable),
+)
+if hash_map_int is not None:
+    STRUCTURE_CHECKS += ((hash_map_int.HashMap, _check_int),)
+
+
+def _expect(condition: bool, message: str) -> None:
+    """Raise FuzzFailure with message unless condition holds."""
+    if not condition:
+        raise FuzzFailure(message)
+
+
+def _items(m) -> list:
+    """Every key/value pair of a map, read through get_keys_and_values."""
+    pairs = m.get_keys_and_values()
+    return [pairs.get_at_index(i) for i in range(pairs.length())]
+
+
+def check_structure(m, reference: dict) -> None:
+    """
+    Compares the size and contents of a map with the reference dict, then runs the structure check of its engine.
+
+    :raises FuzzFailure: If any check fails
+    """
+    _expect(m.get_size() == len(reference), f"size is {m.get_size()}, expected {len(reference)}")
+    pairs = _items(m)
+    keys = [key for key, _ in pairs]
+    _expect(len(set(keys)) == len(keys), "get_keys_and_values() returns a key twice")
+    _expect(dict(pairs) == reference, "get_keys_and_values() differs from the reference")
+
+    for map_class, check in STRUCTURE_CHECKS:
+        if isinstance(m, map_class):
+            check(m)
+
+
+# ------------------- FUZZING ---------------------------------------------- #
+
+
+def _operations(count: int, seed: int, int_keys: bool):
+    """
+    Generator over a seeded random sequence of (operation, key, value) tuples. Keys are drawn from a space of about
+    64 keys, with runs that grow the space so that tables grow and shrink.
+    """
+    rng = random.Random(seed)
+    names = list(OPERATION_WEIGHTS)
+    weights = list(OPERATION_WEIGHTS.values())
+    key_space = 64
+
+    for step in range(count):
+        # Every 500 operations the key space alternates between small and large
+        if step % 500 == 0:
+            key_space = 64 if key_space > 64 else 512
+        operation = rng.choices(names, weights)[0]
+        n = rng.randrange(key_space)
+        key = n * 7919 - 1000 if int_keys else 'key' + str(n)
+
+        if int_keys:
+            value = float(rng.randrange(1000))
+        elif rng.random() < 0.05:
+            # Large and repetitive, so that a codec stores it compressed
+            value = ['value', step] * 40
+        else:
+            value = rng.randrange(1000)
+
+        if operation == 'resize_table':
+            value = rng.randrange(1, 2 * key_space)
+        yield operation, key, value
+
+
+def fuzz(name: str, count: int, seed: int) -> float:
+    """
+    Runs count random operations against one engine and a reference dict, checking every result and, every
+    CHECK_INTERVAL operations, the engine's structure.
+
+    Every snapshot the map returns is kept, up to SNAPSHOTS of them, and checked along with the map against a copy
+    of the reference dict from when it was taken.
+
+    :return: The time in seconds spent inside the engine's operations
+    :raises FuzzFailure: On the first disagreement, with the step, the seed and the most recent operations
+    """
+    factory, int_keys = ENGINES[name]
+    m = factory()
+    reference = {}
+    snapshots = []
+    history = []
+    elapsed = 0.0
+    clock = time.perf_counter
+
+    try:
+        for step, (operation, key, value) in enumerate(_operations(count, seed, int_keys)):
+            history.append((operation, key, value))
+            del history[:-HISTORY]
+
+            if operation == 'put':
+                started = clock()
+                m.put(key, value)
+                elapsed += clock() - started
+                reference[key] = value
+
+            elif operation == 'get':
+                started = clock()
+                result = m.get(key)
+                elapsed += clock() - started
+                _expect(result == reference.get(key), f"get returned {result!r}, expected {reference.get(key)!r}")
+
+            elif operation == 'contains_key':
+                started = clock()
+                result = m.contains_key(key)
+                elapsed += clock() - started
+                _expect(result == (key in reference), f"contains_key returned {result!r}")
+
+            elif operation == 'remove':
+                started = clock()
+                m.remove(key)
+                elapsed += clock() - started
+                reference.pop(key, None)
+
+            elif operation == 'iterate':
+                started = clock()
+                pairs = list(m.iter_items()) if hasattr(m, 'iter_items') else _items(m)
+                elapsed += clock() - started
+                _expect(len(pairs) == len(reference) and dict(pairs) == reference, "iteration differs")
+
+            elif operation == 'resize_table' and hasattr(m, 'resize_table'):
+                started = clock()
+                m.resize_table(value)
+                elapsed += clock() - started
+
+            elif operation == 'clear' and hasattr(m, 'clear'):
+                started = clock()
+                m.clear()
+                elapsed += clock() - started
+                reference.clear()
+
+            elif operation == 'snapshot' and hasattr(m, 'snapshot'):
+                started = clock()
+                snapshot = m.snapshot()
+                elapsed += clock() - started
+                # A durable map writes its snapshot to disk and returns None, which the next reopen reads back
+                if snapshot is not None:
+                    snapshots.append((snapshot, dict(reference)))
+                    del snapshots[:-SNAPSHOTS]
+
+            elif operation == 'reopen' and isinstance(m, durable_map.DurableHashMap):
+                started = clock()
+                m.close()
+                m = _durable(type(m._map), m._directory)
+                elapsed += clock() - started
+
+            if step % CHECK_INTERVAL == CHECK_INTERVAL - 1:
+                check_structure(m, reference)
+                for snapshot, frozen in snapshots:
+                    check_structure(snapshot, frozen)
+
+        check_structure(m, reference)
+        for snapshot, frozen in snapshots:
+            check_structure(snapshot, frozen)
+
+    except FuzzFailure as failure:
+        recent = '\n'.join(f"    {operation} {key!r} {reprlib.repr(value)}" for operation, key, value in history)
+        raise FuzzFailure(f"{name}, seed {seed}, step {step}: {failure}\n  most recent operations:\n{recent}")
+    finally:
+        if hasattr(m, 'close'):
+            m.close()
+        if isinstance(m, durable_map.DurableHashMap):
+            shutil.rmtree(m._directory, ignore_errors=True)
+
+    return elapsed
+
+
+def main(count: int, seed: int, names: list) -> bool:
+    """
+    Fuzzes each named engine and prints one line per engine.
+
+    :return: True if every engine passed
+    """
+    passed = True
+    for name in names:
+        try:
+            elapsed = fuzz(name, count, seed)
+        except FuzzFailure as failure:
+            print(f"{name:<20} FAILED\n{failure}")
+            passed = False
+            continue
+        rate = count / elapsed if elapsed else float('inf')
+        print(f"{name:<20} ok   {count} ops   {elapsed:7.3f}s   {rate:12,.0f} ops/s")
+    return passed
+
+
+if __name__ == "__main__":
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else random.randrange(2 ** 32)
+    names = sys.argv[3:] or list(ENGINES)
+    unknown = [name for name in names if name not in ENGINES]
+    if unknown:
+        sys.exit(f"unknown engine {', '.join(unknown)}, choose from {', '.join(ENGINES)}")
+
+    print(f"seed {seed}\n")
+    sys.exit(0 if main(count, seed, names) else 1)
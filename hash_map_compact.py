@@ -0,0 +1,386 @@
+# Name: Zachary Garner
+# Course: CS261 - Data Structures
+# Assignment: HashMap Implementation
+# Description: Insertion-ordered HashMap in the style of CPython's compact dict. Keys, values and hashes are appended
+# to dense DynamicArrays, and a sparse index table of small integers maps each bucket to a position in those arrays.
+# Collisions in the index table are resolved with quadratic probing, as in the open addressing HashMap.
+
+from array import array
+
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+
+# Index table markers for a bucket that was never used and for a bucket whose entry was removed
+FREE = -1
+DUMMY = -2
+
+# Marker stored in the dense key array in place of a removed key
+_DELETED = object()
+
+# Typecode of a 4-byte signed integer for the index table. 'l' is 8 bytes on LP64 platforms, so it cannot be used
+_INT32 = next(typecode for typecode in 'il' if array(typecode).itemsize == 4)
+
+
+class HashMap:
+    def __init__(self, capacity: int = 11, function: callable = hash_function_1) -> None:
+        """
+        Initialize new compact HashMap that uses a dense entry array and a sparse index table with quadratic probing
+        """
+        # capacity must be a prime number
+        self._capacity = self._next_prime(capacity)
+        self._indices = self._new_indices(self._capacity)
+
+        self._hashes = DynamicArray()
+        self._keys = DynamicArray()
+        self._values = DynamicArray()
+
+        self._hash_function = function
+        self._size = 0
+
+        # Incremented by every insert, remove, resize and clear so that iteration can detect concurrent modification
+        self._modcount = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output, in insertion order
+        """
+        out = ''
+        for i in range(self._keys.length()):
+            key = self._keys.get_unchecked(i)
+            if key is not _DELETED:
+                out += str(i) + ': ' + str(key) + ': ' + str(self._values.get_unchecked(i)) + '\n'
+        return out
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Increment from given number to find the closest prime number
+        """
+        if capacity % 2 == 0:
+            capacity += 1
+
+        while not self._is_prime(capacity):
+            capacity += 2
+
+        return capacity
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        if capacity == 2 or capacity == 3:
+            return True
+
+        if capacity == 1 or capacity % 2 == 0:
+            return False
+
+        factor = 3
+        while factor ** 2 <= capacity:
+            if capacity % factor == 0:
+                return False
+            factor += 2
+
+        return True
+
+    @staticmethod
+    def _new_indices(capacity: int) -> array:
+        """
+        Create an index table of FREE buckets using the narrowest integer type that can address capacity entries
+        """
+        if capacity <= 0x7f:
+            typecode = 'b'
+        elif capacity <= 0x7fff:
+            typecode = 'h'
+        elif capacity <= 0x7fffffff:
+            typecode = _INT32
+        else:
+            typecode = 'q'
+        return array(typecode, [FREE]) * capacity
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _lookup(self, key: str, hash: int) -> int:
+        """
+        Follows the probe sequence of the key through the index table.
+
+        :param key:  The target key
+        :param hash: The hash of the key
+        :return:     The index table bucket holding the key, or -1 if the key was not found
+        """
+        capacity = self._capacity
+        initial_index = hash % capacity
+
+        for probing in range(capacity):
+            index = (initial_index + probing ** 2) % capacity
+            entry = self._indices[index]
+
+            # A FREE bucket ends the probe sequence
+            if entry == FREE:
+                return -1
+
+            if entry != DUMMY and self._hashes.get_unchecked(entry) == hash \
+                    and self._keys.get_unchecked(entry) == key:
+                return index
+
+        return -1
+
+    def _insert_index(self, hash: int, entry: int) -> None:
+        """
+        Places an entry position in the first FREE or DUMMY bucket of its probe sequence.
+
+        :param hash:  The hash of the entry's key
+        :param entry: The position of the entry in the dense arrays
+        """
+        capacity = self._capacity
+        initial_index = hash % capacity
+        probing = 0
+
+        while True:
+            index = (initial_index + probing ** 2) % capacity
+            if self._indices[index] < 0:
+                self._indices[index] = entry
+                return
+            probing += 1
+
+    def put(self, key: str, value: object) -> bool:
+        """
+        Updates the key/value pair in the hash map. If the key already exists, then the value is updated in place and
+        the key keeps its position in the insertion order. Otherwise the pair is appended to the dense arrays.
+
+        :param key:   The target key
+        :param value: The given value that is to be added
+        :return:      True if a new key/value pair was inserted, False if an existing value was updated
+        """
+        hash = self._hash_function(key)
+
+        index = self._lookup(key, hash)
+        if index != -1:
+            self._values.set_unchecked(self._indices[index], value)
+            return False
+
+        # Removed entries still occupy the dense arrays, so they count toward the load until the next resize
+        if (self._keys.length() + 1) / self._capacity > 0.5:
+            self.resize_table(max(4 * (self._size + 1), 11))
+
+        self._insert_index(hash, self._keys.length())
+        self._hashes.append(hash)
+        self._keys.append(key)
+        self._values.append(value)
+        self._size += 1
+        self._modcount += 1
+        return True
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes the index table and compacts the dense arrays, dropping removed entries while keeping insertion order.
+
+        :param new_capacity: The new size of the index table
+        """
+        if new_capacity < self._size or new_capacity < 1:
+            return
+
+        # Quadratic probing only reaches a free bucket reliably while at most half the table is in use
+        if self._size / new_capacity > 0.5:
+            new_capacity = 2 * self._size
+
+        # Adjust the capacity to the next prime number
+        if not self._is_prime(new_capacity):
+            new_capacity = self._next_prime(new_capacity)
+
+        hashes = DynamicArray()
+        keys = DynamicArray()
+        values = DynamicArray()
+        for i in range(self._keys.length()):
+            key = self._keys.get_unchecked(i)
+            if key is not _DELETED:
+                hashes.append(self._hashes.get_unchecked(i))
+                keys.append(key)
+                values.append(self._values.get_unchecked(i))
+
+        self._capacity = new_capacity
+        self._indices = self._new_indices(new_capacity)
+        self._hashes = hashes
+        self._keys = keys
+        self._values = values
+
+        # Only positions are rehashed, the stored hashes save calling the hash function again
+        for i in range(hashes.length()):
+            self._insert_index(hashes.get_unchecked(i), i)
+        self._modcount += 1
+
+    def table_load(self) -> float:
+        """
+        Returns the load factor of the hash table.
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Returns how many buckets of the index table do not point at a live entry.
+
+        :return: The number of empty buckets
+        """
+        return self._indices.count(FREE) + self._indices.count(DUMMY)
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, if the key is not found, it returns None.
+
+        :param key: The given key that is associated with the value to be found
+        :return:    The value at the given key or None if the key was not found
+        """
+        index = self._lookup(key, self._hash_function(key))
+        if index == -1:
+            return None
+        return self._values.get_unchecked(self._indices[index])
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Checks if the provided key is in the hash map.
+
+        :param key: The target key being searched for
+        :return:    True if the key exists, False if it does not
+        """
+        return self._lookup(key, self._hash_function(key)) != -1
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value. The index bucket becomes a DUMMY and the dense slot is marked
+        deleted until the next resize compacts it away.
+
+        :param key: The target key to be removed
+        """
+        index = self._lookup(key, self._hash_function(key))
+        if index == -1:
+            return
+
+        entry = self._indices[index]
+        self._indices[index] = DUMMY
+        self._keys.set_unchecked(entry, _DELETED)
+        self._values.set_unchecked(entry, None)
+        self._size -= 1
+        self._modcount += 1
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Creates a new DynamicArray of key/value tuples in insertion order. Only the dense arrays are walked, so the
+        cost is proportional to the number of entries rather than the capacity.
+
+        :return: The newly created DynamicArray
+        """
+        new_da = DynamicArray()
+        for key, value in self.items():
+            new_da.append((key, value))
+        return new_da
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map without changing the underlying capacity of the hash table.
+        """
+        self._indices = self._new_indices(self._capacity)
+        self._hashes = DynamicArray()
+        self._keys = DynamicArray()
+        self._values = DynamicArray()
+        self._size = 0
+        self._modcount += 1
+
+    def items(self):
+        """
+        Generator over the key/value pairs in insertion order. Raises a RuntimeError if the map is structurally
+        modified (insert, remove, resize or clear) while the generator is in use. Updating the value of an existing
+        key does not invalidate it.
+        """
+        modcount = self._modcount
+        for i in range(self._keys.length()):
+            key = self._keys.get_unchecked(i)
+            if key is not _DELETED:
+                yield key, self._values.get_unchecked(i)
+                if self._modcount != modcount:
+                    raise RuntimeError("HashMap changed size during iteration")
+
+    def keys(self):
+        """
+        Generator over the keys in insertion order.
+        """
+        for key, _ in self.items():
+            yield key
+
+    def values(self):
+        """
+        Generator over the values in insertion order.
+        """
+        for _, value in self.items():
+            yield value
+
+    def __iter__(self):
+        """
+        Iterates over the keys in insertion order.
+        """
+        return self.keys()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+
+if __name__ == "__main__":
+
+    print("\nCompact - put example 1")
+    print("-----------------------")
+    m = HashMap(53, hash_function_1)
+    for i in range(150):
+        m.put('str' + str(i), i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nCompact - insertion order example 1")
+    print("-----------------------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), str(i * 10))
+    m.remove('2')
+    m.put('1', 'updated')
+    m.put('2', '200')
+    print(m.get_keys_and_values())
+    m.resize_table(2)
+    print(m.get_keys_and_values(), m.get_size(), m.get_capacity())
+
+    print("\nCompact - contains_key example 1")
+    print("--------------------------------")
+    m = HashMap(79, hash_function_2)
+    keys = [i for i in range(1, 1000, 20)]
+    for key in keys:
+        m.put(str(key), key * 42)
+    result = True
+    for key in keys:
+        result &= m.contains_key(str(key))
+        result &= not m.contains_key(str(key + 1))
+    for key in keys[::2]:
+        m.remove(str(key))
+    for key in keys:
+        result &= m.contains_key(str(key)) == (key not in keys[::2])
+    print(result, m.get_size(), m.get_capacity())
+
+    print("\nCompact - iteration example 1")
+    print("-----------------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(5):
+        m.put('key' + str(i), i)
+    for key, value in m.items():
+        m.put(key, value * 10)
+    print(list(m.values()))
+    try:
+        for key in m:
+            m.put(key + 'x', 0)
+    except RuntimeError as error:
+        print(error, m.get_size())
@@ -0,0 +1,413 @@
+# Name: Zachary Garner
+# Course: CS261 - Data Structures
+# Assignment: HashMap Implementation
+# Description: Open addressing HashMap specialized for 64-bit integer keys and numeric values. Keys, values and bucket
+# states are stored in NumPy arrays instead of HashEntry objects, and put_many/get_many probe a whole batch of keys
+# at once with vectorized operations. Collisions are resolved with quadratic probing as in hash_map_oa.
+
+import numpy as np
+
+from a6_include import DynamicArray
+
+# Bucket states
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+_MASK = 0xffffffffffffffff
+
+
+def hash_int(key: int) -> int:
+    """Hash function for 64-bit integer keys, the 64-bit finalizer of MurmurHash3."""
+    h = key & _MASK
+    h ^= h >> 33
+    h = (h * 0xff51afd7ed558ccd) & _MASK
+    h ^= h >> 33
+    h = (h * 0xc4ceb9fe1a85ec53) & _MASK
+    h ^= h >> 33
+    return h
+
+
+def hash_int_array(keys: np.ndarray) -> np.ndarray:
+    """Vectorized hash_int over an array of integer keys, returning an array of uint64 hashes."""
+    h = keys.astype(np.uint64)
+    h ^= h >> np.uint64(33)
+    h *= np.uint64(0xff51afd7ed558ccd)
+    h ^= h >> np.uint64(33)
+    h *= np.uint64(0xc4ceb9fe1a85ec53)
+    h ^= h >> np.uint64(33)
+    return h
+
+
+class HashMap:
+    def __init__(self, capacity: int = 11, dtype=np.float64) -> None:
+        """
+        Initialize new integer key HashMap that uses quadratic probing for collision resolution
+
+        :param capacity: The initial number of buckets, rounded up to a prime number
+        :param dtype:    The NumPy dtype of the stored values
+        """
+        # capacity must be a prime number
+        self._capacity = self._next_prime(capacity)
+        self._dtype = np.dtype(dtype)
+        self._keys = np.zeros(self._capacity, dtype=np.int64)
+        self._values = np.zeros(self._capacity, dtype=self._dtype)
+        self._states = np.zeros(self._capacity, dtype=np.uint8)
+        self._size = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._capacity):
+            if self._states[i] == LIVE:
+                out += str(i) + ': K: ' + str(self._keys[i]) + ' V: ' + str(self._values[i]) + '\n'
+        return out
+
+    def _next_prime(self, capacity: int) -> int:
+        """
+        Increment from given number to find the closest prime number
+        """
+        if capacity % 2 == 0:
+            capacity += 1
+
+        while not self._is_prime(capacity):
+            capacity += 2
+
+        return capacity
+
+    @staticmethod
+    def _is_prime(capacity: int) -> bool:
+        """
+        Determine if given integer is a prime number and return boolean
+        """
+        if capacity == 2 or capacity == 3:
+            return True
+
+        if capacity == 1 or capacity % 2 == 0:
+            return False
+
+        factor = 3
+        while factor ** 2 <= capacity:
+            if capacity % factor == 0:
+                return False
+            factor += 2
+
+        return True
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _find_index(self, key: int) -> int:
+        """
+        Follows the probe sequence of the key until the key or an empty bucket is found.
+
+        :param key: The target key
+        :return:    The index of the bucket holding the key, or -1 if the key is not in the hash map
+        """
+        capacity = self._capacity
+        initial_index = hash_int(key) % capacity
+        states = self._states
+        keys = self._keys
+
+        for probing in range(capacity):
+            index = (initial_index + probing * probing) % capacity
+            state = states[index]
+            if state == EMPTY:
+                return -1
+            if state == LIVE and keys[index] == key:
+                return index
+
+        return -1
+
+    def put(self, key: int, value) -> bool:
+        """
+        Updates the key/value pair in the hash map. If the key already exists, then the value is updated in place.
+        Otherwise the pair is added to the first empty bucket or tombstone on the key's probe sequence.
+
+        :param key:   The target key
+        :param value: The given value that is to be added
+        :return:      True if a new key/value pair was inserted, False if an existing value was updated
+        """
+        index = self._find_index(key)
+        if index != -1:
+            self._values[index] = value
+            return False
+
+        if (self._size + 1) / self._capacity > 0.5:
+            self.resize_table(2 * self._capacity)
+
+        capacity = self._capacity
+        initial_index = hash_int(key) % capacity
+        probing = 0
+
+        # The key is known to be absent, so the first free bucket on its probe sequence can be used
+        while True:
+            index = (initial_index + probing * probing) % capacity
+            if self._states[index] != LIVE:
+                break
+            probing += 1
+
+        self._keys[index] = key
+        self._values[index] = value
+        self._states[index] = LIVE
+        self._size += 1
+        return True
+
+    def _find_many(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Vectorized lookup of a batch of keys. All keys advance through their probe sequences in lock step, and keys
+        drop out of the batch as soon as they hit their key or an empty bucket.
+
+        :param keys: An int64 array of keys
+        :return:     An int64 array with the bucket index of each key, or -1 where the key was not found
+        """
+        capacity = np.uint64(self._capacity)
+        initial = hash_int_array(keys) % capacity
+        found = np.full(keys.shape[0], -1, dtype=np.int64)
+        active = np.arange(keys.shape[0])
+
+        for probing in range(self._capacity):
+            if active.shape[0] == 0:
+                break
+
+            index = ((initial[active] + np.uint64(probing * probing)) % capacity).astype(np.int64)
+            states = self._states[index]
+            hit = (states == LIVE) & (self._keys[index] == keys[active])
+            found[active[hit]] = index[hit]
+
+            # Keys that were found or reached an empty bucket are finished
+            active = active[~hit & (states != EMPTY)]
+
+        return found
+
+    def get_many(self, keys, default=0) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Looks up a batch of keys at once.
+
+        :param keys:    A sequence or array of integer keys
+        :param default: The value reported for keys that are not in the hash map
+        :return:        An array of values and a boolean array that is True where the key was found
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        found = self._find_many(keys)
+        mask = found != -1
+
+        values = np.full(keys.shape[0], default, dtype=self._dtype)
+        values[mask] = self._values[found[mask]]
+        return values, mask
+
+    def contains_many(self, keys) -> np.ndarray:
+        """
+        Checks a batch of keys at once.
+
+        :param keys: A sequence or array of integer keys
+        :return:     A boolean array that is True where the key exists
+        """
+        return self._find_many(np.asarray(keys, dtype=np.int64)) != -1
+
+    def put_many(self, keys, values) -> int:
+        """
+        Adds or updates a batch of key/value pairs at once. If a key appears more than once in the batch, the last
+        value wins, as if the pairs were put one at a time.
+
+        :param keys:   A sequence or array of integer keys
+        :param values: A sequence or array of values of the same length, or a single value for every key
+        :return:       The number of newly inserted keys
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        values = np.broadcast_to(np.asarray(values, dtype=self._dtype), keys.shape)
+
+        # Keep only the last occurrence of each key
+        unique_keys, last = np.unique(keys[::-1], return_index=True)
+        positions = keys.shape[0] - 1 - last
+        keys = keys[positions]
+        values = values[positions]
+
+        # Existing keys are updated in place
+        found = self._find_many(keys)
+        existing = found != -1
+        self._values[found[existing]] = values[existing]
+
+        keys = keys[~existing]
+        values = values[~existing]
+        if keys.shape[0] == 0:
+            return 0
+
+        # Grow once for the whole batch rather than once per doubling
+        new_capacity = self._capacity
+        while (self._size + keys.shape[0]) / new_capacity > 0.5:
+            new_capacity *= 2
+        if new_capacity != self._capacity:
+            self.resize_table(new_capacity)
+
+        self._insert_absent(keys, values)
+        return keys.shape[0]
+
+    def _insert_absent(self, keys: np.ndarray, values: np.ndarray) -> None:
+        """
+        Inserts a batch of distinct keys that are known to be absent. In each round every pending key tries the next
+        bucket of its probe sequence; when several keys want the same free bucket, one wins and the rest move on.
+
+        :param keys:   An int64 array of distinct keys
+        :param values: An array of values of the same length
+        """
+        capacity = np.uint64(self._capacity)
+        initial = hash_int_array(keys) % capacity
+        probing = np.zeros(keys.shape[0], dtype=np.uint64)
+        active = np.arange(keys.shape[0])
+
+        while active.shape[0] > 0:
+            index = ((initial[active] + probing[active] * probing[active]) % capacity).astype(np.int64)
+            free = self._states[index] != LIVE
+
+            # The first key claiming each free bucket wins it
+            candidates = active[free]
+            slots, first = np.unique(index[free], return_index=True)
+            winners = candidates[first]
+            self._keys[slots] = keys[winners]
+            self._values[slots] = values[winners]
+            self._states[slots] = LIVE
+            self._size += winners.shape[0]
+
+            placed = np.zeros(keys.shape[0], dtype=bool)
+            placed[winners] = True
+            active = active[~placed[active]]
+            probing[active] += np.uint64(1)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes the table, rehashing every live key in one vectorized batch. The new capacity is rounded up to a prime
+        number and never leaves the table more than half full.
+
+        :param new_capacity: The new number of buckets
+        """
+        if new_capacity < self._size or new_capacity < 1:
+            return
+
+        # Quadratic probing only reaches a free bucket reliably while at most half the table is in use
+        if self._size / new_capacity > 0.5:
+            new_capacity = 2 * self._size
+
+        if not self._is_prime(new_capacity):
+            new_capacity = self._next_prime(new_capacity)
+
+        live = self._states == LIVE
+        keys = self._keys[live]
+        values = self._values[live]
+
+        self._capacity = new_capacity
+        self._keys = np.zeros(new_capacity, dtype=np.int64)
+        self._values = np.zeros(new_capacity, dtype=self._dtype)
+        self._states = np.zeros(new_capacity, dtype=np.uint8)
+        self._size = 0
+        self._insert_absent(keys, values)
+
+    def table_load(self) -> float:
+        """
+        Returns the load factor of the hash table.
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Returns how many buckets do not hold a live entry.
+
+        :return: The number of empty buckets
+        """
+        return self._capacity - self._size
+
+    def get(self, key: int) -> object:
+        """
+        Returns the value associated with the given key, if the key is not found, it returns None.
+
+        :param key: The given key that is associated with the value to be found
+        :return:    The value at the given key or None if the key was not found
+        """
+        index = self._find_index(key)
+        if index == -1:
+            return None
+        return self._values[index].item()
+
+    def contains_key(self, key: int) -> bool:
+        """
+        Checks if the provided key is in the hash map.
+
+        :param key: The target key being searched for
+        :return:    True if the key exists, False if it does not
+        """
+        return self._find_index(key) != -1
+
+    def remove(self, key: int) -> None:
+        """
+        Removes the given key and its associated value by marking its bucket as a tombstone.
+
+        :param key: The target key to be removed
+        """
+        index = self._find_index(key)
+        if index != -1:
+            self._states[index] = TOMBSTONE
+            self._size -= 1
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Creates a new DynamicArray where each index is a tuple that contains the key/value pair that's stored in the
+        hash map.
+
+        :return: The newly created DynamicArray
+        """
+        keys, values = self.to_arrays()
+        return DynamicArray(list(zip(keys.tolist(), values.tolist())))
+
+    def to_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the live keys and values as two NumPy arrays in bucket order.
+        """
+        live = self._states == LIVE
+        return self._keys[live], self._values[live]
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map without changing the underlying capacity of the hash table.
+        """
+        self._states[:] = EMPTY
+        self._size = 0
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+
+if __name__ == "__main__":
+
+    print("\nInt - put example 1")
+    print("-------------------")
+    m = HashMap(53)
+    for i in range(150):
+        m.put(i * 7919, i * 100)
+        if i % 25 == 24:
+            print(m.empty_buckets(), round(m.table_load(), 2), m.get_size(), m.get_capacity())
+
+    print("\nInt - put_many / get_many example 1")
+    print("-----------------------------------")
+    m = HashMap(11, dtype=np.int64)
+    ids = np.arange(0, 2_000_000, 2, dtype=np.int64)
+    print(m.put_many(ids, ids * 3), m.get_size(), m.get_capacity())
+    print(m.put_many([0, 2, 1, 1], [7, 8, 9, 10]), m.get(0), m.get(1), m.get(3))
+    values, found = m.get_many([0, 1, 2, 3, 1_999_998])
+    print(values, found)
+
+    m.remove(0)
+    print(m.contains_many([0, 2]), m.get_size())
+    print(m.get_keys_and_values().length())
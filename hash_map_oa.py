@@ -4,26 +4,143 @@
 # Description: Class for a HashMap data structure that utilizes a DynamicArray for storage. This class uses open
 # addressing with quadratic probing for its collision resolution.
 
-from a6_include import (DynamicArray, DynamicArrayException, HashEntry,
-                        hash_function_1, hash_function_2)
+from math import ceil, log
+
+from a6_include import (HASH_FUNCTION_LADDER, DynamicArray, DynamicArrayException, HashEntry,
+                        hash_function_1, hash_function_2, make_seeded_hash_function)
+from bloom_filter import CountingBloomFilter
+from change_feed import CLEAR, PUT, REMOVE, UPDATE, ChangeFeed
+from frozen_map import FrozenHashMap
+from snapshot import SnapshotException, take_snapshot
+from value_codec import ValueCodec
+
+# Probing strategies
+QUADRATIC_PROBING = 'quadratic'
+LINEAR_PROBING = 'linear'
+GROUP_PROBING = 'group'
+
+# Metadata bytes of group probing. A bucket holding a key has the low 7 bits of the key's hash as its tag
+_EMPTY = 0x80
+_DELETED = 0xFE
+_TAG_MASK = 0x7F
+
+# Number of puts over the probe bound, at one capacity, after which a map with max_chain reseeds its hash function
+CHAIN_VIOLATIONS = 4
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    def __init__(self,
+                 capacity: int,
+                 function,
+                 grow_at: float = 0.5,
+                 shrink_at: float = None,
+                 growth_factor: float = 2.0,
+                 adaptive: bool = False,
+                 max_mean_probe: float = 4.0,
+                 sample_window: int = 128,
+                 seeded: bool = False,
+                 seed: bytes = None,
+                 max_chain: int = None,
+                 bloom_bits_per_key: int = None,
+                 codec: ValueCodec = None,
+                 probing: str = QUADRATIC_PROBING,
+                 group_size: int = 16,
+                 change_feed: ChangeFeed = None) -> None:
         """
         Initialize new HashMap that uses
         quadratic probing for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+
+        Quadratic probing is only guaranteed to find a free bucket while the table is at most half full. With a
+        grow_at above 0.5, put grows the table early whenever a probe sequence has no free bucket. Linear and group
+        probing visit every bucket, so they can run at higher load factors, and they read neighboring buckets rather
+        than jumping across the table.
+
+        :param capacity:       The initial number of buckets, rounded up to a prime number
+        :param function:       The hash function
+        :param grow_at:        Load factor at which put grows the table
+        :param shrink_at:      Load factor under which remove shrinks the table, or None to never shrink
+        :param growth_factor:  Factor the capacity is multiplied by when growing and divided by when shrinking
+        :param adaptive:       Sample the probe sequence length of every put and, when a window of samples averages
+                               more than max_mean_probe, rehash with the next stronger function of HASH_FUNCTION_LADDER
+        :param max_mean_probe: Mean probe sequence length that triggers a stronger hash function in adaptive mode
+        :param sample_window:  Number of puts averaged per adaptive check
+        :param seeded:         Ignore function and use a keyed hash function with a random per-instance seed, for keys
+                               that may be chosen by an attacker
+        :param seed:           Use a keyed hash function with this seed instead of function
+        :param max_chain:      Smallest probe sequence bound of the collision attack check, or None to never check.
+                               The bound grows with the capacity and load factor as the longest probe sequence
+                               expected under a random hash function does, and when CHAIN_VIOLATIONS puts at one
+                               capacity probe further, the map rehashes once with a freshly seeded hash function
+        :param bloom_bits_per_key: Keep a counting Bloom filter of the keys with this many counters per key, so that
+                                   get, contains_key and remove reject most absent keys without probing
+        :param codec:          A value_codec.ValueCodec to store large values compressed, decoded again when read
+        :param probing:        QUADRATIC_PROBING, LINEAR_PROBING, or GROUP_PROBING, which probes groups of group_size
+                               buckets at a time using a metadata byte per bucket
+        :param group_size:     Number of buckets per group with group probing
+        :param change_feed:    A change_feed.ChangeFeed that receives an event for every put, update, remove and clear
         """
-        self._buckets = DynamicArray()
+        if growth_factor <= 1:
+            raise ValueError("growth_factor must be greater than 1")
+        if probing not in (QUADRATIC_PROBING, LINEAR_PROBING, GROUP_PROBING):
+            raise ValueError(f"unknown probing strategy: {probing}")
+        if shrink_at is not None and shrink_at * growth_factor >= grow_at:
+            raise ValueError("shrink_at * growth_factor must be below grow_at, or the table would oscillate")
 
         # capacity must be a prime number
         self._capacity = self._next_prime(capacity)
-        for _ in range(self._capacity):
-            self._buckets.append(None)
+        self._buckets = DynamicArray.filled(self._capacity, None)
+
+        # Group probing keeps one metadata byte per bucket, followed by copies of the first group - 1 bytes
+        self._probing = probing
+        self._group_size = group_size
+        self._group = min(group_size, self._capacity)
+        self._meta = None
+        if probing == GROUP_PROBING:
+            self._meta = bytearray((_EMPTY,)) * (self._capacity + self._group - 1)
+
+        # Set when a snapshot shares the metadata, so that the next write copies it first
+        self._meta_shared = False
+
+        if seeded or seed is not None:
+            function = make_seeded_hash_function(seed)
 
         self._hash_function = function
         self._size = 0
+        self._max_chain = max_chain
+        self._reseeds = 0
+
+        self._grow_at = grow_at
+        self._shrink_at = shrink_at
+        self._growth_factor = growth_factor
+        self._min_capacity = self._capacity
+        if max_chain is not None:
+            self._reset_chain_bound()
+        self._adaptive = adaptive
+        self._max_mean_probe = max_mean_probe
+        self._sample_window = sample_window
+        self._probe_total = 0
+        self._probe_count = 0
+
+        # Incremented by every insert, remove, resize and clear so that iterators can detect concurrent modification
+        self._modcount = 0
+
+        # Set by instrumentation.Instrumentation.attach, None when the map is not instrumented
+        self._instrumentation = None
+
+        # Bucket views of the live snapshots, None until the first snapshot is taken
+        self._snapshots = None
+
+        # Stores values compressed and decodes them on read, None to store values as they are
+        self._codec = codec
+
+        # Receives an event for every change, None when changes are not captured
+        self._change_feed = change_feed
+
+        # Counting Bloom filter of the keys, None unless bloom_bits_per_key is given
+        self._bloom_bits_per_key = bloom_bits_per_key
+        self._bloom = None
+        if bloom_bits_per_key is not None:
+            self._rebuild_bloom()
 
     def __str__(self) -> str:
         """
@@ -82,47 +199,204 @@ class HashMap:
         """
         return self._capacity
 
-    # ------------------------------------------------------------------ #
+    def get_hash_function(self) -> callable:
+        """
+        Return the hash function currently in use, which adaptive mode may have changed
+        """
+        return self._hash_function
 
-    def put(self, key: str, value: object) -> None:
+    def get_seed(self) -> bytes:
+        """
+        Return the seed of the keyed hash function in use, or None if the hash function is not seeded
         """
-        Updates the key/value pair in the hash map. If the key already exists, then the value is updated to the given
-        value. If it does not exist then the key/value pair is added. If a resize is necessary, then resize_table is
-        called. The function utilizes quadratic probing to find the next empty bucket.
+        return getattr(self._hash_function, 'seed', None)
 
-        :param key:   The target key
-        :param value: The given value that is to be added
+    def get_change_feed(self) -> ChangeFeed:
         """
-        # Check if a resize is needed
-        if self.table_load() >= 0.5:
-            self.resize_table(2 * self.get_capacity())
+        Return the change feed of the map, or None if changes are not captured
+        """
+        return self._change_feed
 
-        # Determine the hash index
-        index = self._hash_function(key) % self.get_capacity()
-        probing = 0
+    def get_reseeds(self) -> int:
+        """
+        Return how many times a suspected collision attack made the map rehash with a new seed
+        """
+        return self._reseeds
+
+    def _reseed(self) -> None:
+        """
+        Rehashes with a freshly seeded hash function after puts kept seeing probe sequences longer than the bound.
+        Without the seed, an attacker cannot predict which keys collide under the new function. The table reseeds at
+        most once per capacity, since reseeding again at the same size cannot help against a chain that survived one.
+        """
+        self._reseeds += 1
+        self.rehash(make_seeded_hash_function())
+        self._reseeded = True
+
+    def _reset_chain_bound(self) -> None:
+        """
+        Starts a new epoch of the collision attack check after the capacity changed. The bound is max_chain or, if
+        larger, twice the longest probe sequence expected under a random hash function at the grow_at load factor a.
+        A probe continues past a bucket with probability about a, so the longest of m probes is about
+        ln(m) / ln(1 / a), and clustering under linear and group probing stretches that by about 1 / (1 - a). Group
+        probing counts one probe per group.
+        """
+        load = min(max(self._grow_at, 0.5), 0.99)
+        expected = log(max(self._capacity, 3)) / (log(1 / load) * (1 - load))
+        if self._meta is not None:
+            expected /= self._group
+        self._chain_bound = max(self._max_chain, ceil(2 * expected))
+        self._chain_violations = 0
+        self._reseeded = False
+
+    def _check_chain(self, length: int) -> None:
+        """
+        Counts a put whose probe sequence was longer than the bound, and reseeds once CHAIN_VIOLATIONS such puts
+        happened at the current capacity. A single long probe sequence is normal for random keys; many are a sign of
+        keys chosen to collide.
 
-        # Loop to find the correct position for the key
-        while True:
-            current_index = (index + probing ** 2) % self.get_capacity()
-            bucket = self._buckets[current_index]
+        :param length: The probe sequence length seen by the put
+        """
+        if length <= self._chain_bound:
+            return
+        self._chain_violations += 1
+        if self._chain_violations >= CHAIN_VIOLATIONS and not self._reseeded:
+            self._reseed()
 
-            # If the bucket is empty or has a tombstone, or contains the same key
-            if not bucket or bucket.is_tombstone or bucket.key == key:
-                # Add or update the entry
-                self._buckets[current_index] = HashEntry(key, value)
+    def _grown_capacity(self) -> int:
+        """
+        Return the capacity to grow to, at least one more than the current capacity
+        """
+        return max(int(self._capacity * self._growth_factor), self._capacity + 1)
 
-                # If it was a new entry, increment size
-                if not bucket or bucket.is_tombstone:
-                    self._size += 1
-                return
+    def _sample_probe(self, length: int) -> None:
+        """
+        Adds one probe sequence length sample in adaptive mode, and switches to a stronger hash function once a full
+        window of samples averages more than max_mean_probe.
 
-            # Increment probing by 1
-            probing += 1
+        :param length: The probe sequence length seen by one put
+        """
+        self._probe_total += length
+        self._probe_count += 1
+        if self._probe_count < self._sample_window:
+            return
+
+        mean = self._probe_total / self._probe_count
+        self._probe_total = 0
+        self._probe_count = 0
+        if mean <= self._max_mean_probe:
+            return
 
-            # Prevent infinite loops
-            if probing >= self.get_capacity():
+        if self._hash_function in HASH_FUNCTION_LADDER:
+            position = HASH_FUNCTION_LADDER.index(self._hash_function)
+            if position + 1 < len(HASH_FUNCTION_LADDER):
+                self.rehash(HASH_FUNCTION_LADDER[position + 1])
                 return
 
+        # There is no stronger function to switch to, so stop sampling
+        self._adaptive = False
+
+    def rehash(self, function: callable) -> None:
+        """
+        Switches to another hash function and rehashes every entry into a table of the same capacity.
+
+        :param function: The new hash function
+        """
+        self._hash_function = function
+        self.resize_table(self._capacity)
+
+    def _maybe_shrink(self) -> None:
+        """
+        Shrinks the table after a remove if the load factor fell under shrink_at, never below the initial capacity.
+        """
+        if self._shrink_at is not None and self._capacity > self._min_capacity \
+                and self.table_load() < self._shrink_at:
+            self.resize_table(max(int(self._capacity / self._growth_factor), self._min_capacity))
+
+    def _rebuild_bloom(self) -> None:
+        """
+        Replaces the Bloom filter with one sized for the number of keys the table holds before it next grows, and adds
+        every key to it in one pass.
+        """
+        self._bloom = CountingBloomFilter(max(int(self._capacity * self._grow_at), 1), self._bloom_bits_per_key)
+        self._bloom.add_all(self.iter_keys())
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> bool:
+        """
+        Updates the key/value pair in the hash map. If the key already exists, then the value is updated in place to
+        the given value. If it does not exist then the key/value pair is added. If a resize is necessary, then
+        resize_table is called. The function follows the probing strategy of the map to find the next empty bucket.
+
+        The whole probe sequence is searched for the key before a tombstone is reused, so a key that was inserted
+        past a since-removed entry is updated rather than duplicated.
+
+        :param key:   The target key
+        :param value: The given value that is to be added
+        :return:      True if a new key/value pair was inserted, False if an existing value was updated
+        """
+        if self._change_feed is None:
+            return self._put(key, value)
+        with self._change_feed.get_lock():
+            return self._put(key, value)
+
+    def _put(self, key: str, value: object) -> bool:
+        """Body of put, run with the change feed's lock held if the map has a change feed."""
+        stored = value if self._codec is None else self._codec.encode(value)
+
+        # Check if a resize is needed
+        if self.table_load() >= self._grow_at:
+            self.resize_table(self._grown_capacity())
+
+        index, free_index, probes, hash = self._locate(key)
+        if self._instrumentation is not None:
+            self._instrumentation.record_probe('put', probes)
+
+        if index != -1:
+            # The key already exists so the value is updated in place
+            if self._snapshots:
+                self._preserve(index)
+            self._buckets.get_unchecked(index).value = stored
+            if self._change_feed is not None:
+                self._change_feed.append(UPDATE, key, value)
+            if self._adaptive:
+                self._sample_probe(probes)
+            if self._max_chain is not None:
+                self._check_chain(probes)
+            return False
+
+        if free_index == -1:
+            # The probe sequence holds neither the key nor a free bucket, so grow the table and try again. The body is
+            # called directly, so that an instrumented map does not count the retry as a second put
+            self.resize_table(self._grown_capacity())
+            return self._put(key, value)
+
+        if self._snapshots:
+            self._preserve(free_index)
+        entry = self._buckets.get_unchecked(free_index)
+        if entry is None:
+            self._buckets.set_unchecked(free_index, HashEntry(key, stored))
+        else:
+            # Revive the first tombstone on the probe sequence rather than allocating a new entry
+            entry.key = key
+            entry.value = stored
+            entry.is_tombstone = False
+        if self._meta is not None:
+            self._set_meta(free_index, hash & _TAG_MASK)
+
+        if self._bloom is not None:
+            self._bloom.add(key)
+        self._size += 1
+        self._modcount += 1
+        if self._change_feed is not None:
+            self._change_feed.append(PUT, key, value)
+        if self._adaptive:
+            self._sample_probe(probes)
+        if self._max_chain is not None:
+            self._check_chain(probes)
+        return True
+
     def resize_table(self, new_capacity: int) -> None:
         """
         Resizes the table if the new_capacity is less than the current number of elements.
@@ -137,18 +411,38 @@ class HashMap:
         if not self._is_prime(new_capacity):
             new_capacity = self._next_prime(new_capacity)
 
+        instrumentation = self._instrumentation
+        if instrumentation is not None:
+            started = instrumentation.clock()
+
         # Create a new hash map for rehashing
-        new_hash_map = HashMap(new_capacity, self._hash_function)
+        new_hash_map = HashMap(new_capacity, self._hash_function, self._grow_at, growth_factor=self._growth_factor,
+                               probing=self._probing, group_size=self._group_size)
 
         # Rehash the elements to the new hash map
         for i in range(self._buckets.length()):
-            bucket = self._buckets[i]
+            bucket = self._buckets.get_unchecked(i)
             if bucket and not bucket.is_tombstone:
                 new_hash_map.put(bucket.key, bucket.value)
 
+        if instrumentation is not None:
+            instrumentation.record_resize(self._capacity, new_hash_map._capacity,
+                                          instrumentation.clock() - started, new_hash_map._size)
+
         # Update the current hash map to the new hash map
         self._buckets = new_hash_map._buckets
         self._capacity = new_hash_map._capacity
+        self._meta = new_hash_map._meta
+        self._meta_shared = False
+        self._group = new_hash_map._group
+        self._modcount += 1
+        if self._bloom is not None:
+            self._rebuild_bloom()
+        if self._max_chain is not None:
+            self._reset_chain_bound()
+
+        # Snapshots keep the old bucket array, which is no longer written to
+        self._snapshots = None
 
     def table_load(self) -> float:
         """
@@ -167,104 +461,187 @@ class HashMap:
         # Iterate through all the buckets
         for i in range(self._buckets.length()):
             # If a bucket is None or a tombstone, counter increments by 1
-            if not self._buckets[i] or (self._buckets[i] and self._buckets[i].is_tombstone):
+            bucket = self._buckets.get_unchecked(i)
+            if not bucket or bucket.is_tombstone:
                 counter += 1
 
         return counter
 
-    def get(self, key: str) -> object:
+    def _find_index(self, key: str, operation: str) -> int:
         """
-        Returns the value associated with the given key, if the key is not found, it returns None.
+        Follows the probe sequence of the key until the key or an empty bucket is found.
 
-        :param key: The given key that is associated with the value to be found
-        :return:    The value at the given key or None if the key was not found
+        :param key:       The target key
+        :param operation: The name of the calling method, under which instrumentation records the probe length
+        :return:          The index of the bucket holding the key, or -1 if the key is not in the hash map
         """
-        # Find the initial hash index for the key
-        initial_index = self._hash_function(key) % self.get_capacity()
-        index = initial_index
-        probing = 0
-
-        while True:
-            current = self._buckets[index]
-
-            # If the bucket is empty, the key is not in the hash map
-            if current is None:
-                return None
+        # A key the Bloom filter has never seen is not in the hash map
+        if self._bloom is not None and not self._bloom.might_contain(key):
+            return -1
 
-            # Check if the bucket has the target key and is not a tombstone
-            if current and not current.is_tombstone and current.key == key:
-                return current.value
+        index, _, probes, _ = self._locate(key)
+        if self._instrumentation is not None:
+            self._instrumentation.record_probe(operation, probes)
+        return index
 
-            # Increment probing and recalculate the index
-            probing += 1
-            index = (initial_index + probing ** 2) % self.get_capacity()
-
-            # End the loop if the key was not found after searching every bucket
-            if probing >= self.get_capacity():
-                return None
-
-    def contains_key(self, key: str) -> bool:
+    def _locate(self, key: str) -> tuple:
         """
-        Checks if the provided key is in the hash map.
+        Follows the probe sequence of the key, using the map's probing strategy, until the key or an empty bucket is
+        found.
 
-        :param key: The target key being searched for
-        :return:    True if the key exists, False if it does not
+        :param key: The target key
+        :return:    A tuple of the index of the bucket holding the key or -1, the index of the first tombstone or empty
+                    bucket on the probe sequence or -1, the number of probes, and the hash of the key
         """
-        # Find the hash to the correct bucket
-        initial_index = self._hash_function(key) % self.get_capacity()
-        index = initial_index
+        if self._probing == GROUP_PROBING:
+            return self._locate_group(key)
+
+        capacity = self._capacity
+        buckets = self._buckets
+        hash = self._hash_function(key)
+        index = hash % capacity
+        # Quadratic probing visits index + i ** 2 by adding the odd numbers 1, 3, 5, ... in turn, and linear probing
+        # adds 1 every time
+        step = 1
+        step_increment = 2 if self._probing == QUADRATIC_PROBING else 0
+        free_index = -1
         probing = 0
 
-        while True:
-            bucket = self._buckets[index]
+        while probing < capacity:
+            bucket = buckets.get_unchecked(index)
 
             # If the bucket is empty, the key is not in the hash map
             if bucket is None:
-                return False
+                if free_index == -1:
+                    free_index = index
+                break
 
-            # Check if the current bucket has the target key and is not a tombstone
-            if bucket and not bucket.is_tombstone and bucket.key == key:
-                return True
+            if bucket.is_tombstone:
+                if free_index == -1:
+                    free_index = index
+            elif bucket.key == key:
+                return index, free_index, probing + 1, hash
 
-            # Increment probing and recalculate the index
             probing += 1
-            index = (initial_index + probing ** 2) % self.get_capacity()
+            index += step
+            step += step_increment
+            if index >= capacity:
+                index %= capacity
 
-            # End the loop if the probe count exceeds the hash map's capacity
-            if probing >= self.get_capacity():
-                return False
+        return -1, free_index, probing + 1, hash
 
-    def remove(self, key: str) -> None:
+    def _locate_group(self, key: str) -> tuple:
         """
-        Removes the key given key and its associated value.
+        Group probing version of _locate. Groups of consecutive buckets are checked one at a time through the metadata
+        array, where bytes.find compares a whole group with the key's tag at once, and a group with an empty bucket ends
+        the search. Each group counts as one probe.
+        """
+        capacity = self._capacity
+        group = self._group
+        meta = self._meta
+        buckets = self._buckets
+        hash = self._hash_function(key)
+        tag = hash & _TAG_MASK
+        position = hash % capacity
+        free_index = -1
+
+        # Groups start group buckets apart, so this many groups cover every bucket
+        groups = -(-capacity // group)
+        for probes in range(1, groups + 1):
+            end = position + group
+
+            # Buckets whose tag matches are compared by key, the others are skipped without being read
+            match = meta.find(tag, position, end)
+            while match != -1:
+                index = match - capacity if match >= capacity else match
+                if buckets.get_unchecked(index).key == key:
+                    return index, free_index, probes, hash
+                match = meta.find(tag, match + 1, end)
+
+            empty = meta.find(_EMPTY, position, end)
+            if free_index == -1:
+                deleted = meta.find(_DELETED, position, end)
+                if deleted != -1 and (empty == -1 or deleted < empty):
+                    free_index = deleted
+                else:
+                    free_index = empty
+                if free_index >= capacity:
+                    free_index -= capacity
+
+            if empty != -1:
+                return -1, free_index, probes, hash
+
+            position += group
+            if position >= capacity:
+                position -= capacity
+
+        return -1, free_index, groups, hash
+
+    def _set_meta(self, index: int, byte: int) -> None:
+        """
+        Sets the metadata byte of a bucket, and of its copy past the end of the array when the bucket is one of the
+        first group - 1, so that a group starting near the end reads across the wrap with a single find.
+        """
+        if self._meta_shared:
+            self._meta = bytearray(self._meta)
+            self._meta_shared = False
+        self._meta[index] = byte
+        if index < self._group - 1:
+            self._meta[self._capacity + index] = byte
 
-        :param key: The target key to be removed
+    def get(self, key: str) -> object:
         """
-        # Find the initial hash index for the key
-        initial_index = self._hash_function(key) % self.get_capacity()
-        index = initial_index
-        probing = 0
+        Returns the value associated with the given key, if the key is not found, it returns None.
 
-        while True:
-            bucket = self._buckets[index]
+        :param key: The given key that is associated with the value to be found
+        :return:    The value at the given key or None if the key was not found
+        """
+        index = self._find_index(key, 'get')
+        if index == -1:
+            return None
+        if self._codec is not None:
+            return self._codec.decode(self._buckets.get_unchecked(index).value)
+        return self._buckets.get_unchecked(index).value
 
-            # If the bucket is empty, the key is not in the hash map
-            if bucket is None:
-                return
+    def contains_key(self, key: str) -> bool:
+        """
+        Checks if the provided key is in the hash map.
 
-            # If the key is found, and it's not a tombstone, mark as removed
-            if bucket and not bucket.is_tombstone and bucket.key == key:
-                self._buckets[index].is_tombstone = True
-                self._size -= 1
-                return
+        :param key: The target key being searched for
+        :return:    True if the key exists, False if it does not
+        """
+        return self._find_index(key, 'contains_key') != -1
 
-            # Increment probing and recalculate the index
-            probing += 1
-            index = (initial_index + probing ** 2) % self.get_capacity()
+    def remove(self, key: str) -> None:
+        """
+        Removes the key given key and its associated value.
 
-            # End the loop if the probe count exceeds the hash map's capacity
-            if probing >= self.get_capacity():
-                return
+        :param key: The target key to be removed
+        """
+        if self._change_feed is None:
+            self._remove(key)
+            return
+        with self._change_feed.get_lock():
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        """Body of remove, run with the change feed's lock held if the map has a change feed."""
+        index = self._find_index(key, 'remove')
+
+        # If the key is found, mark its entry as a tombstone
+        if index != -1:
+            if self._snapshots:
+                self._preserve(index)
+            self._buckets.get_unchecked(index).is_tombstone = True
+            if self._meta is not None:
+                self._set_meta(index, _DELETED)
+            if self._bloom is not None:
+                self._bloom.discard(key)
+            self._size -= 1
+            self._modcount += 1
+            if self._change_feed is not None:
+                self._change_feed.append(REMOVE, key)
+            self._maybe_shrink()
 
     def get_keys_and_values(self) -> DynamicArray:
         """
@@ -275,12 +652,13 @@ class HashMap:
         """
         # Initialize a new DynamicArray
         new_da = DynamicArray()
+        codec = self._codec
 
         for i in range(self._buckets.length()):
-            bucket = self._buckets[i]
+            bucket = self._buckets.get_unchecked(i)
             # If the bucket is not None and is not a tombstone, add the key/value
             if bucket and not bucket.is_tombstone:
-                new_da.append((bucket.key, bucket.value))
+                new_da.append((bucket.key, bucket.value if codec is None else codec.decode(bucket.value)))
 
         return new_da
 
@@ -289,42 +667,244 @@ class HashMap:
         Clears the contents of the hash map without changing the underlying capacity of the hash table.
 
         """
-        # Iterate through all buckets and set them to None
-        for i in range(self._buckets.length()):
-            self._buckets[i] = None
+        if self._change_feed is None:
+            self._clear()
+            return
+        with self._change_feed.get_lock():
+            self._clear()
+
+    def _clear(self) -> None:
+        """Body of clear, run with the change feed's lock held if the map has a change feed."""
+        # Set all buckets to None in one pass, or leave the old buckets to the snapshots that share them
+        if self._snapshots:
+            self._buckets = DynamicArray.filled(self._buckets.length(), None)
+            self._snapshots = None
+        else:
+            self._buckets.fill(None)
+        if self._meta is not None:
+            self._meta = bytearray((_EMPTY,)) * len(self._meta)
+            self._meta_shared = False
+        if self._bloom is not None:
+            self._bloom.clear()
 
         # Reset the size to 0
         self._size = 0
+        self._modcount += 1
+        if self._change_feed is not None:
+            self._change_feed.append(CLEAR)
 
-    def __iter__(self):
+    def __iter__(self) -> "HashMapIterator":
         """
-        Allows the hash map to iterate across itself.
+        Returns a new iterator over the live HashEntry objects in the hash map. Each call returns an independent
+        iterator, so nested iterations do not interfere with each other. Entry values are left as stored, i.e. still
+        encoded if the map has a codec.
+        """
+        return HashMapIterator(self, HashMapIterator.ENTRIES)
 
+    def keys(self, cursor: int = 0) -> "HashMapIterator":
         """
-        # Initialize index
-        self._iter_index = 0
-        return self
+        Returns a new iterator over the keys in the hash map.
 
-    def __next__(self):
+        :param cursor: The bucket index to start from, as returned by HashMapIterator.get_cursor()
+        """
+        return HashMapIterator(self, HashMapIterator.KEYS, cursor)
+
+    def values(self, cursor: int = 0) -> "HashMapIterator":
+        """
+        Returns a new iterator over the values in the hash map.
+
+        :param cursor: The bucket index to start from, as returned by HashMapIterator.get_cursor()
+        """
+        return HashMapIterator(self, HashMapIterator.VALUES, cursor)
+
+    def items(self, cursor: int = 0) -> "HashMapIterator":
+        """
+        Returns a new iterator over the key/value tuples in the hash map.
+
+        :param cursor: The bucket index to start from, as returned by HashMapIterator.get_cursor()
+        """
+        return HashMapIterator(self, HashMapIterator.ITEMS, cursor)
+
+    def iter_items(self) -> "HashMapIterator":
+        """
+        Returns a lazy iterator over the key/value tuples in the hash map. Unlike get_keys_and_values, nothing is
+        materialized, so exports of large maps do not need a second copy of every pair.
+        """
+        return self.items()
+
+    def iter_keys(self) -> "HashMapIterator":
+        """
+        Returns a lazy iterator over the keys in the hash map.
+        """
+        return self.keys()
+
+    def iter_values(self) -> "HashMapIterator":
+        """
+        Returns a lazy iterator over the values in the hash map.
+        """
+        return self.values()
+
+    def scan(self, start_bucket: int = 0, count: int = 10) -> tuple[DynamicArray, int]:
+        """
+        Collects the key/value tuples stored in a range of buckets, so that a large map can be walked in batches.
+        Start with a cursor of 0 and pass each returned cursor back in until 0 is returned again. Every pair is
+        returned exactly once if the capacity does not change during the scan.
+
+        :param start_bucket: The first bucket of the range, 0 to start a new scan
+        :param count:        The number of buckets in the range
+        :return:             A DynamicArray of key/value tuples and the cursor of the next range, 0 when finished
+        :raises ValueError:  If count is less than 1
+        """
+        if count < 1:
+            raise ValueError(f"count must be at least 1, got {count}")
+
+        batch = DynamicArray()
+        end_bucket = min(start_bucket + count, self._buckets.length())
+        codec = self._codec
+
+        for i in range(start_bucket, end_bucket):
+            bucket = self._buckets.get_unchecked(i)
+            if bucket is not None and not bucket.is_tombstone:
+                batch.append((bucket.key, bucket.value if codec is None else codec.decode(bucket.value)))
+
+        next_cursor = end_bucket if end_bucket < self._buckets.length() else 0
+        return batch, next_cursor
+
+    def snapshot(self) -> "HashMapSnapshot":
+        """
+        Returns an O(1) read-only snapshot of the hash map. The snapshot shares the bucket array, and a bucket is only
+        copied when the hash map writes to it afterward. A resize or clear gives the hash map a new bucket array and
+        leaves snapshots with the old one, which nothing writes to anymore. Under group probing the snapshot also
+        shares the metadata, which the hash map's next write copies, one byte per bucket.
+
+        A bucket is preserved before it is written, but a read of that bucket from another thread that overlaps the
+        write may still see the new contents, so concurrent readers need their own synchronization.
+
+        :return: The snapshot, which supports every reading method of the hash map
+        """
+        return take_snapshot(self, HashMapSnapshot)
+
+    def freeze(self) -> FrozenHashMap:
         """
-        Returns the next item in the hash map based on the location of the iterator.
+        Returns an immutable copy of the hash map built on a minimal perfect hash, for lookup tables that are only read
+        from now on. The copy can be saved to a file and memory mapped back with FrozenHashMap.load.
 
+        :return: The frozen_map.FrozenHashMap
         """
-        while self._iter_index < self._buckets.length():
-            bucket = self._buckets[self._iter_index]
-            self._iter_index += 1
+        return FrozenHashMap.from_items(self.iter_items())
+
+    def _preserve(self, index: int) -> None:
+        """
+        Hands a copy of a bucket to every snapshot that does not have one yet, before the bucket is written.
+
+        :param index: The index of the bucket about to be written
+        """
+        views = [view for view in self._snapshots if not view.is_preserved(index)]
+        if not views:
+            return
+
+        bucket = self._buckets.get_unchecked(index)
+        if bucket is not None:
+            copy = HashEntry(bucket.key, bucket.value)
+            copy.is_tombstone = bucket.is_tombstone
+            bucket = copy
+        for view in views:
+            view.preserve(index, bucket)
+
+
+class HashMapSnapshot(HashMap):
+    """
+    Read-only point-in-time view of a HashMap, created by HashMap.snapshot()
+    """
+
+    def put(self, key: str, value: object) -> bool:
+        """Snapshots are read-only."""
+        raise SnapshotException("HashMap snapshots are read-only")
+
+    def remove(self, key: str) -> None:
+        """Snapshots are read-only."""
+        raise SnapshotException("HashMap snapshots are read-only")
+
+    def resize_table(self, new_capacity: int) -> None:
+        """Snapshots are read-only."""
+        raise SnapshotException("HashMap snapshots are read-only")
+
+    def clear(self) -> None:
+        """Snapshots are read-only."""
+        raise SnapshotException("HashMap snapshots are read-only")
+
+    def snapshot(self) -> "HashMapSnapshot":
+        """A snapshot never changes, so it is its own snapshot."""
+        return self
+
+
+class HashMapIterator:
+    """
+    Separate iterator class for the open addressing HashMap. The iterator reads the map's bucket array directly
+    rather than copying it, and raises a RuntimeError if the map is structurally modified (insert, remove, resize or
+    clear) while it is in use. Updating the value of an existing key does not invalidate iterators.
+
+    The cursor of a partially consumed iterator can be passed back to keys(), values() or items() to resume a scan
+    later, for example to export a large map in chunks. A resumed scan only sees every entry exactly once if the
+    capacity did not change in between.
+    """
+
+    ENTRIES = 0
+    KEYS = 1
+    VALUES = 2
+    ITEMS = 3
+
+    def __init__(self, hash_map: HashMap, kind: int, cursor: int = 0) -> None:
+        """Initialize the iterator over a map, yielding entries, keys, values or items, starting at cursor."""
+        self._map = hash_map
+        self._buckets = hash_map._buckets
+        self._kind = kind
+        self._index = cursor
+        self._modcount = hash_map._modcount
+
+    def __iter__(self) -> "HashMapIterator":
+        """Return the iterator."""
+        return self
+
+    def __next__(self):
+        """Obtain the next live entry and advance the iterator."""
+        if self._map._modcount != self._modcount:
+            raise RuntimeError("HashMap changed size during iteration")
+
+        buckets = self._buckets
+        while self._index < buckets.length():
+            bucket = buckets.get_unchecked(self._index)
+            self._index += 1
 
             # Only return values that are not None or a tombstone
             if bucket is not None and not bucket.is_tombstone:
-                return bucket
+                if self._kind == HashMapIterator.ENTRIES:
+                    return bucket
+                if self._kind == HashMapIterator.KEYS:
+                    return bucket.key
+                value = bucket.value
+                if self._map._codec is not None:
+                    value = self._map._codec.decode(value)
+                if self._kind == HashMapIterator.VALUES:
+                    return value
+                return bucket.key, value
 
         raise StopIteration
 
+    def get_cursor(self) -> int:
+        """Return the bucket index the next call to __next__ resumes from."""
+        return self._index
+
 # ------------------- BASIC TESTING ---------------------------------------- #
 
 
 if __name__ == "__main__":
 
+    import random
+    from array import array
+
+    from a6_include import hash_function_bytes_2
+
     print("\nPDF - put example 1")
     print("-------------------")
     m = HashMap(53, hash_function_1)
@@ -529,3 +1109,129 @@ if __name__ == "__main__":
     print(m)
     for item in m:
         print('K:', item.key, 'V:', item.value)
+
+    print("\nIterator - nested and resumable example 1")
+    print("---------------------")
+    m = HashMap(10, hash_function_1)
+    for i in range(4):
+        m.put(str(i), i)
+    print([(outer, inner) for outer in m.keys() for inner in m.values()])
+    it = m.items()
+    print(next(it), next(it))
+    print(list(m.items(it.get_cursor())))
+    try:
+        for key in m.keys():
+            m.remove(key)
+    except RuntimeError as error:
+        print(error)
+
+    print("\nscan example 1")
+    print("---------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(1, 6):
+        m.put(str(i), i * 10)
+    cursor = 0
+    while True:
+        batch, cursor = m.scan(cursor, 5)
+        print(batch, cursor)
+        if cursor == 0:
+            break
+    try:
+        m.scan(5, 0)
+    except ValueError as error:
+        print(error)
+
+    print("\nsnapshot example 1")
+    print("---------------------")
+    m = HashMap(11, hash_function_1)
+    for i in range(5):
+        m.put('key' + str(i), i)
+    snap = m.snapshot()
+    m.put('key0', 100)
+    m.remove('key1')
+    m.put('key5', 5)
+    print(m.get('key0'), m.get('key1'), m.get_size(), snap.get('key0'), snap.get('key1'), snap.get_size())
+    m.resize_table(50)
+    print(sorted(snap.iter_keys()), snap.contains_key('key5'))
+
+    print("\nadaptive example 1")
+    print("---------------------")
+    # Every permutation of a key collides under hash_function_1
+    m = HashMap(11, hash_function_1, adaptive=True, sample_window=32)
+    anagrams = ['']
+    for letter in 'abcdef':
+        anagrams = [word[:i] + letter + word[i:] for word in anagrams for i in range(len(word) + 1)]
+    for i, key in enumerate(anagrams):
+        m.put(key, i)
+    print(m.get_hash_function().__name__, m.get_size(), m.get_capacity(), m.get('fedcba'))
+
+    print("\nseeded example 1")
+    print("---------------------")
+    m = HashMap(11, hash_function_1, max_chain=8)
+    for i, key in enumerate(anagrams):
+        m.put(key, i)
+    snap = m.snapshot()
+    print(m.get_reseeds(), m.get_seed() is not None, snap.get_seed() == m.get_seed(), m.get('fedcba'))
+
+    print("\nseeded example 2")
+    print("---------------------")
+    # Long chains happen now and then with random keys too, which must not be taken for an attack
+    rng = random.Random(0)
+    m = HashMap(11, hash_function_1, seeded=True, max_chain=3)
+    for i in range(50000):
+        m.put(str(rng.getrandbits(64)), i)
+    print(m.get_size(), m.get_reseeds())
+
+    print("\nbloom example 1")
+    print("---------------------")
+    m = HashMap(11, hash_function_2, grow_at=0.9, bloom_bits_per_key=10)
+    for i in range(1000):
+        m.put('key' + str(i), i)
+    for i in range(0, 1000, 2):
+        m.remove('key' + str(i))
+    print(m.get('key1'), m.get('key2'), m.contains_key('key3'), m.contains_key('missing'), m.get_size())
+
+    print("\nbloom example 2")
+    print("---------------------")
+    m = HashMap(11, hash_function_bytes_2, bloom_bits_per_key=10)
+    m.put(b'bytes', 1)
+    m.put(bytearray(b'bytearray'), 2)
+    m.put(memoryview(bytearray(b'memoryview')), 3)
+    m.put(memoryview(array('i', (1, 2))), 4)
+    print(m.get(bytearray(b'bytes')), m.get(b'bytearray'), m.get(memoryview(b'memoryview')),
+          m.get(memoryview(array('i', (1, 2)))), m.contains_key(bytearray(b'missing')), m.get_size())
+    m.remove(memoryview(b'bytes'))
+    print(m.contains_key(b'bytes'), m.get_size())
+
+    print("\ncodec example 1")
+    print("---------------------")
+    m = HashMap(11, hash_function_2, codec=ValueCodec())
+    for i in range(100):
+        m.put('key' + str(i), {'id': i, 'events': [{'type': 'click', 'ts': j} for j in range(50)]})
+    m.put('small', 'stored as is')
+    print(m.get('key7')['events'][3], m.get('key7') is m.get('key7'), m.get('small'))
+
+    print("\nprobing example 1")
+    print("---------------------")
+    for probing in (QUADRATIC_PROBING, LINEAR_PROBING, GROUP_PROBING):
+        m = HashMap(11, hash_function_2, grow_at=0.9 if probing != QUADRATIC_PROBING else 0.5, probing=probing)
+        for i in range(300):
+            m.put('str' + str(i), i)
+        for i in range(0, 300, 3):
+            m.remove('str' + str(i))
+        print(probing, m.get_size(), m.get_capacity(), m.get('str10'), m.get('str9'), m.contains_key('str299'))
+
+    print("\nfreeze example 1")
+    print("---------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(500):
+        m.put('key' + str(i), i)
+    frozen = m.freeze()
+    m.put('key0', -1)
+    print(frozen.get_size(), frozen.get('key0'), frozen.get('key499'), frozen.contains_key('key500'))
+
+    m = HashMap(11, hash_function_bytes_2)
+    m.put(b'bytes', 1)
+    m.put(memoryview(bytearray(b'memoryview')), 2)
+    frozen = m.freeze()
+    print(frozen.get(bytearray(b'bytes')), frozen.get(b'memoryview'), frozen.contains_key('bytes'))
@@ -5,28 +5,109 @@
 # linked list chaining for collision resolution.
 
 
-from a6_include import (DynamicArray, LinkedList,
-                        hash_function_1, hash_function_2)
+from math import ceil, log
+
+from a6_include import (HASH_FUNCTION_LADDER, DynamicArray, LinkedList,
+                        hash_function_1, hash_function_2, make_seeded_hash_function)
+from bloom_filter import CountingBloomFilter
+from change_feed import CLEAR, PUT, REMOVE, UPDATE, ChangeFeed
+from frozen_map import FrozenHashMap
+from snapshot import SnapshotException, take_snapshot
+from value_codec import ValueCodec
+
+# Number of puts over the chain bound, at one capacity, after which a map with max_chain reseeds its hash function
+CHAIN_VIOLATIONS = 4
 
 
 class HashMap:
     def __init__(self,
                  capacity: int = 11,
-                 function: callable = hash_function_1) -> None:
+                 function: callable = hash_function_1,
+                 grow_at: float = 1.0,
+                 shrink_at: float = None,
+                 growth_factor: float = 2.0,
+                 adaptive: bool = False,
+                 max_mean_probe: float = 4.0,
+                 sample_window: int = 128,
+                 seeded: bool = False,
+                 seed: bytes = None,
+                 max_chain: int = None,
+                 bloom_bits_per_key: int = None,
+                 codec: ValueCodec = None,
+                 change_feed: ChangeFeed = None) -> None:
         """
         Initialize new HashMap that uses
         separate chaining for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
-        """
+
+        :param capacity:       The initial number of buckets, rounded up to a prime number
+        :param function:       The hash function
+        :param grow_at:        Load factor at which put grows the table
+        :param shrink_at:      Load factor under which remove shrinks the table, or None to never shrink
+        :param growth_factor:  Factor the capacity is multiplied by when growing and divided by when shrinking
+        :param adaptive:       Sample the chain length seen by every put and, when a window of samples averages more
+                               than max_mean_probe, rehash with the next stronger function of HASH_FUNCTION_LADDER
+        :param max_mean_probe: Mean chain length that triggers a stronger hash function in adaptive mode
+        :param sample_window:  Number of puts averaged per adaptive check
+        :param seeded:         Ignore function and use a keyed hash function with a random per-instance seed, for keys
+                               that may be chosen by an attacker
+        :param seed:           Use a keyed hash function with this seed instead of function
+        :param max_chain:      Smallest chain bound of the collision attack check, or None to never check. The
+                               bound grows with the capacity as the longest chain expected under a random hash
+                               function does, and when CHAIN_VIOLATIONS puts at one capacity see a longer chain,
+                               the map rehashes once with a freshly seeded hash function
+        :param bloom_bits_per_key: Keep a counting Bloom filter of the keys with this many counters per key, so that
+                                   get, contains_key and remove reject most absent keys without walking a chain
+        :param codec:          A value_codec.ValueCodec to store large values compressed, decoded again when read
+        :param change_feed:    A change_feed.ChangeFeed that receives an event for every put, update, remove and clear
+        """
+        if growth_factor <= 1:
+            raise ValueError("growth_factor must be greater than 1")
+        if shrink_at is not None and shrink_at * growth_factor >= grow_at:
+            raise ValueError("shrink_at * growth_factor must be below grow_at, or the table would oscillate")
+
         self._buckets = DynamicArray()
 
         # capacity must be a prime number
         self._capacity = self._next_prime(capacity)
-        for _ in range(self._capacity):
-            self._buckets.append(LinkedList())
+        self._buckets.extend(LinkedList() for _ in range(self._capacity))
+
+        if seeded or seed is not None:
+            function = make_seeded_hash_function(seed)
 
         self._hash_function = function
         self._size = 0
+        self._max_chain = max_chain
+        self._reseeds = 0
+
+        self._grow_at = grow_at
+        self._shrink_at = shrink_at
+        self._growth_factor = growth_factor
+        self._min_capacity = self._capacity
+        if max_chain is not None:
+            self._reset_chain_bound()
+        self._adaptive = adaptive
+        self._max_mean_probe = max_mean_probe
+        self._sample_window = sample_window
+        self._probe_total = 0
+        self._probe_count = 0
+
+        # Set by instrumentation.Instrumentation.attach, None when the map is not instrumented
+        self._instrumentation = None
+
+        # Bucket views of the live snapshots, None until the first snapshot is taken
+        self._snapshots = None
+
+        # Stores values compressed and decodes them on read, None to store values as they are
+        self._codec = codec
+
+        # Receives an event for every change, None when changes are not captured
+        self._change_feed = change_feed
+
+        # Counting Bloom filter of the keys, None unless bloom_bits_per_key is given
+        self._bloom_bits_per_key = bloom_bits_per_key
+        self._bloom = None
+        if bloom_bits_per_key is not None:
+            self._rebuild_bloom()
 
     def __str__(self) -> str:
         """
@@ -85,14 +166,129 @@ class HashMap:
         """
         return self._capacity
 
+    def get_hash_function(self) -> callable:
+        """
+        Return the hash function currently in use, which adaptive mode may have changed
+        """
+        return self._hash_function
+
+    def get_seed(self) -> bytes:
+        """
+        Return the seed of the keyed hash function in use, or None if the hash function is not seeded
+        """
+        return getattr(self._hash_function, 'seed', None)
+
+    def get_change_feed(self) -> ChangeFeed:
+        """
+        Return the change feed of the map, or None if changes are not captured
+        """
+        return self._change_feed
+
+    def get_reseeds(self) -> int:
+        """
+        Return how many times a suspected collision attack made the map rehash with a new seed
+        """
+        return self._reseeds
+
+    def _reseed(self) -> None:
+        """
+        Rehashes with a freshly seeded hash function after puts kept seeing chains longer than the chain bound.
+        Without the seed, an attacker cannot predict which keys collide under the new function. The table reseeds at
+        most once per capacity, since reseeding again at the same size cannot help against a chain that survived one.
+        """
+        self._reseeds += 1
+        self.rehash(make_seeded_hash_function())
+        self._reseeded = True
+
+    def _reset_chain_bound(self) -> None:
+        """
+        Starts a new epoch of the collision attack check after the capacity changed. The bound is max_chain or, if
+        larger, twice the longest chain expected under a random hash function at the grow_at load factor, which is
+        about the load factor plus ln(m) / ln(ln(m)) for m buckets.
+        """
+        capacity = max(self._capacity, 3)
+        expected = self._grow_at + log(capacity) / max(log(log(capacity)), 1.0)
+        self._chain_bound = max(self._max_chain, ceil(2 * expected))
+        self._chain_violations = 0
+        self._reseeded = False
+
+    def _check_chain(self, length: int) -> None:
+        """
+        Counts a put that saw a chain longer than the chain bound, and reseeds once CHAIN_VIOLATIONS such puts
+        happened at the current capacity. A single long chain is normal for random keys; many are a sign of keys
+        chosen to collide.
+
+        :param length: The chain length seen by the put
+        """
+        if length <= self._chain_bound:
+            return
+        self._chain_violations += 1
+        if self._chain_violations >= CHAIN_VIOLATIONS and not self._reseeded:
+            self._reseed()
+
+    def _grown_capacity(self) -> int:
+        """
+        Return the capacity to grow to, at least one more than the current capacity
+        """
+        return max(int(self._capacity * self._growth_factor), self._capacity + 1)
+
+    def _sample_probe(self, length: int) -> None:
+        """
+        Adds one chain length sample in adaptive mode, and switches to a stronger hash function once a full
+        window of samples averages more than max_mean_probe.
+
+        :param length: The chain length seen by one put
+        """
+        self._probe_total += length
+        self._probe_count += 1
+        if self._probe_count < self._sample_window:
+            return
+
+        mean = self._probe_total / self._probe_count
+        self._probe_total = 0
+        self._probe_count = 0
+        if mean <= self._max_mean_probe:
+            return
+
+        if self._hash_function in HASH_FUNCTION_LADDER:
+            position = HASH_FUNCTION_LADDER.index(self._hash_function)
+            if position + 1 < len(HASH_FUNCTION_LADDER):
+                self.rehash(HASH_FUNCTION_LADDER[position + 1])
+                return
+
+        # There is no stronger function to switch to, so stop sampling
+        self._adaptive = False
+
+    def rehash(self, function: callable) -> None:
+        """
+        Switches to another hash function and rehashes every entry into a table of the same capacity.
+
+        :param function: The new hash function
+        """
+        self._hash_function = function
+        self.resize_table(self._capacity)
+
+    def _maybe_shrink(self) -> None:
+        """
+        Shrinks the table after a remove if the load factor fell under shrink_at, never below the initial capacity.
+        """
+        if self._shrink_at is not None and self._capacity > self._min_capacity \
+                and self.table_load() < self._shrink_at:
+            self.resize_table(max(int(self._capacity / self._growth_factor), self._min_capacity))
+
+    def _rebuild_bloom(self) -> None:
+        """
+        Replaces the Bloom filter with one sized for the number of keys the table holds before it next grows, and adds
+        every key to it in one pass.
+        """
+        self._bloom = CountingBloomFilter(max(int(self._capacity * self._grow_at), 1), self._bloom_bits_per_key)
+        self._bloom.add_all(self.iter_keys())
+
     def items(self):
         """
         Helper function to access all key-value pairs stored in the hash map. Used in the find_mode method.
         """
-        for i in range(self._buckets.length()):
-            bucket = self._buckets[i]
-            for node in bucket:
-                yield node.key, node.value
+        return self.iter_items()
 
     # ------------------------------------------------------------------ #
 
@@ -104,24 +300,49 @@ class HashMap:
         :param key:   The unique identifier to determine where the new value is stored
         :param value: The object being stored at the key
         """
+        if self._change_feed is None:
+            self._put(key, value)
+            return
+        with self._change_feed.get_lock():
+            self._put(key, value)
+
+    def _put(self, key: str, value: object) -> None:
+        """Body of put, run with the change feed's lock held if the map has a change feed."""
+        stored = value if self._codec is None else self._codec.encode(value)
+
         # Check the load factor to determine if a resize is necessary
-        if self.table_load() >= 1.0:
-            self.resize_table(self.get_capacity() * 2)
+        if self.table_load() >= self._grow_at:
+            self.resize_table(self._grown_capacity())
 
         # Hash the key and find the bucket
         bucket_index = self._hash_function(key) % self.get_capacity()
-        bucket = self._buckets[bucket_index]
+        bucket = self._buckets.get_unchecked(bucket_index)
+        if self._instrumentation is not None:
+            self._instrumentation.record_probe('put', bucket.length())
 
         # Check if key exists
         existing_node = bucket.contains(key)
 
+        if self._snapshots:
+            self._preserve(bucket_index)
+
         if existing_node is not None:
             # The key exists so value is updated
-            existing_node.value = value
+            existing_node.value = stored
         else:
             # Key does not exist
-            bucket.insert(key, value)
+            bucket.insert(key, stored)
             self._size += 1  # Increment if the new value was added
+            if self._bloom is not None:
+                self._bloom.add(key)
+
+        if self._change_feed is not None:
+            self._change_feed.append(PUT if existing_node is None else UPDATE, key, value)
+
+        if self._adaptive:
+            self._sample_probe(bucket.length())
+        if self._max_chain is not None:
+            self._check_chain(bucket.length())
 
     def resize_table(self, new_capacity: int) -> None:
         """
@@ -137,8 +358,12 @@ class HashMap:
         if not self._is_prime(new_capacity):
             new_capacity = self._next_prime(new_capacity)
 
+        instrumentation = self._instrumentation
+        if instrumentation is not None:
+            started = instrumentation.clock()
+
         # Create a new hash map for rehashing
-        new_hash_map = HashMap(new_capacity, self._hash_function)
+        new_hash_map = HashMap(new_capacity, self._hash_function, self._grow_at, growth_factor=self._growth_factor)
 
         # Fixes an edge case where when capacity = 2 it remains 2 vs changing to 3, since 2 is already prime
         if new_capacity == 2:
@@ -146,13 +371,24 @@ class HashMap:
 
         # Rehash the elements to the new hash map
         for i in range(self._capacity):
-            bucket = self._buckets[i]
+            bucket = self._buckets.get_unchecked(i)
             for node in bucket:
                 new_hash_map.put(node.key, node.value)
 
+        if instrumentation is not None:
+            instrumentation.record_resize(self._capacity, new_hash_map._capacity,
+                                          instrumentation.clock() - started, new_hash_map._size)
+
         # Update the hash map
         self._buckets = new_hash_map._buckets
         self._capacity = new_hash_map._capacity
+        if self._bloom is not None:
+            self._rebuild_bloom()
+        if self._max_chain is not None:
+            self._reset_chain_bound()
+
+        # Snapshots keep the old bucket array, which is no longer written to
+        self._snapshots = None
 
     def table_load(self) -> float:
         """
@@ -169,7 +405,7 @@ class HashMap:
         counter = 0
 
         for i in range(self._buckets.length()):
-            bucket = self._buckets[i]
+            bucket = self._buckets.get_unchecked(i)
             # Iterate over the list to find empty buckets
             if not any(node for node in bucket):
                 counter += 1
@@ -183,13 +419,21 @@ class HashMap:
         :param key: The given key that is associated with the value to be found
         :return:    The value at the given key or None if the key was not found
         """
+        # A key the Bloom filter has never seen is not in the hash map
+        if self._bloom is not None and not self._bloom.might_contain(key):
+            return None
+
         # Find the hash to the correct bucket
         bucket_index = self._hash_function(key) % self.get_capacity()
-        bucket = self._buckets[bucket_index]
+        bucket = self._buckets.get_unchecked(bucket_index)
+        if self._instrumentation is not None:
+            self._instrumentation.record_probe('get', bucket.length())
 
         # Find the key in the bucket
         node = bucket.contains(key)
         if node is not None:
+            if self._codec is not None:
+                return self._codec.decode(node.value)
             return node.value
         else:
             return None
@@ -201,8 +445,13 @@ class HashMap:
         :param key: The target key being searched for
         :return:    True if the key exists, False if it does not
         """
+        if self._bloom is not None and not self._bloom.might_contain(key):
+            return False
+
         bucket_index = self._hash_function(key) % self.get_capacity()
-        bucket = self._buckets[bucket_index]
+        bucket = self._buckets.get_unchecked(bucket_index)
+        if self._instrumentation is not None:
+            self._instrumentation.record_probe('contains_key', bucket.length())
 
         # Traverse and see if the target key exists
         return bucket.contains(key) is not None
@@ -213,18 +462,38 @@ class HashMap:
 
         :param key: The target key to be removed
         """
+        if self._change_feed is None:
+            self._remove(key)
+            return
+        with self._change_feed.get_lock():
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        """Body of remove, run with the change feed's lock held if the map has a change feed."""
+        if self._bloom is not None and not self._bloom.might_contain(key):
+            return
+
         # Find the hash to the correct bucket
         bucket_index = self._hash_function(key) % self.get_capacity()
-        bucket = self._buckets[bucket_index]
+        bucket = self._buckets.get_unchecked(bucket_index)
+        if self._instrumentation is not None:
+            self._instrumentation.record_probe('remove', bucket.length())
 
         # Determine if the key exists
         node = bucket.contains(key)
 
         # Remove the key if it exists
         if node is not None:
+            if self._snapshots:
+                self._preserve(bucket_index)
             bucket.remove(key)
+            if self._bloom is not None:
+                self._bloom.discard(key)
             # Decrement
             self._size -= 1
+            if self._change_feed is not None:
+                self._change_feed.append(REMOVE, key)
+            self._maybe_shrink()
 
     def get_keys_and_values(self) -> DynamicArray:
         """
@@ -235,13 +504,14 @@ class HashMap:
         """
         # Initialize a new DynamicArray
         new_da = DynamicArray()
+        codec = self._codec
 
         for i in range(self._buckets.length()):
-            bucket = self._buckets[i]
+            bucket = self._buckets.get_unchecked(i)
             # Traverse each linked list
             for node in bucket:
                 # Create a new tuple for each node
-                new_tuple = (node.key, node.value)
+                new_tuple = (node.key, node.value if codec is None else codec.decode(node.value))
                 # Append to new_da
                 new_da.append(new_tuple)
 
@@ -252,12 +522,144 @@ class HashMap:
         Clears the contents of the hash map without changing the underlying capacity of the hash table.
 
         """
-        for i in range(self._buckets.length()):
-            # Reset each bucket to an empty LinkedList
-            self._buckets[i] = LinkedList()
+        if self._change_feed is None:
+            self._clear()
+            return
+        with self._change_feed.get_lock():
+            self._clear()
+
+    def _clear(self) -> None:
+        """Body of clear, run with the change feed's lock held if the map has a change feed."""
+        # Reset each bucket to an empty LinkedList
+        buckets = DynamicArray()
+        buckets.extend(LinkedList() for _ in range(self._buckets.length()))
+        self._buckets = buckets
+        self._snapshots = None
+        if self._bloom is not None:
+            self._bloom.clear()
 
         # Reset the size
         self._size = 0
+        if self._change_feed is not None:
+            self._change_feed.append(CLEAR)
+
+    def iter_items(self):
+        """
+        Generator over the key/value tuples in the hash map. Unlike get_keys_and_values, nothing is materialized, so
+        exports of large maps do not need a second copy of every pair.
+        """
+        codec = self._codec
+        for i in range(self._buckets.length()):
+            bucket = self._buckets.get_unchecked(i)
+            for node in bucket:
+                yield node.key, node.value if codec is None else codec.decode(node.value)
+
+    def iter_keys(self):
+        """
+        Generator over the keys in the hash map.
+        """
+        for i in range(self._buckets.length()):
+            for node in self._buckets.get_unchecked(i):
+                yield node.key
+
+    def iter_values(self):
+        """
+        Generator over the values in the hash map.
+        """
+        codec = self._codec
+        for i in range(self._buckets.length()):
+            for node in self._buckets.get_unchecked(i):
+                yield node.value if codec is None else codec.decode(node.value)
+
+    def scan(self, start_bucket: int = 0, count: int = 10) -> tuple[DynamicArray, int]:
+        """
+        Collects the key/value tuples stored in a range of buckets, so that a large map can be walked in batches.
+        Start with a cursor of 0 and pass each returned cursor back in until 0 is returned again. Every pair is
+        returned exactly once if the capacity does not change during the scan.
+
+        :param start_bucket: The first bucket of the range, 0 to start a new scan
+        :param count:        The number of buckets in the range
+        :return:             A DynamicArray of key/value tuples and the cursor of the next range, 0 when finished
+        :raises ValueError:  If count is less than 1
+        """
+        if count < 1:
+            raise ValueError(f"count must be at least 1, got {count}")
+
+        batch = DynamicArray()
+        end_bucket = min(start_bucket + count, self._buckets.length())
+
+        codec = self._codec
+
+        for i in range(start_bucket, end_bucket):
+            for node in self._buckets.get_unchecked(i):
+                batch.append((node.key, node.value if codec is None else codec.decode(node.value)))
+
+        next_cursor = end_bucket if end_bucket < self._buckets.length() else 0
+        return batch, next_cursor
+
+    def snapshot(self) -> "HashMapSnapshot":
+        """
+        Returns an O(1) read-only snapshot of the hash map. The snapshot shares the bucket array, and a chain is only
+        copied when the hash map writes to it afterward. A resize or clear gives the hash map a new bucket array and
+        leaves snapshots with the old one, which nothing writes to anymore.
+
+        A chain is preserved before it is written, but a read of that chain from another thread that overlaps the
+        write may still see the new contents, so concurrent readers need their own synchronization.
+
+        :return: The snapshot, which supports every reading method of the hash map
+        """
+        return take_snapshot(self, HashMapSnapshot)
+
+    def freeze(self) -> FrozenHashMap:
+        """
+        Returns an immutable copy of the hash map built on a minimal perfect hash, for lookup tables that are only read
+        from now on. The copy can be saved to a file and memory mapped back with FrozenHashMap.load.
+
+        :return: The frozen_map.FrozenHashMap
+        """
+        return FrozenHashMap.from_items(self.iter_items())
+
+    def _preserve(self, index: int) -> None:
+        """
+        Hands a copy of a chain to every snapshot that does not have one yet, before the chain is written.
+
+        :param index: The index of the bucket about to be written
+        """
+        views = [view for view in self._snapshots if not view.is_preserved(index)]
+        if not views:
+            return
+
+        copy = LinkedList()
+        for node in self._buckets.get_unchecked(index):
+            copy.insert(node.key, node.value)
+        for view in views:
+            view.preserve(index, copy)
+
+
+class HashMapSnapshot(HashMap):
+    """
+    Read-only point-in-time view of a HashMap, created by HashMap.snapshot()
+    """
+
+    def put(self, key: str, value: object) -> None:
+        """Snapshots are read-only."""
+        raise SnapshotException("HashMap snapshots are read-only")
+
+    def remove(self, key: str) -> None:
+        """Snapshots are read-only."""
+        raise SnapshotException("HashMap snapshots are read-only")
+
+    def resize_table(self, new_capacity: int) -> None:
+        """Snapshots are read-only."""
+        raise SnapshotException("HashMap snapshots are read-only")
+
+    def clear(self) -> None:
+        """Snapshots are read-only."""
+        raise SnapshotException("HashMap snapshots are read-only")
+
+    def snapshot(self) -> "HashMapSnapshot":
+        """A snapshot never changes, so it is its own snapshot."""
+        return self
 
 
 def find_mode(da: DynamicArray) -> tuple[DynamicArray, int]:
@@ -302,6 +704,11 @@ def find_mode(da: DynamicArray) -> tuple[DynamicArray, int]:
 
 if __name__ == "__main__":
 
+    import random
+    from array import array
+
+    from a6_include import hash_function_bytes_2
+
     print("\nPDF - put example 1")
     print("-------------------")
     m = HashMap(53, hash_function_1)
@@ -499,3 +906,105 @@ if __name__ == "__main__":
         mode, frequency = find_mode(da)
         print(f"Input: {da}\nMode : {mode}, Frequency: {frequency}\n")
 
+    print("\nscan example 1")
+    print("-----------------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(1, 9):
+        m.put(str(i), i * 10)
+    cursor, total = 0, 0
+    while True:
+        batch, cursor = m.scan(cursor, 4)
+        total += batch.length()
+        print(batch, cursor)
+        if cursor == 0:
+            break
+    print(total, sorted(m.iter_keys()) == sorted(key for key, _ in m.iter_items()))
+    try:
+        m.scan(5, 0)
+    except ValueError as error:
+        print(error)
+
+    print("\nsnapshot example 1")
+    print("---------------------")
+    m = HashMap(11, hash_function_1)
+    for i in range(5):
+        m.put('key' + str(i), i)
+    snap = m.snapshot()
+    m.put('key0', 100)
+    m.remove('key1')
+    m.put('key5', 5)
+    print(m.get('key0'), m.get('key1'), m.get_size(), snap.get('key0'), snap.get('key1'), snap.get_size())
+    m.resize_table(50)
+    print(sorted(snap.iter_keys()), snap.contains_key('key5'))
+
+    print("\nadaptive example 1")
+    print("---------------------")
+    # Every permutation of a key collides under hash_function_1
+    m = HashMap(11, hash_function_1, adaptive=True, sample_window=32)
+    anagrams = ['']
+    for letter in 'abcdef':
+        anagrams = [word[:i] + letter + word[i:] for word in anagrams for i in range(len(word) + 1)]
+    for i, key in enumerate(anagrams):
+        m.put(key, i)
+    print(m.get_hash_function().__name__, m.get_size(), m.get_capacity(), m.get('fedcba'))
+
+    print("\nseeded example 1")
+    print("---------------------")
+    m = HashMap(11, hash_function_1, max_chain=8)
+    for i, key in enumerate(anagrams):
+        m.put(key, i)
+    snap = m.snapshot()
+    print(m.get_reseeds(), m.get_seed() is not None, snap.get_seed() == m.get_seed(), m.get('fedcba'))
+
+    print("\nseeded example 2")
+    print("---------------------")
+    # Long chains happen now and then with random keys too, which must not be taken for an attack
+    rng = random.Random(0)
+    m = HashMap(11, hash_function_1, seeded=True, max_chain=3)
+    for i in range(50000):
+        m.put(str(rng.getrandbits(64)), i)
+    print(m.get_size(), m.get_reseeds())
+
+    print("\nbloom example 1")
+    print("---------------------")
+    m = HashMap(11, hash_function_2, bloom_bits_per_key=10)
+    for i in range(1000):
+        m.put('key' + str(i), i)
+    for i in range(0, 1000, 2):
+        m.remove('key' + str(i))
+    print(m.get('key1'), m.get('key2'), m.contains_key('key3'), m.contains_key('missing'), m.get_size())
+
+    print("\nbloom example 2")
+    print("---------------------")
+    m = HashMap(11, hash_function_bytes_2, bloom_bits_per_key=10)
+    m.put(b'bytes', 1)
+    m.put(bytearray(b'bytearray'), 2)
+    m.put(memoryview(bytearray(b'memoryview')), 3)
+    m.put(memoryview(array('i', (1, 2))), 4)
+    print(m.get(bytearray(b'bytes')), m.get(b'bytearray'), m.get(memoryview(b'memoryview')),
+          m.get(memoryview(array('i', (1, 2)))), m.contains_key(bytearray(b'missing')), m.get_size())
+    m.remove(memoryview(b'bytes'))
+    print(m.contains_key(b'bytes'), m.get_size())
+
+    print("\ncodec example 1")
+    print("---------------------")
+    m = HashMap(11, hash_function_2, codec=ValueCodec())
+    for i in range(100):
+        m.put('key' + str(i), {'id': i, 'events': [{'type': 'click', 'ts': j} for j in range(50)]})
+    m.put('small', 'stored as is')
+    print(m.get('key7')['events'][3], m.get('key7') is m.get('key7'), m.get('small'))
+
+    print("\nfreeze example 1")
+    print("---------------------")
+    m = HashMap(11, hash_function_2)
+    for i in range(500):
+        m.put('key' + str(i), i)
+    frozen = m.freeze()
+    m.put('key0', -1)
+    print(frozen.get_size(), frozen.get('key0'), frozen.get('key499'), frozen.contains_key('key500'))
+
+    m = HashMap(11, hash_function_bytes_2)
+    m.put(b'bytes', 1)
+    m.put(memoryview(bytearray(b'memoryview')), 2)
+    frozen = m.freeze()
+    print(frozen.get(bytearray(b'bytes')), frozen.get(b'memoryview'), frozen.contains_key('bytes'))
@@ -0,0 +1,270 @@
+# Name: Zachary Garner
+# Course: CS261 - Data Structures
+# Assignment: HashMap Implementation
+# Description: HashMap for data sets larger than memory. The key space is split by hash into a fixed number of
+# partitions, each one a separate chaining HashMap. Once the resident partitions hold more entries than the memory
+# budget, the least recently used partitions are written to files in a spill directory and dropped from memory, and
+# they are read back transparently the next time one of their keys is accessed.
+
+import os
+import pickle
+import shutil
+import tempfile
+import weakref
+from collections import OrderedDict
+
+import hash_map_sc
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+
+
+class HashMap:
+    def __init__(self,
+                 memory_budget: int = 100000,
+                 partitions: int = 16,
+                 function: callable = hash_function_1,
+                 spill_dir: str = None) -> None:
+        """
+        Initialize new spilling HashMap
+
+        :param memory_budget: Maximum number of entries kept in resident partitions. The most recently used partition
+                              always stays resident, even if it alone exceeds the budget
+        :param partitions:    Number of partitions the key space is split into
+        :param function:      Hash function used both to pick a partition and inside each partition
+        :param spill_dir:     Directory to create the spill files in, defaults to the system temporary directory
+        """
+        self._memory_budget = memory_budget
+        self._hash_function = function
+        self._size = 0
+
+        # Resident partitions are HashMaps, spilled partitions are None
+        self._partitions = DynamicArray.filled(partitions, None)
+        self._partition_sizes = DynamicArray.filled(partitions, 0)
+        self._spilled = DynamicArray.filled(partitions, False)
+
+        # Resident partition indices in least to most recently used order, mapped to whether they changed since
+        # they were last written to disk
+        self._resident = OrderedDict()
+        self._resident_entries = 0
+
+        self._spill_dir = tempfile.mkdtemp(prefix='hash_map_spill_', dir=spill_dir)
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self._spill_dir, True)
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for p in range(self._partitions.length()):
+            state = 'resident' if self._partitions.get_unchecked(p) is not None else 'spilled'
+            out += f"{p}: {state}, {self._partition_sizes.get_unchecked(p)} entries\n"
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_resident_entries(self) -> int:
+        """
+        Return the number of entries currently held in memory
+        """
+        return self._resident_entries
+
+    def get_spilled_partitions(self) -> int:
+        """
+        Return the number of partitions currently on disk
+        """
+        count = 0
+        for p in range(self._partitions.length()):
+            if self._partitions.get_unchecked(p) is None and self._partition_sizes.get_unchecked(p) > 0:
+                count += 1
+        return count
+
+    # ------------------------------------------------------------------ #
+
+    def _path(self, p: int) -> str:
+        """Return the spill file path of a partition."""
+        return os.path.join(self._spill_dir, f'partition_{p}.pickle')
+
+    def _partition(self, p: int):
+        """
+        Returns partition p, reading it back from disk if it was spilled, and marks it as most recently used.
+        """
+        partition = self._partitions.get_unchecked(p)
+        if partition is not None:
+            self._resident.move_to_end(p)
+            return partition
+
+        partition = hash_map_sc.HashMap(max(self._partition_sizes.get_unchecked(p), 11), self._hash_function)
+        if self._spilled.get_unchecked(p):
+            with open(self._path(p), 'rb') as file:
+                for key, value in pickle.load(file):
+                    partition.put(key, value)
+
+        self._partitions.set_unchecked(p, partition)
+        self._resident[p] = False
+        self._resident_entries += partition.get_size()
+        self._enforce_budget()
+        return partition
+
+    def _evict(self, p: int) -> None:
+        """Writes partition p to disk, unless its file is already current, and drops it from memory."""
+        partition = self._partitions.get_unchecked(p)
+        dirty = self._resident.pop(p)
+
+        if partition.get_size() == 0:
+            if self._spilled.get_unchecked(p):
+                os.remove(self._path(p))
+                self._spilled.set_unchecked(p, False)
+        elif dirty or not self._spilled.get_unchecked(p):
+            path = self._path(p)
+            with open(path + '.tmp', 'wb') as file:
+                pickle.dump(list(partition.iter_items()), file, pickle.HIGHEST_PROTOCOL)
+            os.replace(path + '.tmp', path)
+            self._spilled.set_unchecked(p, True)
+
+        self._partitions.set_unchecked(p, None)
+        self._resident_entries -= partition.get_size()
+
+    def _enforce_budget(self) -> None:
+        """Spills least recently used partitions until the resident entries fit the budget."""
+        while self._resident_entries > self._memory_budget and len(self._resident) > 1:
+            self._evict(next(iter(self._resident)))
+
+    def _changed(self, p: int, delta: int) -> None:
+        """Records that partition p was modified and gained or lost delta entries."""
+        self._resident[p] = True
+        if delta:
+            self._partition_sizes.set_unchecked(p, self._partition_sizes.get_unchecked(p) + delta)
+            self._resident_entries += delta
+            self._size += delta
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair in the hash map, reading the key's partition back from disk if necessary.
+
+        :param key:   The target key
+        :param value: The given value that is to be added
+        """
+        p = self._hash_function(key) % self._partitions.length()
+        partition = self._partition(p)
+
+        size = partition.get_size()
+        partition.put(key, value)
+        self._changed(p, partition.get_size() - size)
+        self._enforce_budget()
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, if the key is not found, it returns None.
+
+        :param key: The given key that is associated with the value to be found
+        :return:    The value at the given key or None if the key was not found
+        """
+        p = self._hash_function(key) % self._partitions.length()
+        if self._partition_sizes.get_unchecked(p) == 0:
+            return None
+        return self._partition(p).get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Checks if the provided key is in the hash map.
+
+        :param key: The target key being searched for
+        :return:    True if the key exists, False if it does not
+        """
+        p = self._hash_function(key) % self._partitions.length()
+        if self._partition_sizes.get_unchecked(p) == 0:
+            return False
+        return self._partition(p).contains_key(key)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value.
+
+        :param key: The target key to be removed
+        """
+        p = self._hash_function(key) % self._partitions.length()
+        if self._partition_sizes.get_unchecked(p) == 0:
+            return
+
+        partition = self._partition(p)
+        size = partition.get_size()
+        partition.remove(key)
+        if partition.get_size() != size:
+            self._changed(p, partition.get_size() - size)
+
+    def iter_items(self):
+        """
+        Generator over the key/value tuples in the hash map, one partition at a time. Spilled partitions are read
+        straight from their files without being made resident, so iterating does not disturb the memory budget.
+        """
+        for p in range(self._partitions.length()):
+            partition = self._partitions.get_unchecked(p)
+            if partition is not None:
+                yield from partition.iter_items()
+            elif self._partition_sizes.get_unchecked(p) > 0:
+                with open(self._path(p), 'rb') as file:
+                    yield from pickle.load(file)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Creates a new DynamicArray where each index is a tuple that contains the key/value pair that's stored in the
+        hash map.
+
+        :return: The newly created DynamicArray
+        """
+        new_da = DynamicArray()
+        new_da.extend(self.iter_items())
+        return new_da
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hash map and deletes every spill file.
+        """
+        for p in range(self._partitions.length()):
+            if self._spilled.get_unchecked(p):
+                os.remove(self._path(p))
+        partitions = self._partitions.length()
+        self._partitions = DynamicArray.filled(partitions, None)
+        self._partition_sizes = DynamicArray.filled(partitions, 0)
+        self._spilled = DynamicArray.filled(partitions, False)
+        self._resident = OrderedDict()
+        self._resident_entries = 0
+        self._size = 0
+
+    def close(self) -> None:
+        """
+        Deletes the spill directory. The map must not be used afterward.
+        """
+        self._finalizer()
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+
+if __name__ == "__main__":
+
+    print("\nSpill - put example 1")
+    print("---------------------")
+    m = HashMap(memory_budget=200, partitions=8, function=hash_function_2)
+    for i in range(1000):
+        m.put('key' + str(i), i)
+    print(m.get_size(), m.get_resident_entries() <= 200, m.get_spilled_partitions())
+
+    result = True
+    for i in range(0, 1000, 7):
+        result &= m.get('key' + str(i)) == i
+        result &= not m.contains_key('key' + str(i + 1000))
+    print(result, m.get_resident_entries() <= 200)
+
+    for i in range(0, 1000, 2):
+        m.remove('key' + str(i))
+    print(m.get_size(), m.get_keys_and_values().length(), sorted(m.iter_items())[:3])
+
+    m.clear()
+    print(m.get_size(), m.get_spilled_partitions())
+    m.close()
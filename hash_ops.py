@@ -0,0 +1,203 @@
+# Name: Zachary Garner
+# Course: CS261 - Data Structures
+# Assignment: HashMap Implementation
+# Description: Relational operators that use a HashMap as their build side. hash_join builds a map from the left
+# input and streams the right input past it, falling back to a partitioned (grace) join that spills both inputs to
+# temporary files when the build side exceeds a memory budget. group_by folds an input into one aggregate per key.
+
+import pickle
+import tempfile
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import DynamicArray, hash_function_2
+
+# Marks the end of the left input, since None may be a valid row
+_END = object()
+
+
+def _build(rows, key: callable, function: callable, map_class: type, limit: int = None):
+    """
+    Builds a map from key to a DynamicArray of rows.
+
+    :return: The map and the number of rows consumed. If limit is given, building stops after limit rows so the
+             caller can decide to spill the rest.
+    """
+    build = map_class(11, function)
+    count = 0
+
+    for row in rows:
+        k = key(row)
+        matches = build.get(k)
+        if matches is None:
+            matches = DynamicArray()
+            build.put(k, matches)
+        matches.append(row)
+        count += 1
+        if limit is not None and count >= limit:
+            break
+
+    return build, count
+
+
+def _probe(build, rows, key: callable):
+    """Streams rows past a built map, yielding a (left_row, right_row) tuple for every match."""
+    for row in rows:
+        matches = build.get(key(row))
+        if matches is not None:
+            for i in range(matches.length()):
+                yield matches.get_unchecked(i), row
+
+
+def _spill(rows, key: callable, function: callable, partitions: DynamicArray) -> None:
+    """Appends every row to the temporary file of the partition its key hashes to."""
+    count = partitions.length()
+    for row in rows:
+        pickle.dump(row, partitions.get_unchecked(function(key(row)) % count), pickle.HIGHEST_PROTOCOL)
+
+
+def _read_partition(file):
+    """Generator over the rows previously spilled to a partition file."""
+    file.seek(0)
+    while True:
+        try:
+            yield pickle.load(file)
+        except EOFError:
+            return
+
+
+def _open_partitions(count: int, tmp_dir: str) -> DynamicArray:
+    """Creates count temporary files, deleted automatically once closed."""
+    files = DynamicArray()
+    for _ in range(count):
+        files.append(tempfile.TemporaryFile(dir=tmp_dir))
+    return files
+
+
+def _close_partitions(files: DynamicArray) -> None:
+    """Closes, and thereby deletes, every partition file."""
+    for i in range(files.length()):
+        files.get_unchecked(i).close()
+
+
+def hash_join(left,
+              right,
+              key: callable,
+              right_key: callable = None,
+              function: callable = hash_function_2,
+              map_class: type = hash_map_sc.HashMap,
+              memory_budget: int = None,
+              partitions: int = 16,
+              tmp_dir: str = None):
+    """
+    Inner equi-join of two iterables. The left input is the build side and is loaded into a HashMap, the right input
+    is the probe side and is streamed, so only the build side has to fit in memory.
+
+    If the left input has more than memory_budget rows, the rows read so far and the rest of both inputs are spilled
+    by key hash into partitions temporary files, and each pair of partitions is then joined on its own. A single
+    partition that is still larger than the budget is joined in memory anyway.
+
+    :param left:          The build side rows
+    :param right:         The probe side rows
+    :param key:           Function returning the join key of a left row, or of both sides if right_key is None
+    :param right_key:     Function returning the join key of a right row
+    :param function:      Hash function for the join keys
+    :param map_class:     The HashMap class used for the build side
+    :param memory_budget: Maximum number of build side rows held in memory, or None for no limit
+    :param partitions:    Number of partitions used when spilling
+    :param tmp_dir:       Directory for the partition files, defaults to the system temporary directory
+    :return:              A generator of (left_row, right_row) tuples
+    """
+    if right_key is None:
+        right_key = key
+
+    left = iter(left)
+    build, count = _build(left, key, function, map_class, memory_budget)
+
+    # Everything fit within the budget, or the budget was hit by the very last row
+    if memory_budget is None or count < memory_budget:
+        yield from _probe(build, right, right_key)
+        return
+
+    overflow = next(left, _END)
+    if overflow is _END:
+        yield from _probe(build, right, right_key)
+        return
+
+    left_files = _open_partitions(partitions, tmp_dir)
+    right_files = _open_partitions(partitions, tmp_dir)
+    try:
+        # Spill the rows already built, the row used to detect overflow, and the rest of the left input
+        for _, matches in build.iter_items():
+            _spill((matches.get_unchecked(i) for i in range(matches.length())), key, function, left_files)
+        del build
+        _spill((overflow,), key, function, left_files)
+        _spill(left, key, function, left_files)
+        _spill(right, right_key, function, right_files)
+
+        for p in range(partitions):
+            partition, _ = _build(_read_partition(left_files.get_unchecked(p)), key, function, map_class)
+            yield from _probe(partition, _read_partition(right_files.get_unchecked(p)), right_key)
+    finally:
+        _close_partitions(left_files)
+        _close_partitions(right_files)
+
+
+def group_by(iterable,
+             key: callable,
+             agg: callable = None,
+             initial: object = None,
+             function: callable = hash_function_2,
+             map_class: type = hash_map_sc.HashMap):
+    """
+    Groups the items of an iterable by key and folds each group into an aggregate, in a single streaming pass.
+
+    :param iterable:  The items to group
+    :param key:       Function returning the group key of an item
+    :param agg:       Function (aggregate, item) -> new aggregate, or None to collect each group in a DynamicArray
+    :param initial:   The aggregate of an empty group, passed to agg with the first item. It is shared by every group,
+                      so it should be immutable
+    :param function:  Hash function for the group keys
+    :param map_class: The HashMap class holding the groups
+    :return:          A HashMap from group key to aggregate
+    """
+    if agg is None:
+        groups, _ = _build(iterable, key, function, map_class)
+        return groups
+
+    groups = map_class(11, function)
+    for item in iterable:
+        k = key(item)
+        current = groups.get(k)
+        if current is None and not groups.contains_key(k):
+            current = initial
+        groups.put(k, agg(current, item))
+
+    return groups
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+
+if __name__ == "__main__":
+
+    users = [('u' + str(i), 'name' + str(i)) for i in range(10)]
+    orders = [('o' + str(i), 'u' + str(i % 4), i * 10) for i in range(12)]
+
+    print("\nhash_join example 1")
+    print("-------------------")
+    joined = sorted(hash_join(users, orders, key=lambda row: row[0], right_key=lambda row: row[1]))
+    print(len(joined), joined[:3])
+
+    print("\nhash_join - grace example 1")
+    print("---------------------------")
+    spilled = sorted(hash_join(users, orders, key=lambda row: row[0], right_key=lambda row: row[1],
+                               map_class=hash_map_oa.HashMap, memory_budget=3, partitions=4))
+    print(spilled == joined)
+
+    print("\ngroup_by example 1")
+    print("------------------")
+    totals = group_by(orders, key=lambda row: row[1], agg=lambda total, row: total + row[2], initial=0)
+    print(sorted(totals.iter_items()))
+    groups = group_by(orders, key=lambda row: row[1])
+    print(groups.get('u1'))
@@ -0,0 +1,277 @@
+# Name: Zachary Garner
+# Course: CS261 - Data Structures
+# Assignment: HashMap Implementation
+# Description: Set and multiset (Counter) types built directly on either HashMap implementation. A HashSet stores
+# None as every value, and set algebra iterates the smaller operand wherever the result allows it.
+
+from heapq import nlargest
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import DynamicArray, hash_function_1, hash_function_2
+
+
+def _iterate(values):
+    """Return an iterator over an iterable, or over the elements of a DynamicArray, which does not support iter()."""
+    if isinstance(values, DynamicArray):
+        return (values.get_unchecked(i) for i in range(values.length()))
+    return iter(values)
+
+
+class HashSet:
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 map_class: type = hash_map_sc.HashMap) -> None:
+        """
+        Initialize a new empty set on top of a HashMap class from hash_map_sc or hash_map_oa.
+
+        :param capacity:  Initial capacity of the underlying hash map
+        :param function:  Hash function of the underlying hash map
+        :param map_class: The HashMap class that stores the members
+        """
+        self._map = map_class(capacity, function)
+        self._function = function
+        self._map_class = map_class
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        return 'SET {' + ', '.join(str(key) for key in self) + '}'
+
+    def __iter__(self):
+        """Iterate over the members of the set."""
+        return self._map.iter_keys()
+
+    def _new_set(self, capacity: int) -> "HashSet":
+        """Return an empty set using the same hash function and map class."""
+        return HashSet(max(capacity, 11), self._function, self._map_class)
+
+    def get_size(self) -> int:
+        """Return the number of members."""
+        return self._map.get_size()
+
+    # ------------------------------------------------------------------ #
+
+    def add(self, key: str) -> bool:
+        """
+        Adds a member to the set.
+
+        :param key: The member to add
+        :return:    True if the member was added, False if it was already present
+        """
+        size = self._map.get_size()
+        self._map.put(key, None)
+        return self._map.get_size() != size
+
+    def add_all(self, keys) -> int:
+        """
+        Adds every member of an iterable, another HashSet or a DynamicArray.
+
+        :param keys: The members to add
+        :return:     The number of members that were not already present
+        """
+        size = self._map.get_size()
+        for key in _iterate(keys):
+            self._map.put(key, None)
+        return self._map.get_size() - size
+
+    def contains(self, key: str) -> bool:
+        """
+        Checks if the provided key is a member of the set.
+
+        :param key: The target key being searched for
+        :return:    True if the key is a member, False if it is not
+        """
+        return self._map.contains_key(key)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes a member from the set, if it is present.
+
+        :param key: The member to remove
+        """
+        self._map.remove(key)
+
+    def clear(self) -> None:
+        """
+        Removes every member from the set.
+        """
+        self._map.clear()
+
+    def union(self, other: "HashSet") -> "HashSet":
+        """
+        Returns a new set with the members of both sets. The larger set is copied and the smaller one added to it.
+
+        :param other: The other set
+        """
+        larger, smaller = (self, other) if self.get_size() >= other.get_size() else (other, self)
+        result = self._new_set(larger.get_size() + smaller.get_size())
+        result.add_all(larger)
+        result.add_all(smaller)
+        return result
+
+    def intersection(self, other: "HashSet") -> "HashSet":
+        """
+        Returns a new set with the members found in both sets. Only the smaller set is iterated.
+
+        :param other: The other set
+        """
+        larger, smaller = (self, other) if self.get_size() >= other.get_size() else (other, self)
+        result = self._new_set(smaller.get_size())
+        for key in smaller:
+            if larger.contains(key):
+                result._map.put(key, None)
+        return result
+
+    def difference(self, other: "HashSet") -> "HashSet":
+        """
+        Returns a new set with the members of this set that are not in the other set.
+
+        :param other: The other set
+        """
+        result = self._new_set(self.get_size())
+        for key in self:
+            if not other.contains(key):
+                result._map.put(key, None)
+        return result
+
+    def is_subset(self, other: "HashSet") -> bool:
+        """
+        Checks if every member of this set is also a member of the other set.
+
+        :param other: The other set
+        """
+        if self.get_size() > other.get_size():
+            return False
+        for key in self:
+            if not other.contains(key):
+                return False
+        return True
+
+
+class Counter:
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 map_class: type = hash_map_sc.HashMap) -> None:
+        """
+        Initialize a new empty multiset on top of a HashMap class from hash_map_sc or hash_map_oa.
+
+        :param capacity:  Initial capacity of the underlying hash map
+        :param function:  Hash function of the underlying hash map
+        :param map_class: The HashMap class that stores the counts
+        """
+        self._map = map_class(capacity, function)
+        self._total = 0
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        return 'COUNTER {' + ', '.join(f'{key}: {count}' for key, count in self.items()) + '}'
+
+    def __iter__(self):
+        """Iterate over the distinct members."""
+        return self._map.iter_keys()
+
+    def items(self):
+        """Iterate over the (member, count) pairs."""
+        return self._map.iter_items()
+
+    def get_size(self) -> int:
+        """Return the number of distinct members."""
+        return self._map.get_size()
+
+    def total(self) -> int:
+        """Return the sum of all counts."""
+        return self._total
+
+    # ------------------------------------------------------------------ #
+
+    def increment(self, key: str, count: int = 1) -> int:
+        """
+        Adds count occurrences of a member. A member whose count drops to zero or below is removed.
+
+        :param key:   The member to count
+        :param count: The number of occurrences to add, may be negative
+        :return:      The new count of the member
+        """
+        current = self._map.get(key)
+        new_count = count if current is None else current + count
+
+        if new_count > 0:
+            self._map.put(key, new_count)
+        elif current is not None:
+            self._map.remove(key)
+
+        self._total += max(new_count, 0) - (current or 0)
+        return max(new_count, 0)
+
+    def update(self, keys) -> None:
+        """
+        Counts one occurrence of every member of an iterable or DynamicArray.
+
+        :param keys: The members to count
+        """
+        for key in _iterate(keys):
+            self.increment(key)
+
+    def get(self, key: str) -> int:
+        """
+        Returns the count of a member.
+
+        :param key: The member to look up
+        :return:    Its count, 0 if it is not present
+        """
+        count = self._map.get(key)
+        return 0 if count is None else count
+
+    def remove(self, key: str) -> None:
+        """
+        Removes every occurrence of a member.
+
+        :param key: The member to remove
+        """
+        self._total -= self.get(key)
+        self._map.remove(key)
+
+    def clear(self) -> None:
+        """
+        Removes every member.
+        """
+        self._map.clear()
+        self._total = 0
+
+    def most_common(self, n: int = None) -> DynamicArray:
+        """
+        Returns the n members with the highest counts, most common first. Ties keep no particular order.
+
+        :param n: The number of members to return, or None for all of them
+        :return:  A DynamicArray of (member, count) tuples
+        """
+        if n is None:
+            pairs = sorted(self.items(), key=lambda pair: pair[1], reverse=True)
+        else:
+            pairs = nlargest(n, self.items(), key=lambda pair: pair[1])
+        return DynamicArray(pairs)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+
+if __name__ == "__main__":
+
+    print("\nHashSet - algebra example 1")
+    print("---------------------------")
+    a = HashSet(function=hash_function_2)
+    b = HashSet(function=hash_function_2, map_class=hash_map_oa.HashMap)
+    print(a.add_all(['apple', 'grape', 'melon', 'apple']), a.add('peach'), a.add('grape'))
+    b.add_all(DynamicArray(['grape', 'kiwi', 'peach']))
+    print(sorted(a.union(b)), sorted(a.intersection(b)), sorted(a.difference(b)))
+    print(a.intersection(b).is_subset(a), a.is_subset(b))
+
+    print("\nCounter - most_common example 1")
+    print("-------------------------------")
+    c = Counter(map_class=hash_map_oa.HashMap, function=hash_function_2)
+    c.update(DynamicArray(["2", "4", "2", "6", "8", "4", "1", "3", "4", "5", "7", "3", "3", "2"]))
+    print(c.most_common(3), c.get('4'), c.get('9'), c.get_size(), c.total())
+    c.increment('4', -3)
+    print(c.get('4'), c.get_size(), c.total())
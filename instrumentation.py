@@ -0,0 +1,204 @@
+# Name: Zachary Garner
+# Course: CS261 - Data Structures
+# Assignment: HashMap Implementation
+# Description: Opt-in instrumentation for both HashMap implementations. Once attached to a map, it counts and times
+# put/get/contains_key/remove calls, records resize events and probe or chain length samples, and forwards every
+# event to subscribed callbacks. A map without instrumentation only pays for an `is not None` check on each hook.
+
+import time
+from collections import deque
+
+
+class ResizeEvent:
+    """
+    Record of a single resize_table call
+    """
+
+    def __init__(self, old_capacity: int, new_capacity: int, duration: float, entries_moved: int) -> None:
+        """Initialize the event given both capacities, the time taken and the number of rehashed entries."""
+        self.old_capacity = old_capacity
+        self.new_capacity = new_capacity
+        self.duration = duration
+        self.entries_moved = entries_moved
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        return (f"resize {self.old_capacity} -> {self.new_capacity}: "
+                f"{self.entries_moved} entries in {self.duration:.6f}s")
+
+
+class Instrumentation:
+    """
+    Collects operation counters and timers, resize events and probe length samples for one or more maps.
+
+    Subscribed callbacks are called as callback(kind, name, payload) where kind is one of:
+    'operation' - name is the method name and payload its duration in seconds
+    'probe'     - name is the method name and payload the probe sequence or chain length
+    'resize'    - name is 'resize_table' and payload a ResizeEvent
+    """
+
+    OPERATIONS = ('put', 'get', 'contains_key', 'remove')
+
+    def __init__(self, max_samples: int = 1024, clock: callable = time.perf_counter) -> None:
+        """
+        Initialize an empty instrumentation layer.
+
+        :param max_samples: Number of most recent probe length samples kept
+        :param clock:       Function returning the current time in seconds
+        """
+        self.clock = clock
+        self._counters = {}
+        self._timers = {}
+        self._probe_samples = deque(maxlen=max_samples)
+        self._probe_histogram = {}
+        self._resize_events = []
+        self._subscribers = []
+
+    def subscribe(self, callback: callable) -> None:
+        """Register a callback that receives every recorded event."""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: callable) -> None:
+        """Remove a previously registered callback."""
+        self._subscribers.remove(callback)
+
+    def _publish(self, kind: str, name: str, payload: object) -> None:
+        """Forward an event to every subscriber."""
+        for callback in self._subscribers:
+            callback(kind, name, payload)
+
+    # ------------------------------------------------------------------ #
+
+    def attach(self, hash_map) -> None:
+        """
+        Start instrumenting a map. The public operations are shadowed on the instance by timed wrappers, so the
+        class methods, and every map that is not instrumented, run unchanged.
+
+        :param hash_map: A HashMap from hash_map_sc or hash_map_oa
+        """
+        hash_map._instrumentation = self
+        for name in self.OPERATIONS:
+            setattr(hash_map, name, self._timed(name, getattr(type(hash_map), name).__get__(hash_map)))
+
+    def detach(self, hash_map) -> None:
+        """
+        Stop instrumenting a map and restore its original methods.
+
+        :param hash_map: A map previously passed to attach
+        """
+        hash_map._instrumentation = None
+        for name in self.OPERATIONS:
+            hash_map.__dict__.pop(name, None)
+
+    def _timed(self, name: str, method: callable) -> callable:
+        """Wrap a bound method so that each call is counted and timed."""
+        clock = self.clock
+
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record_operation(name, clock() - start)
+
+        wrapper.__name__ = name
+        wrapper.__doc__ = method.__doc__
+        return wrapper
+
+    def record_operation(self, name: str, duration: float) -> None:
+        """Count one call of an operation and add its duration to the operation's timer."""
+        self._counters[name] = self._counters.get(name, 0) + 1
+        self._timers[name] = self._timers.get(name, 0.0) + duration
+        if self._subscribers:
+            self._publish('operation', name, duration)
+
+    def record_probe(self, name: str, length: int) -> None:
+        """Record the probe sequence or chain length seen by one operation."""
+        self._probe_samples.append(length)
+        self._probe_histogram[length] = self._probe_histogram.get(length, 0) + 1
+        if self._subscribers:
+            self._publish('probe', name, length)
+
+    def record_resize(self, old_capacity: int, new_capacity: int, duration: float, entries_moved: int) -> None:
+        """Record one resize_table call."""
+        event = ResizeEvent(old_capacity, new_capacity, duration, entries_moved)
+        self._resize_events.append(event)
+        if self._subscribers:
+            self._publish('resize', 'resize_table', event)
+
+    # ------------------------------------------------------------------ #
+
+    def get_count(self, name: str) -> int:
+        """Return how many times an operation was called."""
+        return self._counters.get(name, 0)
+
+    def get_total_time(self, name: str) -> float:
+        """Return the total time spent in an operation, in seconds."""
+        return self._timers.get(name, 0.0)
+
+    def get_mean_time(self, name: str) -> float:
+        """Return the mean duration of an operation, in seconds, or 0.0 if it was never called."""
+        count = self.get_count(name)
+        return self.get_total_time(name) / count if count else 0.0
+
+    def get_probe_samples(self) -> list:
+        """Return the most recent probe or chain length samples, oldest first."""
+        return list(self._probe_samples)
+
+    def get_probe_histogram(self) -> dict:
+        """Return a mapping from probe or chain length to the number of operations that saw it."""
+        return dict(self._probe_histogram)
+
+    def get_resize_events(self) -> list:
+        """Return every recorded ResizeEvent, oldest first."""
+        return list(self._resize_events)
+
+    def reset(self) -> None:
+        """Discard everything recorded so far. Subscribers stay registered."""
+        self._counters.clear()
+        self._timers.clear()
+        self._probe_samples.clear()
+        self._probe_histogram.clear()
+        self._resize_events.clear()
+
+    def report(self) -> dict:
+        """Return a summary of the counters, timers, probe histogram and resizes, e.g. for a metrics exporter."""
+        return {
+            'operations': {name: {'count': self._counters[name],
+                                  'total_time': self._timers[name],
+                                  'mean_time': self.get_mean_time(name)} for name in self._counters},
+            'probe_histogram': self.get_probe_histogram(),
+            'resizes': [(event.old_capacity, event.new_capacity, event.duration, event.entries_moved)
+                        for event in self._resize_events],
+        }
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+
+if __name__ == "__main__":
+
+    import hash_map_oa
+    import hash_map_sc
+    from a6_include import hash_function_1
+
+    for map_class in (hash_map_sc.HashMap, hash_map_oa.HashMap):
+        print(f"\n{map_class.__module__} - instrumentation example 1")
+        print("-------------------------------------------")
+        inst = Instrumentation()
+        resizes = []
+        inst.subscribe(lambda kind, name, payload: resizes.append(str(payload)) if kind == 'resize' else None)
+
+        m = map_class(11, hash_function_1)
+        inst.attach(m)
+        for i in range(100):
+            m.put('key' + str(i), i)
+        for i in range(150):
+            m.get('key' + str(i))
+        m.remove('key1')
+        print(inst.get_count('put'), inst.get_count('get'), inst.get_count('remove'), len(resizes))
+        print(sorted(inst.get_probe_histogram().items())[:5])
+
+        inst.detach(m)
+        m.put('other', 1)
+        print(inst.get_count('put'), 'put' in m.__dict__)
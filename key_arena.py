@@ -0,0 +1,157 @@
+# Name: Zachary Garner
+# Course: CS261 - Data Structures
+# Assignment: HashMap Implementation
+# Description: Arena of keys for bulk loading binary data into either HashMap. All keys are read-only memoryview
+# slices of one backing buffer, such as a memory mapped file, so each key is only an offset and a length into that
+# buffer rather than a separately decoded and allocated string. Use the maps with hash_function_bytes_1 or
+# hash_function_bytes_2 from a6_include, which hash the buffer contents directly.
+
+import mmap
+import os
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import hash_function_bytes_1, hash_function_bytes_2
+
+
+class KeyArena:
+    def __init__(self, buffer) -> None:
+        """
+        Initialize an arena over a bytes-like buffer. The buffer must not change while keys from it are in use.
+
+        :param buffer: A bytes, bytearray or mmap object holding the keys
+        """
+        self._buffer = buffer
+        self._view = memoryview(buffer).toreadonly()
+        self._file = None
+
+    @classmethod
+    def from_file(cls, path: str) -> "KeyArena":
+        """
+        Create an arena over a read-only memory map of a file, so keys are never copied out of the page cache. An empty
+        file cannot be memory mapped, so it gives an empty arena.
+
+        :param path: The path of the file
+        """
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return cls(b'')
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        arena = cls(mapping)
+        arena._file = mapping
+        return arena
+
+    def close(self) -> None:
+        """
+        Release the arena's view of the buffer and close the memory map created by from_file. Keys taken from the
+        arena keep the memory map open until they are released as well.
+        """
+        self._view.release()
+        if self._file is not None:
+            try:
+                self._file.close()
+            except BufferError:
+                pass
+
+    def length(self) -> int:
+        """Return the size of the backing buffer in bytes."""
+        return len(self._view)
+
+    def key(self, offset: int, length: int) -> memoryview:
+        """
+        Return the key stored at a given offset and length, as a zero-copy slice of the backing buffer.
+
+        :param offset: The position of the first byte of the key
+        :param length: The number of bytes in the key
+        """
+        return self._view[offset:offset + length]
+
+    def spans(self, separator: bytes = b'\n'):
+        """
+        Generator over the (offset, length) of every non-empty record in the buffer, records being delimited by
+        separator. The buffer is searched directly, nothing is decoded.
+
+        :param separator: The byte string between records
+        """
+        buffer = self._buffer
+        offset = 0
+        end = len(self._view)
+
+        while offset < end:
+            position = buffer.find(separator, offset)
+            if position == -1:
+                position = end
+            if position > offset:
+                yield offset, position - offset
+            offset = position + len(separator)
+
+    def keys(self, separator: bytes = b'\n'):
+        """
+        Generator over every non-empty record in the buffer as a zero-copy key.
+
+        :param separator: The byte string between records
+        """
+        view = self._view
+        for offset, length in self.spans(separator):
+            yield view[offset:offset + length]
+
+    def load(self, hash_map, spans, values=None) -> int:
+        """
+        Puts the key at each (offset, length) span into a hash map.
+
+        :param hash_map: A HashMap created with a bytes hash function
+        :param spans:    An iterable of (offset, length) pairs, e.g. from spans()
+        :param values:   An iterable of values matching spans, or None to store None for every key
+        :return:         The number of spans put into the hash map
+        """
+        view = self._view
+        count = 0
+
+        if values is None:
+            for offset, length in spans:
+                hash_map.put(view[offset:offset + length], None)
+                count += 1
+        else:
+            for (offset, length), value in zip(spans, values):
+                hash_map.put(view[offset:offset + length], value)
+                count += 1
+
+        return count
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+
+if __name__ == "__main__":
+
+    import tempfile
+
+    print("\nArena - bytes keys example 1")
+    print("----------------------------")
+    m = hash_map_sc.HashMap(11, hash_function_bytes_1)
+    m.put(b'key1', 10)
+    m.put(bytearray(b'key2'), 20)
+    m.put(memoryview(b'key1'), 30)
+    print(m.get_size(), m.get(b'key1'), m.get(memoryview(b'key2')), m.contains_key(b'key3'))
+
+    print("\nArena - load example 1")
+    print("----------------------")
+    arena = KeyArena(b'apple\ngrape\n\nmelon\napple\npeach')
+    m = hash_map_oa.HashMap(11, hash_function_bytes_2)
+    print(arena.load(m, arena.spans(), range(5)), m.get_size())
+    print(m.get(b'apple'), m.get(b'melon'), m.get(b'peach'), m.get(b'kiwi'))
+    print([bytes(key) for key in arena.keys()])
+
+    print("\nArena - file example 1")
+    print("----------------------")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'keys')
+        with open(path, 'wb') as file:
+            file.write(b'fig\nlime')
+        arena = KeyArena.from_file(path)
+        print(arena.length(), [bytes(key) for key in arena.keys()])
+        arena.close()
+        open(path, 'wb').close()
+        arena = KeyArena.from_file(path)
+        print(arena.length(), list(arena.keys()))
+        arena.close()
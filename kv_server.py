@@ -0,0 +1,683 @@
+# Name: Zachary Garner
+# Course: CS261 - Data Structures
+# Assignment: HashMap Implementation
+# Description: Network key-value server exposing one HashMap to many clients over TCP, and the matching client with a
+# connection pool. The server runs on asyncio and answers every complete request in its input buffer before writing
+# the replies back in one go, so clients get their throughput from pipelining and from the multi-key commands rather
+# than from one round trip per key.
+#
+# Protocol: every request and reply is a frame of a little-endian 32-bit payload length followed by the payload. A
+# request payload is an opcode byte and the opcode's arguments, and a reply payload is a status byte and one value.
+# Replies are sent in the order the requests arrived. Values are tagged, so only None, bool, int, float, str, bytes
+# and lists of these travel over the network, and nothing received is ever unpickled.
+
+import asyncio
+import struct
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import hash_function_2
+
+_FRAME = struct.Struct('<I')
+_LENGTH = struct.Struct('<I')
+_INT = struct.Struct('<q')
+_FLOAT = struct.Struct('<d')
+
+# Largest frame either side accepts, which keeps a bad length prefix from allocating unbounded memory
+MAX_FRAME = 64 * 1024 * 1024
+
+# Request opcodes
+GET = 1
+PUT = 2
+REMOVE = 3
+CONTAINS = 4
+MGET = 5
+MPUT = 6
+MREMOVE = 7
+SIZE = 8
+CLEAR = 9
+
+# Name and number of arguments of each request
+_REQUESTS = {
+    GET: ('GET', 1),
+    PUT: ('PUT', 2),
+    REMOVE: ('REMOVE', 1),
+    CONTAINS: ('CONTAINS', 1),
+    MGET: ('MGET', 1),
+    MPUT: ('MPUT', 1),
+    MREMOVE: ('MREMOVE', 1),
+    SIZE: ('SIZE', 0),
+    CLEAR: ('CLEAR', 0),
+}
+
+# Reply status
+_OK = 0
+_ERROR = 1
+
+# Value tags
+_NONE = 0
+_FALSE = 1
+_TRUE = 2
+_SMALL_INT = 3
+_BIG_INT = 4
+_FLOAT_TAG = 5
+_STR = 6
+_BYTES = 7
+_LIST = 8
+
+
+class ProtocolError(Exception):
+    """Raised for a malformed frame or request, or an error reported by the server."""
+    pass
+
+
+class ServerError(ProtocolError):
+    """Raised by a client when the server answered a request with an error, after every reply has been read."""
+    pass
+
+
+# ------------------------------------------------------------------ #
+
+
+def _encode_bytes(out: bytearray, data: bytes) -> None:
+    """Appends length-prefixed bytes."""
+    out += _LENGTH.pack(len(data))
+    out += data
+
+
+def encode_value(out: bytearray, value: object) -> None:
+    """
+    Appends a tagged value to out.
+
+    :param out:   Buffer being built
+    :param value: None, bool, int, float, str, bytes, or a list or tuple of these
+    """
+    if value is None:
+        out.append(_NONE)
+    elif value is True:
+        out.append(_TRUE)
+    elif value is False:
+        out.append(_FALSE)
+    elif isinstance(value, int):
+        if -2 ** 63 <= value < 2 ** 63:
+            out.append(_SMALL_INT)
+            out += _INT.pack(value)
+        else:
+            out.append(_BIG_INT)
+            _encode_bytes(out, str(value).encode('ascii'))
+    elif isinstance(value, float):
+        out.append(_FLOAT_TAG)
+        out += _FLOAT.pack(value)
+    elif isinstance(value, str):
+        out.append(_STR)
+        _encode_bytes(out, value.encode('utf-8', 'surrogatepass'))
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        out.append(_BYTES)
+        _encode_bytes(out, bytes(value))
+    elif isinstance(value, (list, tuple)):
+        out.append(_LIST)
+        out += _LENGTH.pack(len(value))
+        for item in value:
+            encode_value(out, item)
+    else:
+        raise TypeError(f"cannot send a value of type {type(value).__name__}")
+
+
+def _decode_bytes(data: memoryview, offset: int):
+    """Returns length-prefixed bytes starting at offset, and the offset after them."""
+    if offset + _LENGTH.size > len(data):
+        raise ProtocolError("truncated length")
+    length, = _LENGTH.unpack_from(data, offset)
+    offset += _LENGTH.size
+    if offset + length > len(data):
+        raise ProtocolError("truncated bytes")
+    return bytes(data[offset:offset + length]), offset + length
+
+
+def decode_value(data: memoryview, offset: int):
+    """
+    Decodes the tagged value starting at offset.
+
+    :return: The value and the offset after it
+    """
+    if offset >= len(data):
+        raise ProtocolError("truncated value")
+    tag = data[offset]
+    offset += 1
+
+    if tag == _NONE:
+        return None, offset
+    if tag == _TRUE:
+        return True, offset
+    if tag == _FALSE:
+        return False, offset
+    if tag == _SMALL_INT or tag == _FLOAT_TAG:
+        codec = _INT if tag == _SMALL_INT else _FLOAT
+        if offset + codec.size > len(data):
+            raise ProtocolError("truncated number")
+        return codec.unpack_from(data, offset)[0], offset + codec.size
+    if tag == _BIG_INT:
+        digits, offset = _decode_bytes(data, offset)
+        return int(digits), offset
+    if tag == _STR:
+        text, offset = _decode_bytes(data, offset)
+        return text.decode('utf-8', 'surrogatepass'), offset
+    if tag == _BYTES:
+        return _decode_bytes(data, offset)
+    if tag == _LIST:
+        if offset + _LENGTH.size > len(data):
+            raise ProtocolError("truncated list")
+        count, = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        items = []
+        for _ in range(count):
+            item, offset = decode_value(data, offset)
+            items.append(item)
+        return items, offset
+    raise ProtocolError(f"unknown value tag {tag}")
+
+
+def encode_request(out: bytearray, opcode: int, *args) -> None:
+    """
+    Appends one request frame to out. Each argument is sent as one tagged value, e.g. MPUT takes a single list that
+    alternates keys and values.
+    """
+    payload = bytearray((opcode,))
+    for arg in args:
+        encode_value(payload, arg)
+    out += _FRAME.pack(len(payload))
+    out += payload
+
+
+def _split_frames(buffer: bytearray):
+    """
+    Removes every complete frame from the front of buffer.
+
+    :return: A list of the frame payloads
+    """
+    frames = []
+    offset = 0
+    while offset + _FRAME.size <= len(buffer):
+        length, = _FRAME.unpack_from(buffer, offset)
+        if length > MAX_FRAME:
+            raise ProtocolError(f"frame of {length} bytes exceeds the limit")
+        end = offset + _FRAME.size + length
+        if end > len(buffer):
+            break
+        frames.append(bytes(buffer[offset + _FRAME.size:end]))
+        offset = end
+    del buffer[:offset]
+    return frames
+
+
+# ------------------------------------------------------------------ #
+
+
+def _check_key(key: object) -> str:
+    """Return key if it is a string, which every HashMap requires."""
+    if not isinstance(key, str):
+        raise ProtocolError("keys must be strings")
+    return key
+
+
+def _check_list(name: str, value: object) -> list:
+    """Return value if it is a list, as the argument of a multi-key request must be."""
+    if not isinstance(value, list):
+        raise ProtocolError(f"{name} takes a list")
+    return value
+
+
+class KVServer:
+    def __init__(self,
+                 map_class: type = hash_map_sc.HashMap,
+                 capacity: int = 11,
+                 function: callable = hash_function_2,
+                 host: str = '127.0.0.1',
+                 port: int = 0) -> None:
+        """
+        Create the server and the HashMap it serves. Call start() to begin accepting connections.
+
+        :param map_class: The HashMap class from hash_map_sc or hash_map_oa holding the data
+        :param capacity:  Initial capacity of the map
+        :param function:  Hash function of the map
+        :param host:      Address to listen on
+        :param port:      Port to listen on, or 0 to pick a free port
+        """
+        self._map = map_class(capacity, function)
+        self._host = host
+        self._port = port
+        self._server = None
+        self._connections = {}
+
+    def get_map(self):
+        """
+        Return the HashMap being served
+        """
+        return self._map
+
+    def get_port(self) -> int:
+        """
+        Return the port the server is listening on
+        """
+        return self._port
+
+    async def start(self) -> None:
+        """
+        Start listening. Returns once the socket is bound.
+        """
+        self._server = await asyncio.start_server(self._handle, self._host, self._port)
+        self._port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        """
+        Start listening if needed and serve until cancelled.
+        """
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """
+        Stop accepting connections, close every open connection and wait for their handlers to finish.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for writer in self._connections.values():
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+
+    # ------------------------------------------------------------------ #
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serves one connection. Every complete request in the buffer is answered before the replies are written, so
+        a pipelined burst of requests costs one write and one drain.
+        """
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        buffer = bytearray()
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                buffer += data
+
+                out = bytearray()
+                for payload in _split_frames(buffer):
+                    self._reply(out, payload)
+                if out:
+                    writer.write(out)
+                    await writer.drain()
+        except (ProtocolError, ConnectionError):
+            pass
+        finally:
+            del self._connections[task]
+            writer.close()
+
+    def _reply(self, out: bytearray, payload: bytes) -> None:
+        """Executes one request and appends its reply frame to out."""
+        reply = bytearray()
+        try:
+            result = self._execute(memoryview(payload))
+            reply.append(_OK)
+            encode_value(reply, result)
+        except (ProtocolError, TypeError, ValueError) as error:
+            reply = bytearray((_ERROR,))
+            encode_value(reply, str(error))
+        except Exception as error:
+            # Any other failure is answered too, so that the requests pipelined behind this one still get replies
+            reply = bytearray((_ERROR,))
+            encode_value(reply, f"{type(error).__name__}: {error}")
+        out += _FRAME.pack(len(reply))
+        out += reply
+
+    def _execute(self, payload: memoryview) -> object:
+        """Decodes a request and applies it to the map, returning the result to send back."""
+        if not payload:
+            raise ProtocolError("empty request")
+        opcode = payload[0]
+        if opcode not in _REQUESTS:
+            raise ProtocolError(f"unknown opcode {opcode}")
+        args = []
+        offset = 1
+        while offset < len(payload):
+            arg, offset = decode_value(payload, offset)
+            args.append(arg)
+
+        name, count = _REQUESTS[opcode]
+        if len(args) != count:
+            raise ProtocolError(f"{name} takes {count} argument{'s' if count != 1 else ''}, got {len(args)}")
+
+        hash_map = self._map
+        if opcode == GET:
+            return hash_map.get(_check_key(args[0]))
+        if opcode == PUT:
+            hash_map.put(_check_key(args[0]), args[1])
+            return None
+        if opcode == REMOVE:
+            hash_map.remove(_check_key(args[0]))
+            return None
+        if opcode == CONTAINS:
+            return hash_map.contains_key(_check_key(args[0]))
+        if opcode == MGET:
+            return [hash_map.get(_check_key(key)) for key in _check_list(name, args[0])]
+        if opcode == MPUT:
+            pairs = _check_list(name, args[0])
+            if len(pairs) % 2:
+                raise ProtocolError("MPUT takes a list of alternating keys and values")
+            for i in range(0, len(pairs), 2):
+                hash_map.put(_check_key(pairs[i]), pairs[i + 1])
+            return None
+        if opcode == MREMOVE:
+            for key in _check_list(name, args[0]):
+                hash_map.remove(_check_key(key))
+            return None
+        if opcode == SIZE:
+            return hash_map.get_size()
+        if opcode == CLEAR:
+            hash_map.clear()
+            return None
+
+
+# ------------------------------------------------------------------ #
+
+
+class Connection:
+    """
+    One client connection. Requests are written without waiting for replies, and replies are read back in order, so
+    many requests can be in flight on one connection.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Wrap an open stream pair."""
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def open(cls, host: str, port: int) -> "Connection":
+        """Open a connection to a KVServer."""
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def execute(self, requests) -> list:
+        """
+        Sends a batch of requests in one write and reads all of their replies.
+
+        :param requests: Iterable of (opcode, args) tuples, where args is a tuple of request arguments
+        :return:         The list of results in request order
+        :raises ServerError:   If the server rejected any of the requests, after every reply has been read
+        :raises ProtocolError: If a reply is malformed, which leaves the replies after it unread
+        """
+        out = bytearray()
+        count = 0
+        for opcode, args in requests:
+            encode_request(out, opcode, *args)
+            count += 1
+        self._writer.write(out)
+        await self._writer.drain()
+
+        results = []
+        error = None
+        for _ in range(count):
+            header = await self._reader.readexactly(_FRAME.size)
+            length, = _FRAME.unpack(header)
+            if length > MAX_FRAME:
+                raise ProtocolError(f"frame of {length} bytes exceeds the limit")
+            payload = memoryview(await self._reader.readexactly(length))
+            result, _ = decode_value(payload, 1)
+            if payload[0] == _ERROR and error is None:
+                error = ServerError(result)
+            results.append(result)
+
+        if error is not None:
+            raise error
+        return results
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._writer.close()
+
+
+class Pipeline:
+    """
+    Queues requests on the client and sends them all in one round trip when executed.
+    """
+
+    def __init__(self, client: "KVClient") -> None:
+        """Create an empty pipeline for a client."""
+        self._client = client
+        self._requests = []
+
+    def __len__(self) -> int:
+        """Return the number of queued requests."""
+        return len(self._requests)
+
+    def get(self, key: str) -> "Pipeline":
+        """Queue a get."""
+        self._requests.append((GET, (key,)))
+        return self
+
+    def put(self, key: str, value: object) -> "Pipeline":
+        """Queue a put."""
+        self._requests.append((PUT, (key, value)))
+        return self
+
+    def remove(self, key: str) -> "Pipeline":
+        """Queue a remove."""
+        self._requests.append((REMOVE, (key,)))
+        return self
+
+    def contains_key(self, key: str) -> "Pipeline":
+        """Queue a contains_key."""
+        self._requests.append((CONTAINS, (key,)))
+        return self
+
+    async def execute(self) -> list:
+        """
+        Send every queued request and return their results in order. The pipeline is empty afterward.
+        """
+        requests, self._requests = self._requests, []
+        async with self._client.connection() as connection:
+            return await connection.execute(requests)
+
+
+class _PooledConnection:
+    """Async context manager lending one connection from a KVClient's pool."""
+
+    def __init__(self, client: "KVClient") -> None:
+        self._client = client
+        self._connection = None
+
+    async def __aenter__(self) -> Connection:
+        self._connection = await self._client._acquire()
+        return self._connection
+
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        # Only an error reply leaves nothing unread on the connection, any other failure closes it rather than reuse it
+        broken = exc_type is not None and not issubclass(exc_type, ServerError)
+        self._client._release(self._connection, broken)
+
+
+class KVClient:
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, pool_size: int = 4) -> None:
+        """
+        Create a client for a KVServer. Connections are opened on demand, up to pool_size at a time, and reused.
+
+        :param host:      Address of the server
+        :param port:      Port of the server
+        :param pool_size: Maximum number of open connections. Callers beyond this wait for a free connection
+        """
+        self._host = host
+        self._port = port
+        self._idle = []
+        self._slots = asyncio.Semaphore(pool_size)
+
+    async def __aenter__(self) -> "KVClient":
+        """Use the client as an async context manager that closes it on exit."""
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Close the client."""
+        self.close()
+
+    async def _acquire(self) -> Connection:
+        """Return an idle connection, opening one if the pool is not full, or wait for one to be released."""
+        await self._slots.acquire()
+        if self._idle:
+            return self._idle.pop()
+        try:
+            return await Connection.open(self._host, self._port)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, connection: Connection, broken: bool = False) -> None:
+        """Return a connection to the pool, or close it if it is broken."""
+        if broken:
+            connection.close()
+        else:
+            self._idle.append(connection)
+        self._slots.release()
+
+    def connection(self) -> _PooledConnection:
+        """
+        Borrow a connection from the pool for the duration of an async with block
+        """
+        return _PooledConnection(self)
+
+    def pipeline(self) -> Pipeline:
+        """
+        Return a new Pipeline for batching requests into one round trip
+        """
+        return Pipeline(self)
+
+    def close(self) -> None:
+        """
+        Close every idle connection. Connections still borrowed are closed when they are returned.
+        """
+        for connection in self._idle:
+            connection.close()
+        self._idle = []
+
+    # ------------------------------------------------------------------ #
+
+    async def _call(self, opcode: int, *args) -> object:
+        """Sends a single request and returns its result."""
+        async with self.connection() as connection:
+            results = await connection.execute(((opcode, args),))
+        return results[0]
+
+    async def get(self, key: str) -> object:
+        """Return the value stored at key, or None."""
+        return await self._call(GET, key)
+
+    async def put(self, key: str, value: object) -> None:
+        """Store value at key."""
+        await self._call(PUT, key, value)
+
+    async def remove(self, key: str) -> None:
+        """Remove key."""
+        await self._call(REMOVE, key)
+
+    async def contains_key(self, key: str) -> bool:
+        """Return True if key is stored."""
+        return await self._call(CONTAINS, key)
+
+    async def get_many(self, keys) -> list:
+        """Return the values stored at many keys, in one request."""
+        return await self._call(MGET, list(keys))
+
+    async def put_many(self, items) -> None:
+        """Store many (key, value) tuples, in one request."""
+        pairs = []
+        for key, value in items:
+            pairs.append(key)
+            pairs.append(value)
+        await self._call(MPUT, pairs)
+
+    async def remove_many(self, keys) -> None:
+        """Remove many keys, in one request."""
+        await self._call(MREMOVE, list(keys))
+
+    async def get_size(self) -> int:
+        """Return the number of keys stored on the server."""
+        return await self._call(SIZE)
+
+    async def clear(self) -> None:
+        """Remove every key stored on the server."""
+        await self._call(CLEAR)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+
+if __name__ == "__main__":
+
+    async def demo() -> None:
+        server = KVServer(hash_map_oa.HashMap)
+        await server.start()
+
+        async with KVClient(port=server.get_port(), pool_size=2) as client:
+            print("\nKV server - put example 1")
+            print("-------------------------")
+            await client.put_many(('key' + str(i), i) for i in range(1000))
+            await client.put('text', 'café')
+            await client.put('big', 2 ** 100)
+            print(await client.get_size(), await client.get('key10'), await client.get('text'),
+                  await client.get('big') == 2 ** 100, await client.contains_key('missing'))
+
+            print("\nKV server - pipeline example 1")
+            print("------------------------------")
+            pipeline = client.pipeline()
+            for i in range(5):
+                pipeline.get('key' + str(i))
+            pipeline.remove('key0').contains_key('key0').put('list', [1, 2.5, b'x', None])
+            print(await pipeline.execute())
+            print(await client.get('list'))
+
+            print("\nKV server - concurrent example 1")
+            print("--------------------------------")
+            keys = ['key' + str(i) for i in range(1000)]
+            batches = await asyncio.gather(*(client.get_many(keys[i:i + 100]) for i in range(0, 1000, 100)))
+            print(sum(len(batch) for batch in batches), batches[9][-1])
+
+            try:
+                await client.put('bad', {'dicts': 'are not sent'})
+            except TypeError as error:
+                print(error)
+            try:
+                await client._call(GET, 5)
+            except ProtocolError as error:
+                print(error, await client.get('key1'))
+
+            print("\nKV server - pool example 1")
+            print("--------------------------")
+            # A reply frame over the limit leaves the real reply unread, so the connection is not reused
+            try:
+                async with client.connection() as connection:
+                    connection._reader.feed_data(_FRAME.pack(MAX_FRAME + 1))
+                    await connection.execute(((GET, ('key1',)),))
+            except ProtocolError as error:
+                print(type(error).__name__, connection in client._idle, await client.get('key2'))
+            try:
+                await client._call(GET, 5)
+            except ServerError as error:
+                print(type(error).__name__, len(client._idle))
+
+            print("\nKV server - malformed request example 1")
+            print("---------------------------------------")
+            # A request with missing arguments is answered with an error, and the request behind it still runs
+            connection = await Connection.open('127.0.0.1', server.get_port())
+            try:
+                await connection.execute(((GET, ()), (PUT, ('after', 1)), (MPUT, (['odd'],))))
+            except ProtocolError as error:
+                print(error)
+            print(await connection.execute(((GET, ('after',)), (SIZE, ()))))
+            connection.close()
+
+        await server.close()
+
+    asyncio.run(demo())
@@ -0,0 +1,265 @@
+# Name: Zachary Garner
+# Course: CS261 - Data Structures
+# Assignment: HashMap Implementation
+# Description: Bounded cache layered on top of either HashMap implementation. Entries are kept in least recently used
+# order through an intrusive doubly linked list, can expire after a per-entry time to live, and are evicted once a
+# maximum entry count or byte size is exceeded.
+
+import sys
+import time
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import hash_function_1
+
+
+class CacheNode:
+    """
+    Doubly linked list node stored as the value of each hash map entry
+    """
+
+    def __init__(self, key: str, value: object, expires_at: float = None, nbytes: int = 0) -> None:
+        """Initialize node given a key, value, expiry time and accounted size."""
+        self.key = key
+        self.value = value
+        self.expires_at = expires_at
+        self.nbytes = nbytes
+        self.prev = None
+        self.next = None
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        return '(' + str(self.key) + ': ' + str(self.value) + ')'
+
+
+class LRUCache:
+    def __init__(self,
+                 max_entries: int = None,
+                 max_bytes: int = None,
+                 ttl: float = None,
+                 map_class: type = hash_map_sc.HashMap,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 sizeof: callable = sys.getsizeof,
+                 clock: callable = time.monotonic) -> None:
+        """
+        Initialize a new cache on top of a HashMap class from hash_map_sc or hash_map_oa.
+
+        :param max_entries: Maximum number of entries kept, or None for no limit
+        :param max_bytes:   Maximum accounted size of keys and values, or None for no limit
+        :param ttl:         Default time to live in seconds for new entries, or None for no expiry
+        :param map_class:   The HashMap class used to index the entries
+        :param capacity:    Initial capacity of the underlying hash map
+        :param function:    Hash function of the underlying hash map
+        :param sizeof:      Function returning the size in bytes of a key or value, used with max_bytes
+        :param clock:       Function returning the current time in seconds, used for expiry
+        """
+        self._map = map_class(capacity, function)
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._sizeof = sizeof
+        self._clock = clock
+
+        # Sentinel nodes, the most recently used entry sits right after the head
+        self._head = CacheNode(None, None)
+        self._tail = CacheNode(None, None)
+        self._head.next = self._tail
+        self._tail.prev = self._head
+
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output, most recently used first."""
+        content = []
+        node = self._head.next
+        while node is not self._tail:
+            content.append(str(node))
+            node = node.next
+        return 'LRU [' + ' -> '.join(content) + ']'
+
+    def get_size(self) -> int:
+        """Return the number of cached entries, including expired entries that were not yet collected."""
+        return self._map.get_size()
+
+    def get_bytes(self) -> int:
+        """Return the accounted size of all cached keys and values."""
+        return self._bytes
+
+    def get_hits(self) -> int:
+        """Return the number of get calls that found a live entry."""
+        return self._hits
+
+    def get_misses(self) -> int:
+        """Return the number of get calls that found no entry or an expired one."""
+        return self._misses
+
+    def get_evictions(self) -> int:
+        """Return the number of entries evicted to respect max_entries or max_bytes."""
+        return self._evictions
+
+    def get_expirations(self) -> int:
+        """Return the number of entries dropped because their time to live elapsed."""
+        return self._expirations
+
+    # ------------------------------------------------------------------ #
+
+    def _unlink(self, node: CacheNode) -> None:
+        """Detach a node from the recency list."""
+        node.prev.next = node.next
+        node.next.prev = node.prev
+
+    def _push_front(self, node: CacheNode) -> None:
+        """Link a node in as the most recently used entry."""
+        node.prev = self._head
+        node.next = self._head.next
+        self._head.next.prev = node
+        self._head.next = node
+
+    def _drop(self, node: CacheNode) -> None:
+        """Remove a node from both the recency list and the hash map."""
+        self._unlink(node)
+        self._map.remove(node.key)
+        self._bytes -= node.nbytes
+
+    def _is_expired(self, node: CacheNode) -> bool:
+        """Return True if the node has a time to live that has elapsed."""
+        return node.expires_at is not None and self._clock() >= node.expires_at
+
+    def _evict(self) -> None:
+        """Evict least recently used entries until both limits are respected."""
+        while self._tail.prev is not self._head:
+            over_entries = self._max_entries is not None and self._map.get_size() > self._max_entries
+            over_bytes = self._max_bytes is not None and self._bytes > self._max_bytes
+            if not over_entries and not over_bytes:
+                return
+
+            self._drop(self._tail.prev)
+            self._evictions += 1
+
+    def put(self, key: str, value: object, ttl: float = None) -> None:
+        """
+        Adds or updates a key/value pair and marks it as the most recently used entry. Least recently used entries
+        are evicted afterward if a limit is exceeded.
+
+        :param key:   The target key
+        :param value: The given value that is to be cached
+        :param ttl:   Time to live in seconds for this entry, defaults to the cache wide ttl
+        """
+        if ttl is None:
+            ttl = self._ttl
+        expires_at = self._clock() + ttl if ttl is not None else None
+        nbytes = self._sizeof(key) + self._sizeof(value) if self._max_bytes is not None else 0
+
+        node = self._map.get(key)
+        if node is not None:
+            # Update the existing node in place and move it to the front
+            self._bytes += nbytes - node.nbytes
+            node.value = value
+            node.expires_at = expires_at
+            node.nbytes = nbytes
+            self._unlink(node)
+        else:
+            node = CacheNode(key, value, expires_at, nbytes)
+            self._map.put(key, node)
+            self._bytes += nbytes
+
+        self._push_front(node)
+        self._evict()
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value cached for the given key and marks it as the most recently used entry. Expired entries are
+        removed lazily here and reported as misses.
+
+        :param key: The given key that is associated with the value to be found
+        :return:    The cached value or None if the key was not found or has expired
+        """
+        node = self._map.get(key)
+        if node is None:
+            self._misses += 1
+            return None
+
+        if self._is_expired(node):
+            self._drop(node)
+            self._expirations += 1
+            self._misses += 1
+            return None
+
+        self._unlink(node)
+        self._push_front(node)
+        self._hits += 1
+        return node.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Checks if the provided key is cached and not expired. The recency order and counters are left unchanged.
+
+        :param key: The target key being searched for
+        :return:    True if a live entry exists, False if it does not
+        """
+        node = self._map.get(key)
+        if node is None:
+            return False
+
+        if self._is_expired(node):
+            self._drop(node)
+            self._expirations += 1
+            return False
+
+        return True
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its cached value.
+
+        :param key: The target key to be removed
+        """
+        node = self._map.get(key)
+        if node is not None:
+            self._drop(node)
+
+    def clear(self) -> None:
+        """
+        Removes every cached entry. The counters are kept.
+        """
+        self._map.clear()
+        self._head.next = self._tail
+        self._tail.prev = self._head
+        self._bytes = 0
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+
+if __name__ == "__main__":
+
+    print("\nLRU - eviction example 1")
+    print("------------------------")
+    c = LRUCache(max_entries=3)
+    for i in range(5):
+        c.put('key' + str(i), i * 10)
+    print(c, c.get_size(), c.get_evictions())
+    print(c.get('key0'), c.get('key2'))
+    c.put('key5', 50)
+    print(c, c.get_hits(), c.get_misses())
+
+    print("\nLRU - ttl example 1")
+    print("-------------------")
+    now = [0.0]
+    c = LRUCache(ttl=10, map_class=hash_map_oa.HashMap, clock=lambda: now[0])
+    c.put('key1', 10)
+    c.put('key2', 20, ttl=30)
+    now[0] = 15
+    print(c.get('key1'), c.get('key2'), c.contains_key('key1'), c.get_size(), c.get_expirations())
+
+    print("\nLRU - max_bytes example 1")
+    print("-------------------------")
+    c = LRUCache(max_bytes=300, sizeof=lambda obj: len(str(obj)) * 10)
+    for i in range(6):
+        c.put('k' + str(i), 'v' * (i + 1))
+    print(c, c.get_bytes(), c.get_evictions())
@@ -0,0 +1,474 @@
+# Name: Zachary Garner
+# Course: CS261 - Data Structures
+# Assignment: HashMap Implementation
+# Description: HashMap front-end that spreads its keys over several backend HashMaps, called nodes. Keys are routed by
+# a consistent-hash ring with virtual nodes, so adding or removing a node only moves the keys in the ranges that change
+# owner. A node is either a HashMap in the same process or a HashMap served by a worker process over a pipe, and
+# requests are batched so that each node sees one message per batch rather than one per key.
+
+import multiprocessing
+from bisect import bisect_left, insort
+
+import hash_map_oa
+import hash_map_sc
+from a6_include import DynamicArray, hash_function_2, make_seeded_hash_function
+
+# Operations of a node batch, each sent as an (operation, key, value) tuple
+_PUT = 0
+_GET = 1
+_CONTAINS = 2
+_REMOVE = 3
+_ITEMS = 4
+_SIZE = 5
+_CLEAR = 6
+
+# Default ring hash. Ring positions need well mixed high bits, which the cheap string hashes lack, and a fixed seed
+# keeps every key's owner the same from one run to the next
+ring_hash = make_seeded_hash_function(b'partitioned_map')
+
+
+def _execute(hash_map, batch) -> list:
+    """Applies a batch of operations to a HashMap, returning one result per operation."""
+    results = []
+    for operation, key, value in batch:
+        if operation == _GET:
+            results.append(hash_map.get(key))
+        elif operation == _PUT:
+            hash_map.put(key, value)
+            results.append(None)
+        elif operation == _CONTAINS:
+            results.append(hash_map.contains_key(key))
+        elif operation == _REMOVE:
+            hash_map.remove(key)
+            results.append(None)
+        elif operation == _ITEMS:
+            results.append(list(hash_map.iter_items()))
+        elif operation == _SIZE:
+            results.append(hash_map.get_size())
+        else:
+            hash_map.clear()
+            results.append(None)
+    return results
+
+
+def _serve(connection, map_class: type, capacity: int, function: callable) -> None:
+    """Worker process loop of a ProcessNode, answering batches until it receives None."""
+    hash_map = map_class(capacity, function)
+    while True:
+        batch = connection.recv()
+        if batch is None:
+            break
+        connection.send(_execute(hash_map, batch))
+    connection.close()
+
+
+class LocalNode:
+    """
+    Node holding its HashMap in the calling process.
+    Batches are executed by send(), and receive() returns the results of the last batch.
+    """
+
+    def __init__(self,
+                 map_class: type = hash_map_sc.HashMap,
+                 capacity: int = 11,
+                 function: callable = hash_function_2) -> None:
+        """
+        Create the node's HashMap.
+
+        :param map_class: The HashMap class from hash_map_sc or hash_map_oa holding the node's keys
+        :param capacity:  Initial capacity of the node's HashMap
+        :param function:  Hash function of the node's HashMap
+        """
+        self._map = map_class(capacity, function)
+        self._results = None
+
+    def send(self, batch: list) -> None:
+        """Execute a batch of operations."""
+        self._results = _execute(self._map, batch)
+
+    def receive(self) -> list:
+        """Return the results of the batch passed to the last send()."""
+        results, self._results = self._results, None
+        return results
+
+    def close(self) -> None:
+        """Release the node's HashMap."""
+        self._map = None
+
+
+class ProcessNode:
+    """
+    Node holding its HashMap in a worker process, reached through a multiprocessing pipe.
+    send() returns as soon as the batch is written, so a caller can send to every node before waiting on any of them.
+    The map class and hash function must be picklable, i.e. defined at module level.
+    """
+
+    def __init__(self,
+                 map_class: type = hash_map_sc.HashMap,
+                 capacity: int = 11,
+                 function: callable = hash_function_2,
+                 context: str = None) -> None:
+        """
+        Start the worker process.
+
+        :param map_class: The HashMap class from hash_map_sc or hash_map_oa holding the node's keys
+        :param capacity:  Initial capacity of the node's HashMap
+        :param function:  Hash function of the node's HashMap
+        :param context:   multiprocessing start method, e.g. 'spawn', or None for the platform default
+        """
+        context = multiprocessing.get_context(context)
+        self._connection, child = context.Pipe()
+        self._process = context.Process(target=_serve, args=(child, map_class, capacity, function), daemon=True)
+        self._process.start()
+        child.close()
+
+    def send(self, batch: list) -> None:
+        """Send a batch of operations to the worker."""
+        self._connection.send(batch)
+
+    def receive(self) -> list:
+        """Wait for the results of the oldest batch not yet received."""
+        return self._connection.recv()
+
+    def close(self) -> None:
+        """Stop the worker process."""
+        if self._process.is_alive():
+            self._connection.send(None)
+            self._process.join()
+        self._connection.close()
+
+
+class HashRing:
+    """
+    Consistent-hash ring. Every node is placed at vnodes points on a 64-bit ring, and a key belongs to the node owning
+    the first point at or after the key's hash, wrapping around at the end of the ring.
+    """
+
+    def __init__(self, vnodes: int = 64, function: callable = ring_hash) -> None:
+        """
+        Initialize an empty ring.
+
+        :param vnodes:   Number of points per node. More points spread keys more evenly across nodes
+        :param function: Hash function placing keys and points on the ring
+        """
+        self._vnodes = vnodes
+        self._hash_function = function
+        self._points = []
+        self._owners = {}
+
+    def __len__(self) -> int:
+        """Return the number of points on the ring."""
+        return len(self._points)
+
+    def _node_points(self, name: str) -> list:
+        """Return the ring positions of a node's virtual nodes."""
+        return [self._hash_function(f'{name}#{i}') for i in range(self._vnodes)]
+
+    def add(self, name: str) -> list:
+        """
+        Place a node on the ring.
+
+        :return: The (point, previous owner) pairs of the new node's points, where previous owner is the node that
+                 owned the point's range before, or None if the ring was empty
+        """
+        taken = []
+        for point in self._node_points(name):
+            if point in self._owners:
+                continue
+            previous = self.owner_of_point(point) if self._points else None
+            insort(self._points, point)
+            self._owners[point] = name
+            taken.append((point, previous))
+        return taken
+
+    def remove(self, name: str) -> None:
+        """Take a node's points off the ring."""
+        for point in self._node_points(name):
+            if self._owners.get(point) == name:
+                del self._owners[point]
+                self._points.remove(point)
+
+    def owner_of_point(self, point: int) -> str:
+        """Return the node owning a ring position."""
+        index = bisect_left(self._points, point)
+        if index == len(self._points):
+            index = 0
+        return self._owners[self._points[index]]
+
+    def owner(self, key: str) -> str:
+        """Return the node a key belongs to."""
+        return self.owner_of_point(self._hash_function(key))
+
+
+class HashMap:
+    def __init__(self, vnodes: int = 64, ring_function: callable = ring_hash) -> None:
+        """
+        Initialize a partitioned HashMap with no nodes. Add nodes with add_node() before using it.
+
+        :param vnodes:        Number of virtual nodes per node on the consistent-hash ring
+        :param ring_function: Hash function routing keys to nodes, independent of the nodes' own hash functions
+        """
+        self._ring = HashRing(vnodes, ring_function)
+        self._nodes = {}
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        sizes = self.node_sizes()
+        for name in sorted(sizes):
+            out += f"{name}: {sizes[name]} entries\n"
+        return out
+
+    def get_nodes(self) -> list:
+        """
+        Return the names of the nodes
+        """
+        return sorted(self._nodes)
+
+    # ------------------------------------------------------------------ #
+
+    def _group(self, operation: int, pairs) -> dict:
+        """Groups (key, value) pairs into one batch of operations per owning node."""
+        if not self._nodes:
+            raise RuntimeError("partitioned HashMap has no nodes")
+        batches = {}
+        for key, value in pairs:
+            batches.setdefault(self._ring.owner(key), []).append((operation, key, value))
+        return batches
+
+    def _run(self, batches: dict) -> dict:
+        """
+        Sends every node its batch before waiting for any reply, so worker processes execute their batches in
+        parallel. Returns each node's list of results.
+        """
+        for name, batch in batches.items():
+            self._nodes[name].send(batch)
+        return {name: self._nodes[name].receive() for name in batches}
+
+    def _broadcast(self, operation: int) -> dict:
+        """Runs one operation on every node, returning each node's result."""
+        results = self._run({name: [(operation, None, None)] for name in self._nodes})
+        return {name: result[0] for name, result in results.items()}
+
+    def _lookup_many(self, operation: int, keys) -> DynamicArray:
+        """Runs a keyed operation for many keys and returns the results in the order of the keys."""
+        keys = list(keys)
+        batches = self._group(operation, ((key, None) for key in keys))
+        results = {name: iter(values) for name, values in self._run(batches).items()}
+
+        out = DynamicArray()
+        for key in keys:
+            out.append(next(results[self._ring.owner(key)]))
+        return out
+
+    def _move(self, batches_to_remove: dict, items_to_put: list) -> int:
+        """Removes migrating keys from their old nodes and puts them on their new ones, returning how many moved."""
+        self._run(batches_to_remove)
+        if items_to_put:
+            self._run(self._group(_PUT, items_to_put))
+        return len(items_to_put)
+
+    # ------------------------------------------------------------------ #
+
+    def add_node(self, name: str, node) -> int:
+        """
+        Adds a node and moves to it the keys in the ring ranges it takes over. Only the nodes that previously owned
+        those ranges are scanned, and only the keys that change owner are moved.
+
+        :param name: Unique name of the node, which also decides its ring positions
+        :param node: A LocalNode or ProcessNode, which should be empty
+        :return:     The number of keys moved to the new node
+        """
+        if name in self._nodes:
+            raise ValueError(f"node already exists: {name}")
+
+        self._nodes[name] = node
+        previous_owners = {previous for _, previous in self._ring.add(name) if previous not in (None, name)}
+        if not previous_owners:
+            return 0
+
+        contents = self._run({source: [(_ITEMS, None, None)] for source in previous_owners})
+        removals = {}
+        moving = []
+        for source, (items,) in contents.items():
+            for key, value in items:
+                if self._ring.owner(key) == name:
+                    removals.setdefault(source, []).append((_REMOVE, key, None))
+                    moving.append((key, value))
+        return self._move(removals, moving)
+
+    def remove_node(self, name: str):
+        """
+        Removes a node and hands each of its keys to the node that now owns it.
+
+        :param name: Name of the node to remove
+        :return:     The removed node, still open and now empty, so the caller may close or reuse it
+        """
+        if name not in self._nodes:
+            raise KeyError(name)
+        if len(self._nodes) == 1 and self.get_size() > 0:
+            raise ValueError("cannot remove the last node of a non-empty map")
+
+        node = self._nodes[name]
+        node.send([(_ITEMS, None, None), (_CLEAR, None, None)])
+        items = node.receive()[0]
+
+        self._ring.remove(name)
+        del self._nodes[name]
+        if items:
+            self._run(self._group(_PUT, items))
+        return node
+
+    def close(self) -> None:
+        """
+        Closes every node. The map must not be used afterward.
+        """
+        for node in self._nodes.values():
+            node.close()
+        self._nodes = {}
+
+    def node_sizes(self) -> dict:
+        """
+        Return the number of entries held by each node
+        """
+        return self._broadcast(_SIZE)
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates the key/value pair on the node that owns the key.
+
+        :param key:   The target key
+        :param value: The given value that is to be added
+        """
+        self._run(self._group(_PUT, ((key, value),)))
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key, if the key is not found, it returns None.
+
+        :param key: The given key that is associated with the value to be found
+        :return:    The value at the given key or None if the key was not found
+        """
+        return self._lookup_many(_GET, (key,)).get_unchecked(0)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Checks if the provided key is in the hash map.
+
+        :param key: The target key being searched for
+        :return:    True if the key exists, False if it does not
+        """
+        return self._lookup_many(_CONTAINS, (key,)).get_unchecked(0)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its associated value.
+
+        :param key: The target key to be removed
+        """
+        self._run(self._group(_REMOVE, ((key, None),)))
+
+    def put_many(self, items) -> None:
+        """
+        Updates many key/value pairs, sending each node a single batch.
+
+        :param items: Iterable of (key, value) tuples
+        """
+        self._run(self._group(_PUT, items))
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Looks up many keys, sending each node a single batch.
+
+        :param keys: Iterable of keys
+        :return:     A DynamicArray of the values, or None for missing keys, in the order of the keys
+        """
+        return self._lookup_many(_GET, keys)
+
+    def contains_many(self, keys) -> DynamicArray:
+        """
+        Checks many keys, sending each node a single batch.
+
+        :param keys: Iterable of keys
+        :return:     A DynamicArray of booleans in the order of the keys
+        """
+        return self._lookup_many(_CONTAINS, keys)
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes many keys, sending each node a single batch.
+
+        :param keys: Iterable of keys
+        """
+        self._run(self._group(_REMOVE, ((key, None) for key in keys)))
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return sum(self.node_sizes().values())
+
+    def iter_items(self):
+        """
+        Generator over the key/value tuples in the hash map, one node at a time.
+        """
+        for items in self._broadcast(_ITEMS).values():
+            yield from items
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Creates a new DynamicArray where each index is a tuple that contains the key/value pair that's stored in the
+        hash map.
+
+        :return: The newly created DynamicArray
+        """
+        new_da = DynamicArray()
+        new_da.extend(self.iter_items())
+        return new_da
+
+    def clear(self) -> None:
+        """
+        Clears the contents of every node.
+        """
+        if self._nodes:
+            self._broadcast(_CLEAR)
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+
+if __name__ == "__main__":
+
+    print("\nPartitioned - put example 1")
+    print("---------------------------")
+    m = HashMap()
+    for name in ('a', 'b', 'c'):
+        m.add_node(name, LocalNode(hash_map_oa.HashMap))
+    m.put_many(('key' + str(i), i) for i in range(1000))
+    print(m.get_size(), m.get('key10'), m.contains_key('key1000'), sorted(m.node_sizes().values())[0] > 200)
+
+    print("\nPartitioned - migration example 1")
+    print("---------------------------------")
+    sizes = m.node_sizes()
+    moved = m.add_node('d', LocalNode())
+    after = m.node_sizes()
+    print(moved == after['d'], all(after[name] <= sizes[name] for name in sizes), m.get_size())
+    m.remove_node('a')
+    values = m.get_many('key' + str(i) for i in range(1000))
+    print(m.get_nodes(), m.get_size(), all(values.get_unchecked(i) == i for i in range(1000)))
+    m.close()
+
+    print("\nPartitioned - process example 1")
+    print("-------------------------------")
+    m = HashMap(vnodes=32)
+    for name in ('w0', 'w1'):
+        m.add_node(name, ProcessNode(hash_map_sc.HashMap))
+    m.put_many(('key' + str(i), i) for i in range(500))
+    m.remove_many('key' + str(i) for i in range(0, 500, 2))
+    m.add_node('w2', ProcessNode())
+    print(m.get_size(), m.get('key1'), m.get('key2'), m.get_keys_and_values().length())
+    m.close()
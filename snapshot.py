@@ -0,0 +1,102 @@
+# Name: Zachary Garner
+# Course: CS261 - Data Structures
+# Assignment: HashMap Implementation
+# Description: Copy-on-write support shared by both HashMap implementations. A snapshot reads the live map's bucket
+# array through a SnapshotBuckets view. Before the live map changes a bucket, it hands the view a private copy of the
+# bucket's old contents, so the snapshot keeps seeing the map as it was when the snapshot was taken. Only buckets that
+# are written after the snapshot are ever copied.
+
+import weakref
+
+
+class SnapshotException(Exception):
+    pass
+
+
+class SnapshotBuckets:
+    """
+    Read-only view of a bucket array. Buckets preserved by the live map are read from the view's own copies, every
+    other bucket is read from the shared array.
+    Supported methods are the reading methods of DynamicArray: get_at_index, get_unchecked, length
+    """
+
+    def __init__(self, buckets) -> None:
+        """Initialize the view over the live map's current bucket array."""
+        self._source = buckets
+        self._preserved = {}
+
+    def __iter__(self):
+        """Disable iterator capability, like DynamicArray."""
+        return None
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        return str([self.get_unchecked(i) for i in range(self.length())])
+
+    def preserve(self, index: int, copy: object) -> None:
+        """Keep a copy of a bucket's contents from before the live map changes it, unless one is already kept."""
+        if index not in self._preserved:
+            self._preserved[index] = copy
+
+    def is_preserved(self, index: int) -> bool:
+        """Return True if the view already holds its own copy of a bucket."""
+        return index in self._preserved
+
+    def get_unchecked(self, index: int):
+        """Return the bucket at a given index as it was when the snapshot was taken."""
+        preserved = self._preserved.get(index, self)
+        if preserved is not self:
+            return preserved
+        return self._source.get_unchecked(index)
+
+    def get_at_index(self, index: int):
+        """Return the bucket at a given index as it was when the snapshot was taken."""
+        if index < 0 or index >= self.length():
+            raise IndexError(index)
+        return self.get_unchecked(index)
+
+    def __getitem__(self, index: int):
+        """Return the bucket at a given index using [] syntax."""
+        return self.get_at_index(index)
+
+    def length(self) -> int:
+        """Return the number of buckets."""
+        return self._source.length()
+
+    def get_copied_buckets(self) -> int:
+        """Return how many buckets were copied because the live map wrote to them."""
+        return len(self._preserved)
+
+
+def take_snapshot(hash_map, snapshot_class: type):
+    """
+    Create an O(1) read-only snapshot of a map. The snapshot shares every attribute of the map, but reads buckets
+    through a SnapshotBuckets view that the map keeps up to date with copy-on-write. Mutating methods shadowed on the
+    live instance, e.g. by instrumentation, are not carried over.
+
+    :param hash_map:       A HashMap from hash_map_sc or hash_map_oa
+    :param snapshot_class: The read-only HashMap subclass to create
+    """
+    snapshot = snapshot_class.__new__(snapshot_class)
+    snapshot.__dict__.update(hash_map.__dict__)
+    for name in ('put', 'get', 'contains_key', 'remove'):
+        snapshot.__dict__.pop(name, None)
+
+    snapshot._buckets = SnapshotBuckets(hash_map._buckets)
+    snapshot._instrumentation = None
+    snapshot._snapshots = None
+
+    # The live map keeps updating its Bloom filter in place, so the snapshot looks every key up in its buckets
+    snapshot._bloom = None
+
+    # Snapshots are read-only, and the feed belongs to the live map
+    snapshot._change_feed = None
+
+    # Group probing metadata is updated in place too, so the map copies it before its next write
+    if getattr(hash_map, '_meta', None) is not None:
+        hash_map._meta_shared = True
+
+    if hash_map._snapshots is None:
+        hash_map._snapshots = weakref.WeakSet()
+    hash_map._snapshots.add(snapshot._buckets)
+    return snapshot
@@ -0,0 +1,134 @@
+# Name: Zachary Garner
+# Course: CS261 - Data Structures
+# Assignment: HashMap Implementation
+# Description: Value codec for the codec option of both HashMaps. Values whose serialized form reaches a size threshold
+# are stored compressed and only decompressed when they are read, with a small cache of recently decoded values so
+# that hot keys are not decompressed on every read. Small values are stored as they are.
+
+import json
+import pickle
+import zlib
+from collections import OrderedDict
+
+
+def json_dumps(value: object) -> bytes:
+    """Serialize a JSON-compatible value to compact UTF-8 bytes."""
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def json_loads(data: bytes) -> object:
+    """Deserialize bytes written by json_dumps."""
+    return json.loads(data)
+
+
+def _pickle_dumps(value: object) -> bytes:
+    """Serialize a value with the highest pickle protocol."""
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+class CompressedValue:
+    """
+    A value as stored by a ValueCodec: its serialized form, compressed.
+    """
+    __slots__ = ('data', 'length')
+
+    def __init__(self, data: bytes, length: int) -> None:
+        """Wrap compressed data that decompresses to length bytes."""
+        self.data = data
+        self.length = length
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        return f"CompressedValue({len(self.data)} of {self.length} bytes)"
+
+
+class ValueCodec:
+    def __init__(self,
+                 threshold: int = 512,
+                 dumps: callable = _pickle_dumps,
+                 loads: callable = pickle.loads,
+                 compress: callable = zlib.compress,
+                 decompress: callable = zlib.decompress,
+                 cache_size: int = 32) -> None:
+        """
+        Initialize a codec. One codec may be shared by several maps.
+
+        :param threshold:  Serialized size in bytes from which a value is stored compressed. None, bools, numbers and
+                           strings or bytes shorter than the threshold are stored without being serialized at all
+        :param dumps:      Function serializing a value to bytes, e.g. json_dumps
+        :param loads:      Function deserializing the output of dumps, e.g. json_loads
+        :param compress:   Function compressing bytes, e.g. zlib.compress or lzma.compress
+        :param decompress: Function reversing compress
+        :param cache_size: Number of decoded values kept for repeated reads, or 0 to decode on every read. Cached
+                           values are shared between reads, so a caller that mutates a value it read should put it
+                           back rather than rely on the mutation
+        """
+        self._threshold = threshold
+        self._dumps = dumps
+        self._loads = loads
+        self._compress = compress
+        self._decompress = decompress
+        self._cache_size = cache_size
+
+        # Decoded values by the CompressedValue they came from, least recently read first
+        self._cache = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get_hits(self) -> int:
+        """
+        Return the number of reads answered from the decoded-value cache
+        """
+        return self._hits
+
+    def get_misses(self) -> int:
+        """
+        Return the number of reads that had to decompress
+        """
+        return self._misses
+
+    def encode(self, value: object) -> object:
+        """
+        Return the form of a value to store: a CompressedValue if compressing its serialized form pays off, otherwise
+        the value itself. A CompressedValue is already encoded and is returned as it is.
+        """
+        if value is None or isinstance(value, (bool, int, float, CompressedValue)):
+            return value
+        if isinstance(value, (str, bytes)) and len(value) < self._threshold:
+            return value
+
+        data = self._dumps(value)
+        if len(data) < self._threshold:
+            return value
+
+        compressed = self._compress(data)
+        if len(compressed) >= len(data):
+            return value
+        return CompressedValue(compressed, len(data))
+
+    def decode(self, stored: object) -> object:
+        """
+        Return the value a stored form was encoded from.
+        """
+        if type(stored) is not CompressedValue:
+            return stored
+
+        cache = self._cache
+        if stored in cache:
+            cache.move_to_end(stored)
+            self._hits += 1
+            return cache[stored]
+
+        self._misses += 1
+        value = self._loads(self._decompress(stored.data))
+        if self._cache_size:
+            cache[stored] = value
+            if len(cache) > self._cache_size:
+                cache.popitem(last=False)
+        return value
+
+    def clear_cache(self) -> None:
+        """
+        Drop every cached decoded value.
+        """
+        self._cache = OrderedDict()
@@ -0,0 +1,299 @@
+# Name: Zachary Garner
+# Course: CS261 - Data Structures
+# Assignment: HashMap Implementation
+# Description: Multi-version map on top of the separate chaining HashMap. Every put and remove is stamped with a new
+# version number, and each key's chain entry holds the key's history as a sorted array of versions next to a list of
+# values, so the value of a key at any retained version is one hash lookup plus a binary search. Versions older than
+# a retention window can be garbage collected.
+
+from array import array
+from bisect import bisect_right
+
+import hash_map_sc
+from a6_include import DynamicArray, hash_function_2
+
+# Marks a version at which the key was removed
+_DELETED = object()
+
+
+class VersionList:
+    """
+    History of one key: versions in increasing order, and the value written at each version.
+    """
+    __slots__ = ('versions', 'values')
+
+    def __init__(self) -> None:
+        """Initialize an empty history."""
+        self.versions = array('Q')
+        self.values = []
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        pairs = ('{}: {}'.format(version, 'deleted' if value is _DELETED else value)
+                 for version, value in zip(self.versions, self.values))
+        return '[' + ', '.join(pairs) + ']'
+
+    def append(self, version: int, value: object) -> None:
+        """Record value at a version newer than every recorded one."""
+        self.versions.append(version)
+        self.values.append(value)
+
+    def latest(self) -> object:
+        """Return the most recent value, which may be the deletion marker."""
+        return self.values[-1]
+
+    def at(self, version: int) -> object:
+        """Return the value in effect at version, or the deletion marker if the key did not exist then."""
+        index = bisect_right(self.versions, version) - 1
+        if index < 0:
+            return _DELETED
+        return self.values[index]
+
+    def prune(self, cutoff: int) -> int:
+        """
+        Drops every version that no query at cutoff or later can see, i.e. everything before the last version at or
+        before cutoff, and that version too if it is a deletion.
+
+        :return: The number of versions dropped
+        """
+        base = bisect_right(self.versions, cutoff) - 1
+        if base >= 0 and self.values[base] is _DELETED:
+            base += 1
+        if base <= 0:
+            return 0
+        del self.versions[:base]
+        del self.values[:base]
+        return base
+
+
+class VersionedHashMap:
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_2,
+                 retention: int = None) -> None:
+        """
+        Initialize an empty versioned map at version 0.
+
+        :param capacity:  Initial capacity of the underlying HashMap
+        :param function:  Hash function of the underlying HashMap
+        :param retention: Number of most recent versions gc() keeps by default, or None to keep every version
+        """
+        self._map = hash_map_sc.HashMap(capacity, function)
+        self._retention = retention
+        self._version = 0
+        self._oldest = 0
+        self._size = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for key, history in self._map.iter_items():
+            out += f"{key}: {history}\n"
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return the number of keys present at the current version
+        """
+        return self._size
+
+    def get_version(self) -> int:
+        """
+        Return the current version, i.e. the version of the most recent change
+        """
+        return self._version
+
+    def get_oldest_version(self) -> int:
+        """
+        Return the oldest version that can still be queried
+        """
+        return self._oldest
+
+    def _check_version(self, version: int) -> int:
+        """Returns the version to read at, the current one if version is None."""
+        if version is None:
+            return self._version
+        if version < self._oldest:
+            raise ValueError(f"version {version} was garbage collected, the oldest version is {self._oldest}")
+        return version
+
+    def _write(self, key: str, value: object, version: int) -> None:
+        """Appends a value to a key's history, creating the history if needed, and keeps the size current."""
+        history = self._map.get(key)
+        if history is None:
+            history = VersionList()
+            self._map.put(key, history)
+            was_present = False
+        else:
+            was_present = history.latest() is not _DELETED
+
+        history.append(version, value)
+        self._size += (value is not _DELETED) - was_present
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> int:
+        """
+        Sets the value of a key as a new version.
+
+        :param key:   The target key
+        :param value: The given value that is to be added
+        :return:      The version of the change
+        """
+        self._version += 1
+        self._write(key, value, self._version)
+        return self._version
+
+    def put_many(self, items) -> int:
+        """
+        Sets several keys as one new version, so that no version shows only part of the batch.
+
+        :param items: Iterable of (key, value) tuples. If a key repeats, its last value wins
+        :return:      The version of the batch
+        """
+        version = self._version + 1
+        for key, value in items:
+            history = self._map.get(key)
+            if history is not None and history.versions and history.versions[-1] == version:
+                # The key already appeared earlier in this batch, so overwrite that value
+                history.values[-1] = value
+            else:
+                self._write(key, value, version)
+        self._version = version
+        return version
+
+    def remove(self, key: str) -> int:
+        """
+        Removes a key as a new version. Earlier versions still see the key.
+
+        :param key: The target key to be removed
+        :return:    The version of the change, or the current version if the key was not present
+        """
+        history = self._map.get(key)
+        if history is None or history.latest() is _DELETED:
+            return self._version
+        self._version += 1
+        self._write(key, _DELETED, self._version)
+        return self._version
+
+    def get(self, key: str, version: int = None) -> object:
+        """
+        Returns the value of a key at a version, or None if the key did not exist at that version.
+
+        :param key:     The given key that is associated with the value to be found
+        :param version: The version to read at, or None for the current version
+        :raises ValueError: If version was garbage collected
+        """
+        version = self._check_version(version)
+        history = self._map.get(key)
+        if history is None:
+            return None
+        value = history.at(version)
+        return None if value is _DELETED else value
+
+    def contains_key(self, key: str, version: int = None) -> bool:
+        """
+        Checks if a key existed at a version.
+
+        :param key:     The target key being searched for
+        :param version: The version to check at, or None for the current version
+        :raises ValueError: If version was garbage collected
+        """
+        version = self._check_version(version)
+        history = self._map.get(key)
+        return history is not None and history.at(version) is not _DELETED
+
+    def iter_items(self, version: int = None):
+        """
+        Generator over the key/value tuples present at a version.
+
+        :param version: The version to read at, or None for the current version
+        """
+        version = self._check_version(version)
+        for key, history in self._map.iter_items():
+            value = history.at(version)
+            if value is not _DELETED:
+                yield key, value
+
+    def get_keys_and_values(self, version: int = None) -> DynamicArray:
+        """
+        Creates a new DynamicArray of the key/value tuples present at a version.
+
+        :param version: The version to read at, or None for the current version
+        """
+        new_da = DynamicArray()
+        new_da.extend(self.iter_items(version))
+        return new_da
+
+    def history(self, key: str) -> DynamicArray:
+        """
+        Returns the retained history of a key as a DynamicArray of (version, value) tuples, oldest first, where the
+        value is None for a removal.
+
+        :param key: The target key
+        """
+        new_da = DynamicArray()
+        history = self._map.get(key)
+        if history is not None:
+            for version, value in zip(history.versions, history.values):
+                new_da.append((version, None if value is _DELETED else value))
+        return new_da
+
+    def gc(self, keep_from: int = None) -> int:
+        """
+        Garbage collects the versions that no query at keep_from or later needs. Afterward, versions before keep_from
+        can no longer be queried.
+
+        :param keep_from: The oldest version to keep answerable, by default the current version minus retention
+        :return:          The number of versions dropped
+        """
+        if keep_from is None:
+            if self._retention is None:
+                return 0
+            keep_from = self._version - self._retention + 1
+        keep_from = min(keep_from, self._version)
+        if keep_from <= self._oldest:
+            return 0
+
+        dropped = 0
+        emptied = DynamicArray()
+        for key, history in self._map.iter_items():
+            dropped += history.prune(keep_from)
+            if not history.values:
+                emptied.append(key)
+
+        # Keys whose whole retained history was a removal are dropped from the map
+        for i in range(emptied.length()):
+            self._map.remove(emptied.get_unchecked(i))
+
+        self._oldest = keep_from
+        return dropped
+
+
+# ------------------- BASIC TESTING ---------------------------------------- #
+
+
+if __name__ == "__main__":
+
+    print("\nVersioned - put example 1")
+    print("-------------------------")
+    m = VersionedHashMap(retention=3)
+    v1 = m.put('a', 1)
+    v2 = m.put_many((('a', 2), ('b', 20)))
+    v3 = m.remove('a')
+    v4 = m.put('b', 21)
+    print(v1, v2, v3, v4, m.get_size())
+    print(m.get('a', v1), m.get('a', v2), m.get('a'), m.get('b', v2), m.get('b'), m.contains_key('a', v2))
+    print(sorted(m.iter_items(v2)), m.history('a'))
+
+    print("\nVersioned - gc example 1")
+    print("------------------------")
+    for i in range(10):
+        m.put('b', 100 + i)
+    print(m.gc(), m.get_oldest_version(), m.get('b', m.get_oldest_version()), m.history('a').length())
+    try:
+        m.get('b', v4)
+    except ValueError as error:
+        print(error)